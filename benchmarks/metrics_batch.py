@@ -0,0 +1,60 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from utils.metrics import batch_metrics, capture_metrics, get_metrics
+
+
+def random_returns(days: int, series: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2015-01-01", periods=days, name="Date")
+    return pd.DataFrame(rng.normal(0.0003, 0.02, (days, series)), index=index)
+
+
+def per_series(returns: pd.DataFrame) -> None:
+    # One get_metrics call per series, as sweeps and scanners used to do
+    with capture_metrics():
+        for column in returns.columns:
+            frame = pd.DataFrame({"Total_Return": returns[column]})
+            frame["Cumulative_Return"] = (1 + frame["Total_Return"]).cumprod()
+            frame["Drawdown"] = frame["Cumulative_Return"] / frame["Cumulative_Return"].cummax() - 1
+            get_metrics(frame, "benchmark")
+
+
+def timed(func) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched metrics by number of return series")
+    parser.add_argument("--days", type=int, default=1260, help="trading days per series")
+    parser.add_argument("--series", type=int, nargs="+", default=[1, 100, 1000, 10000])
+    parser.add_argument(
+        "--loop-max", type=int, default=1000,
+        help="largest series count to run the per-series loop on",
+    )
+    args = parser.parse_args()
+
+    print(f"{'series':>8}{'batched':>17}{'per series':>17}")
+    for count in args.series:
+        returns = random_returns(args.days, count)
+        row = f"{count:>8}"
+        seconds = timed(lambda: batch_metrics(returns.to_numpy(), returns.index))
+        row += f"{seconds:>16.3f}s"
+        if count <= args.loop_max:
+            row += f"{timed(lambda: per_series(returns)):>16.3f}s"
+        else:
+            row += f"{'skipped':>17}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+
+# Keep the benchmark away from the real caches and from any display
+os.environ.setdefault("LOOKBACK_CACHE_DIR", tempfile.mkdtemp())
+os.environ.setdefault("MPLBACKEND", "Agg")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from utils.downloader import DownloadReport
+from utils.llm_cache import CompletionCache
+from utils.llm_helper import LLMHelper
+from utils.price_store import PriceStore
+
+RESPONSES = {
+    "pandas_code_generate": "self._ticker_data[self._ticker_data['ticker'].isin(['AAPL', 'MSFT'])]",
+    "gpt_code_generate": '_strategy_data = load_prices(tickers, start="2020-01-01", end="2021-01-01")',
+    "strategy_identifier": "long",
+    "strategy_call": "Traditional.long(df=self._strategy_data)",
+}
+
+
+class FakeChat:
+    def __init__(self, latency: float, is_async: bool) -> None:
+        self.latency = latency
+        self.calls = 0
+        create = self._acreate if is_async else self._create
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=create))
+
+    def _respond(self, messages) -> types.SimpleNamespace:
+        self.calls += 1
+        system = messages[0]["content"]
+        if "filter the dataframe" in system:
+            content = RESPONSES["pandas_code_generate"]
+        elif "load price data" in system:
+            content = RESPONSES["gpt_code_generate"]
+        elif "identify the type of strategy" in system:
+            content = RESPONSES["strategy_identifier"]
+        else:
+            content = RESPONSES["strategy_call"]
+        message = types.SimpleNamespace(content=content)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+    def _create(self, model, messages, **kwargs):
+        time.sleep(self.latency)
+        return self._respond(messages)
+
+    async def _acreate(self, model, messages, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._respond(messages)
+
+
+def fake_fetcher(latency: float):
+    def fetch(tickers, start, end, interval):
+        time.sleep(latency)
+        index = pd.bdate_range(start, end - pd.Timedelta(days=1), name="Date")
+        frames = {}
+        for ticker in tickers:
+            close = 100 * np.exp(np.cumsum(np.random.normal(0, 0.01, len(index))))
+            frames[ticker] = pd.DataFrame({"Close": close}, index=index)
+        return DownloadReport(frames=frames)
+
+    return fetch
+
+
+def run(use_async: bool, latency: float, download_latency: float) -> dict:
+    PriceStore._instance = PriceStore(
+        cache_dir=tempfile.mkdtemp(), fetcher=fake_fetcher(download_latency)
+    )
+    helper = LLMHelper(
+        "Long AAPL and MSFT in 2020",
+        pd.DataFrame({"ticker": ["AAPL", "MSFT"]}),
+        api_key="benchmark",
+    )
+    helper.use_intent_parser = False
+    helper.use_planner = False
+    helper.use_async_pipeline = use_async
+    helper.client = FakeChat(latency, is_async=False)
+    helper.async_client = FakeChat(latency, is_async=True)
+    helper.execute_code()
+    return helper.stage_timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial vs asyncio LLM pipeline latency")
+    parser.add_argument("--latency", type=float, default=0.5, help="fake LLM latency in seconds")
+    parser.add_argument("--download-latency", type=float, default=0.5)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    CompletionCache.instance().enabled = False
+    for label, use_async in [("serial", False), ("asyncio", True)]:
+        totals = []
+        for _ in range(args.runs):
+            timings = run(use_async, args.latency, args.download_latency)
+            totals.append(timings["total"])
+        print(f"{label:>8}: {np.median(totals):.3f}s median total")
+        for stage, seconds in timings.items():
+            print(f"{'':>10}{stage}: {seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
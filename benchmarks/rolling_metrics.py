@@ -0,0 +1,64 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from utils.metrics import rolling_metrics
+
+
+def random_returns(days: int, series: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2015-01-01", periods=days, name="Date")
+    return pd.DataFrame(rng.normal(0.0003, 0.02, (days, series)), index=index)
+
+
+def window_drawdown(equity: np.ndarray) -> float:
+    return (equity / np.maximum.accumulate(equity) - 1).min() * 100
+
+
+def pandas_rolling(returns: pd.DataFrame, window: int) -> None:
+    # Rolling Sharpe and volatility from pandas' windows, and max drawdown
+    # through a Python callback per window, as it would be written by hand
+    mean = returns.rolling(window).mean()
+    std = returns.rolling(window).std()
+    _ = mean / std * np.sqrt(252), std * np.sqrt(252) * 100
+    (1 + returns).cumprod().rolling(window).apply(window_drawdown, raw=True)
+
+
+def timed(func) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling metrics by number of return series")
+    parser.add_argument("--days", type=int, default=1260, help="trading days per series")
+    parser.add_argument("--window", type=int, default=63)
+    parser.add_argument("--series", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument(
+        "--pandas-max", type=int, default=100,
+        help="largest series count to run the pandas rolling().apply version on",
+    )
+    args = parser.parse_args()
+
+    print(f"{'series':>8}{'incremental':>17}{'rolling.apply':>17}")
+    for count in args.series:
+        returns = random_returns(args.days, count)
+        row = f"{count:>8}"
+        seconds = timed(lambda: rolling_metrics(returns.to_numpy(), returns.index, args.window))
+        row += f"{seconds:>16.3f}s"
+        if count <= args.pandas_max:
+            row += f"{timed(lambda: pandas_rolling(returns, args.window)):>16.3f}s"
+        else:
+            row += f"{'skipped':>17}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
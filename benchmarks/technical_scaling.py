@@ -0,0 +1,103 @@
+import argparse
+import contextlib
+import io
+import sys
+import time
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from strategies import kernels
+from strategies.result import price_matrix
+from strategies.technical import _kernel_result
+from utils.metrics import capture_metrics, get_metrics
+
+STRATEGIES = {
+    "momentum": lambda prices: kernels.momentum(prices, 5),
+    "macd": lambda prices: kernels.macd(prices, 12, 26, 9),
+    "mean_reversion": lambda prices: kernels.moving_average_ratio(prices),
+    "bollinger_bands": lambda prices: kernels.bollinger_bands(prices, 20, 2),
+}
+
+
+def random_prices(days: int, tickers: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2015-01-01", periods=days, name="Date")
+    returns = rng.normal(0.0003, 0.02, (days, tickers))
+    columns = [f"T{i:04d}" for i in range(tickers)]
+    return pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), index=index, columns=columns)
+
+
+def per_column_momentum(df: pd.DataFrame, window: int = 5) -> pd.DataFrame:
+    # The previous implementation: one column insert per ticker and indicator
+    for stock in list(df.columns):
+        df[f"{stock}_return"] = df[stock].pct_change()
+        df[f"{stock}_momentum"] = df[f"{stock}_return"].rolling(window=window).mean()
+        df[f"{stock}_position"] = np.where(
+            df[f"{stock}_momentum"].isna(), 0, np.where(df[f"{stock}_momentum"] > 0, 1, -1)
+        )
+        df[f"{stock}_strategy"] = df[f"{stock}_position"].shift(1) * df[f"{stock}_return"]
+        df[f"{stock}_signal"] = np.where(
+            df[f"{stock}_position"] != df[f"{stock}_position"].shift(),
+            np.where(
+                df[f"{stock}_position"] == 1,
+                "Buy",
+                np.where(df[f"{stock}_position"] == -1, "Sell", None),
+            ),
+            None,
+        )
+    df["Total_Return"] = df[[col for col in df.columns if col.endswith("_strategy")]].mean(axis=1)
+    df["Cumulative_Return"] = (1 + df["Total_Return"]).cumprod()
+    df["Drawdown"] = (df["Cumulative_Return"] / df["Cumulative_Return"].cummax()) - 1
+    return df
+
+
+def run_kernel(prices: pd.DataFrame, kernel, name: str) -> dict:
+    # Capturing skips plotting, as the legacy timing below never plotted either
+    with capture_metrics():
+        matrix = price_matrix(prices)
+        return _kernel_result(name, prices, matrix, kernel(matrix)).metrics
+
+
+def timed(func) -> float:
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Technical strategy scaling by ticker count")
+    parser.add_argument("--days", type=int, default=2520, help="trading days of history")
+    parser.add_argument(
+        "--tickers", type=int, nargs="+", default=[1, 10, 100, 500, 1000, 2000]
+    )
+    parser.add_argument(
+        "--legacy-max", type=int, default=500,
+        help="largest ticker count to run the per-column implementation on",
+    )
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", category=pd.errors.PerformanceWarning)
+
+    header = f"{'tickers':>8}" + "".join(f"{name:>17}" for name in STRATEGIES)
+    print(header + f"{'momentum (old)':>17}")
+    for count in args.tickers:
+        prices = random_prices(args.days, count)
+        row = f"{count:>8}"
+        for name, kernel in STRATEGIES.items():
+            seconds = timed(lambda: run_kernel(prices, kernel, name))
+            row += f"{seconds:>16.3f}s"
+        if count <= args.legacy_max:
+            seconds = timed(lambda: get_metrics(per_column_momentum(prices.copy()), "momentum"))
+            row += f"{seconds:>16.3f}s"
+        else:
+            row += f"{'skipped':>17}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
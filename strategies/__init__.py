@@ -1,5 +1,10 @@
 from .traditional import Traditional
 from .technical import TechnicalAnalysis
 from .machine_learning import MachineLearning
+from .sweep import ParameterSweep, sweep
+from .walk_forward import WalkForward, walk_forward
+from .streaming import StreamingBacktest
+from .result import StrategyResult
 
-__all__ = ['Traditional', 'TechnicalAnalysis', 'MachineLearning']
\ No newline at end of file
+__all__ = ['Traditional', 'TechnicalAnalysis', 'MachineLearning', 'ParameterSweep', 'sweep',
+           'WalkForward', 'walk_forward', 'StreamingBacktest', 'StrategyResult']
\ No newline at end of file
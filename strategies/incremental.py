@@ -0,0 +1,211 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import numpy as np
+
+# Stateful indicators that advance one bar at a time in constant time. Each
+# update takes a scalar or a vector of one value per ticker and matches the
+# pandas formula used by the batch kernels (see strategies/kernels.py).
+
+
+class Indicator(ABC):
+    def __str__(self):
+        return f"Incremental {type(self).__name__} indicator."
+
+    @abstractmethod
+    def update(self, value) -> "Indicator":
+        ...
+
+
+class PctChange(Indicator):
+    # pct_change() with pandas' default padding of missing prices
+    def __init__(self) -> None:
+        self._last: Optional[np.ndarray] = None
+        self.value: Optional[np.ndarray] = None
+
+    def update(self, value) -> "PctChange":
+        value = np.asarray(value, dtype=float)
+        if self._last is None:
+            self._last = np.full(value.shape, np.nan)
+        filled = np.where(np.isnan(value), self._last, value)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.value = filled / self._last - 1
+        self._last = filled
+        return self
+
+
+class RollingStats(Indicator):
+    # rolling(window).mean()/.var()/.std() via Welford add/remove updates
+    def __init__(self, window: int, ddof: int = 1) -> None:
+        if window < 1:
+            raise ValueError("window must be at least 1.")
+        self.window = window
+        self.ddof = ddof
+        self._buffer: Optional[np.ndarray] = None
+        self._position = 0
+        self._seen = 0
+
+    def _start(self, shape) -> None:
+        self._buffer = np.full((self.window,) + shape, np.nan)
+        self._count = np.zeros(shape)
+        self._mean = np.zeros(shape)
+        self._m2 = np.zeros(shape)
+        self._last = np.full(shape, np.nan)
+        self._same_run = np.zeros(shape)
+
+    def update(self, value) -> "RollingStats":
+        value = np.asarray(value, dtype=float)
+        if self._buffer is None:
+            self._start(value.shape)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if self._seen >= self.window:
+                old = self._buffer[self._position]
+                valid = ~np.isnan(old)
+                count = self._count - valid
+                delta = np.where(valid, old - self._mean, 0.0)
+                mean = np.where(valid & (count > 0), self._mean - delta / count, self._mean)
+                m2 = self._m2 - np.where(valid, delta * (old - mean), 0.0)
+                empty = count == 0
+                self._mean = np.where(empty, 0.0, mean)
+                self._m2 = np.where(empty, 0.0, m2)
+                self._count = count
+
+            valid = ~np.isnan(value)
+            count = self._count + valid
+            delta = np.where(valid, value - self._mean, 0.0)
+            self._mean = np.where(valid, self._mean + delta / count, self._mean)
+            self._m2 = self._m2 + np.where(valid, delta * (value - self._mean), 0.0)
+            self._count = count
+
+        # pandas returns the exact value, and zero variance, for a constant window
+        self._same_run = np.where(value == self._last, self._same_run + 1, 1)
+        self._last = value
+        self._buffer[self._position] = value
+        self._position = (self._position + 1) % self.window
+        self._seen += 1
+        return self
+
+    @property
+    def ready(self) -> np.ndarray:
+        return self._count >= self.window
+
+    @property
+    def constant(self) -> np.ndarray:
+        return self._same_run >= self.window
+
+    @property
+    def mean(self) -> np.ndarray:
+        mean = np.where(self.constant, self._last, self._mean)
+        return np.where(self.ready, mean, np.nan)
+
+    @property
+    def var(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var = np.maximum(self._m2, 0.0) / (self._count - self.ddof)
+        var = np.where(self.constant, 0.0, var)
+        return np.where(self.ready & (self._count > self.ddof), var, np.nan)
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.var)
+
+
+class EMA(Indicator):
+    # ewm(span, adjust=False).mean() with ignore_na=False
+    def __init__(self, span: int) -> None:
+        self.span = span
+        self.alpha = 2.0 / (span + 1.0)
+        self.value: Optional[np.ndarray] = None
+        self._old_weight: Optional[np.ndarray] = None
+
+    def update(self, value) -> "EMA":
+        value = np.asarray(value, dtype=float)
+        if self.value is None:
+            self.value = value.copy()
+            self._old_weight = np.ones(value.shape)
+            return self
+
+        observed = ~np.isnan(value)
+        started = ~np.isnan(self.value)
+        alpha = self.alpha
+        old_weight = np.where(started, self._old_weight * (1.0 - alpha), self._old_weight)
+        update = started & observed & (self.value != value)
+        with np.errstate(invalid="ignore"):
+            blended = (old_weight * self.value + alpha * value) / (old_weight + alpha)
+        weighted = np.where(update, blended, self.value)
+        self._old_weight = np.where(started & observed, 1.0, old_weight)
+        self.value = np.where(~started & observed, value, weighted)
+        return self
+
+
+class MACD(Indicator):
+    def __init__(
+        self, fast_window: int = 12, slow_window: int = 26, signal_window: int = 9
+    ) -> None:
+        self._fast = EMA(fast_window)
+        self._slow = EMA(slow_window)
+        self._signal = RollingStats(signal_window)
+        self.fast: Optional[np.ndarray] = None
+        self.slow: Optional[np.ndarray] = None
+        self.line: Optional[np.ndarray] = None
+        self.signal: Optional[np.ndarray] = None
+
+    def update(self, value) -> "MACD":
+        self.fast = self._fast.update(value).value
+        self.slow = self._slow.update(value).value
+        self.line = self.fast - self.slow
+        self.signal = self._signal.update(self.line).mean
+        return self
+
+
+class BollingerBands(Indicator):
+    def __init__(self, window: int = 20, num_std: float = 2) -> None:
+        self.num_std = num_std
+        self._stats = RollingStats(window)
+        self.middle: Optional[np.ndarray] = None
+        self.std: Optional[np.ndarray] = None
+        self.upper: Optional[np.ndarray] = None
+        self.lower: Optional[np.ndarray] = None
+
+    def update(self, value) -> "BollingerBands":
+        self._stats.update(value)
+        self.middle = self._stats.mean
+        self.std = self._stats.std
+        self.upper = self.middle + self.num_std * self.std
+        self.lower = self.middle - self.num_std * self.std
+        return self
+
+
+class ZScore(Indicator):
+    # (x - rolling mean) / rolling std, with separate windows as in pairs_trading
+    def __init__(self, mean_window: int = 50, std_window: Optional[int] = None) -> None:
+        self._mean = RollingStats(mean_window)
+        self._std = RollingStats(std_window or mean_window)
+        self.value: Optional[np.ndarray] = None
+
+    def update(self, value) -> "ZScore":
+        value = np.asarray(value, dtype=float)
+        mean = self._mean.update(value).mean
+        std = self._std.update(value).std
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.value = (value - mean) / std
+        return self
+
+
+class CumulativeMax(Indicator):
+    # cummax() skipping NaN, plus the drawdown it implies
+    def __init__(self) -> None:
+        self._max: Optional[np.ndarray] = None
+        self.value: Optional[np.ndarray] = None
+        self.drawdown: Optional[np.ndarray] = None
+
+    def update(self, value) -> "CumulativeMax":
+        value = np.asarray(value, dtype=float)
+        if self._max is None:
+            self._max = np.full(value.shape, np.nan)
+        self._max = np.fmax(self._max, value)
+        self.value = np.where(np.isnan(value), np.nan, self._max)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.drawdown = value / self.value - 1
+        return self
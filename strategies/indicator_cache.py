@@ -0,0 +1,202 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from utils.config import CACHE_DIR
+
+# (index fingerprint, column fingerprint, ticker, indicator, parameters)
+IndicatorKey = Tuple[str, str, str, str, Tuple[Any, ...]]
+
+
+def _fingerprint(values: np.ndarray) -> str:
+    return hashlib.blake2b(np.ascontiguousarray(values).tobytes(), digest_size=16).hexdigest()
+
+
+class IndicatorCache:
+    # Upper bound on the summed size of in-memory indicator columns
+    max_bytes = 512 * 1024 * 1024
+    # Upper bound on spilled columns kept on disk
+    max_disk_bytes = 2 * 1024 * 1024 * 1024
+
+    _instance: Optional["IndicatorCache"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        spill_dir: Path = CACHE_DIR / "indicators",
+        max_bytes: Optional[int] = None,
+        spill: Optional[bool] = None,
+        enabled: Optional[bool] = None,
+    ) -> None:
+        self._spill_dir = Path(spill_dir)
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        if enabled is None:
+            enabled = os.environ.get("LOOKBACK_INDICATOR_CACHE", "1") != "0"
+        self.enabled = enabled
+        if spill is None:
+            spill = os.environ.get("LOOKBACK_INDICATOR_SPILL", "0") == "1"
+        self.spill = spill
+        self._columns: "OrderedDict[IndicatorKey, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __str__(self):
+        return f"Indicator cache ({len(self._columns)} columns, {self._bytes} bytes)."
+
+    @classmethod
+    def instance(cls) -> "IndicatorCache":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def view(self, df: DataFrame) -> Optional["IndicatorView"]:
+        # Kernels treat a missing view as "compute everything"
+        if not self.enabled:
+            return None
+        return IndicatorView(self, df)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "spill": self.spill,
+                "columns": len(self._columns),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._columns.clear()
+            self._bytes = 0
+
+    def get(self, key: IndicatorKey) -> Optional[np.ndarray]:
+        with self._lock:
+            column = self._columns.get(key)
+            if column is not None:
+                self._columns.move_to_end(key)
+                self.hits += 1
+                return column
+
+        column = self._read_spilled(key)
+        with self._lock:
+            if column is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self.put(key, column)
+        return column
+
+    def put(self, key: IndicatorKey, column: np.ndarray) -> None:
+        column = np.array(column, dtype=float)
+        # Shared between strategies, so nobody may write into a cached column
+        column.flags.writeable = False
+        evicted: List[Tuple[IndicatorKey, np.ndarray]] = []
+        with self._lock:
+            previous = self._columns.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._columns[key] = column
+            self._bytes += column.nbytes
+            while self._bytes > self.max_bytes and len(self._columns) > 1:
+                old_key, old_column = self._columns.popitem(last=False)
+                self._bytes -= old_column.nbytes
+                self.evictions += 1
+                evicted.append((old_key, old_column))
+
+        if self.spill:
+            for old_key, old_column in evicted:
+                self._write_spilled(old_key, old_column)
+
+    def _spill_path(self, key: IndicatorKey) -> Path:
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return self._spill_dir / f"{digest}.npy"
+
+    def _read_spilled(self, key: IndicatorKey) -> Optional[np.ndarray]:
+        if not self.spill:
+            return None
+        path = self._spill_path(key)
+        try:
+            return np.load(path)
+        except (OSError, ValueError):
+            return None
+
+    def _write_spilled(self, key: IndicatorKey, column: np.ndarray) -> None:
+        try:
+            self._spill_dir.mkdir(parents=True, exist_ok=True)
+            path = self._spill_path(key)
+            tmp_path = path.with_suffix(".npy.tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, column)
+            os.replace(tmp_path, path)
+            self._prune_spilled()
+        except OSError as e:
+            print(f"Warning: could not spill indicator to disk: {str(e)}")
+
+    def _prune_spilled(self) -> None:
+        files = sorted(self._spill_dir.glob("*.npy"), key=lambda p: p.stat().st_mtime)
+        total = sum(path.stat().st_size for path in files)
+        for path in files:
+            if total <= self.max_disk_bytes:
+                break
+            total -= path.stat().st_size
+            path.unlink(missing_ok=True)
+
+
+class IndicatorView:
+    # One price matrix seen through the cache; column fingerprints are hashed once
+    def __init__(self, cache: IndicatorCache, df: DataFrame) -> None:
+        self._cache = cache
+        self._tickers: List[str] = [str(ticker) for ticker in df.columns]
+        self._rows = len(df)
+        values = df.to_numpy(dtype=float, na_value=np.nan)
+        # Indicators depend on the dates as well as the prices, so the index is keyed too
+        index_hash = _fingerprint(pd.util.hash_pandas_object(df.index, index=False).to_numpy())
+        self._keys = [
+            (index_hash, _fingerprint(column), ticker)
+            for column, ticker in zip(np.ascontiguousarray(values.T), self._tickers)
+        ]
+
+    def __str__(self):
+        return f"Indicator view over {len(self._tickers)} tickers."
+
+    def get(
+        self,
+        name: str,
+        params: Sequence[Any],
+        compute: Callable[[np.ndarray], np.ndarray],
+    ) -> np.ndarray:
+        # compute(columns) returns the indicator for those column positions only
+        params = tuple(params)
+        keys = [(*prefix, name, params) for prefix in self._keys]
+        cached = [self._cache.get(key) for key in keys]
+        missing = np.array([i for i, column in enumerate(cached) if column is None], dtype=int)
+
+        if len(missing) == len(keys):
+            result = np.array(compute(missing), dtype=float)
+        else:
+            result = np.empty((self._rows, len(keys)))
+            for i, column in enumerate(cached):
+                if column is not None:
+                    result[:, i] = column
+            if len(missing):
+                result[:, missing] = compute(missing)
+
+        for i in missing:
+            self._cache.put(keys[i], result[:, i])
+        return result
@@ -0,0 +1,269 @@
+import warnings
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from strategies.incremental import EMA
+from strategies.indicator_cache import IndicatorView
+
+# All kernels work on (dates x tickers) float arrays and follow the pandas
+# semantics of the per-column code they replace: rolling windows need a full
+# window of non-NaN values, EMAs are adjust=False and positions are forward filled.
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    valid = ~np.isnan(values)
+    rows = np.where(valid, np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    filled = np.take_along_axis(values, rows, axis=0)
+    # Leading NaNs have nothing to fill from
+    filled[~np.maximum.accumulate(valid, axis=0)] = np.nan
+    return filled
+
+
+def shift(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    shifted = np.full(values.shape, np.nan)
+    if periods < len(values):
+        shifted[periods:] = values[:-periods]
+    return shifted
+
+
+def pct_change(prices: np.ndarray) -> np.ndarray:
+    # pandas pads missing prices before taking the ratio
+    filled = forward_fill(prices)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return filled / shift(filled) - 1
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    result = np.full(values.shape, np.nan)
+    if window <= len(values):
+        result[window - 1 :] = sliding_window_view(values, window, axis=0).mean(axis=-1)
+    return result
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    result = np.full(values.shape, np.nan)
+    if 1 < window <= len(values):
+        windows = sliding_window_view(values, window, axis=0)
+        result[window - 1 :] = windows.std(axis=-1, ddof=1)
+    return result
+
+
+def ewm_mean(values: np.ndarray, span: int) -> np.ndarray:
+    # Same recursion as pandas ewm(span, adjust=False) with ignore_na=False
+    ema = EMA(span)
+    result = np.empty(values.shape)
+    for i, row in enumerate(values):
+        result[i] = ema.update(row).value
+    return result
+
+
+def strategy_returns(positions: np.ndarray, returns: np.ndarray) -> np.ndarray:
+    return shift(positions) * returns
+
+
+def portfolio_returns(strategy: np.ndarray) -> np.ndarray:
+    # Equal-weighted mean across tickers that have a return on each date
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        return np.nanmean(strategy, axis=1)
+
+
+# Signal rules shared with the per-bar versions in strategies/streaming.py. Each
+# takes a whole (dates x tickers) block or a single bar's row; NaN means no new
+# signal, so the previous position is held.
+
+
+def hold_positions(sides: Any, shape: Tuple[int, ...]) -> np.ndarray:
+    # 1 long, -1 short, 0 flat on every bar
+    return np.broadcast_to(np.asarray(sides, dtype=float), shape)
+
+
+def momentum_signal(momentum: np.ndarray) -> np.ndarray:
+    # Flat until the window is full, then the sign of the mean return
+    return np.where(np.isnan(momentum), 0.0, np.where(momentum > 0, 1.0, -1.0))
+
+
+def crossover_signal(line: np.ndarray, signal_line: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore"):
+        signal = np.where(line > signal_line, 1.0, np.where(line < signal_line, -1.0, np.nan))
+    signal[np.isnan(line)] = np.nan
+    return signal
+
+
+def band_signal(prices: np.ndarray, upper: np.ndarray, lower: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore"):
+        signal = np.where(prices > upper, -1.0, np.where(prices < lower, 1.0, np.nan))
+    signal[np.isnan(prices)] = np.nan
+    return signal
+
+
+def _indicator(
+    cache: Optional[IndicatorView],
+    name: str,
+    params: Sequence[Any],
+    source: np.ndarray,
+    compute: Callable[[np.ndarray], np.ndarray],
+) -> np.ndarray:
+    # Indicators are computed column by column from `source`, so the cache can
+    # fill in just the tickers it has not seen with these parameters. Keys come
+    # from the price columns the view was built on, whatever `source` is.
+    if cache is None:
+        return compute(source)
+    return cache.get(name, params, lambda columns: compute(source[:, columns]))
+
+
+def momentum(
+    prices: np.ndarray, window: int, cache: Optional[IndicatorView] = None
+) -> Dict[str, np.ndarray]:
+    returns = _indicator(cache, "return", (), prices, pct_change)
+    momentum = _indicator(
+        cache, "return_mean", (window,), returns, lambda values: rolling_mean(values, window)
+    )
+    return {"return": returns, "momentum": momentum, "position": momentum_signal(momentum)}
+
+
+def macd(
+    prices: np.ndarray,
+    fast_window: int,
+    slow_window: int,
+    signal_window: int,
+    cache: Optional[IndicatorView] = None,
+) -> Dict[str, np.ndarray]:
+    fast = _indicator(
+        cache, "ewm", (fast_window,), prices, lambda values: ewm_mean(values, fast_window)
+    )
+    slow = _indicator(
+        cache, "ewm", (slow_window,), prices, lambda values: ewm_mean(values, slow_window)
+    )
+    line = fast - slow
+    signal_line = _indicator(
+        cache,
+        "macd_signal",
+        (fast_window, slow_window, signal_window),
+        line,
+        lambda values: rolling_mean(values, signal_window),
+    )
+    positions = crossover_signal(line, signal_line)
+    return {
+        "return": _indicator(cache, "return", (), prices, pct_change),
+        "EMA12": fast,
+        "EMA26": slow,
+        "MACD": line,
+        "MACD_signal": signal_line,
+        "position": forward_fill(positions),
+    }
+
+
+def ratio_thresholds(ratio: np.ndarray, quantiles: Tuple[float, float]) -> np.ndarray:
+    # (2 x tickers) long and short thresholds, quantiles of each column's ratio
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        return np.nanquantile(ratio, quantiles, axis=0)
+
+
+def moving_average_ratio(
+    prices: np.ndarray,
+    window: int = 20,
+    quantiles: Tuple[float, float] = (0.5, 0.95),
+    cache: Optional[IndicatorView] = None,
+    thresholds: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    average = _indicator(
+        cache, "rolling_mean", (window,), prices, lambda values: rolling_mean(values, window)
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = prices / average
+    # Fixed thresholds (fitted on earlier data) keep the positions causal;
+    # without them the quantiles are taken over the whole sample
+    if thresholds is None:
+        thresholds = ratio_thresholds(ratio, quantiles)
+    long, short = np.asarray(thresholds, dtype=float)
+
+    positions = np.full(prices.shape, np.nan)
+    with np.errstate(invalid="ignore"):
+        positions[ratio > short] = -1.0
+        positions[ratio < long] = 1.0
+    return {
+        "return": _indicator(cache, "return", (), prices, pct_change),
+        "ma": average,
+        "ratio": ratio,
+        "position": forward_fill(positions),
+    }
+
+
+def bollinger_bands(
+    prices: np.ndarray, window: int, num_std: float, cache: Optional[IndicatorView] = None
+) -> Dict[str, np.ndarray]:
+    average = _indicator(
+        cache, "rolling_mean", (window,), prices, lambda values: rolling_mean(values, window)
+    )
+    deviation = _indicator(
+        cache, "rolling_std", (window,), prices, lambda values: rolling_std(values, window)
+    )
+    upper = average + num_std * deviation
+    lower = average - num_std * deviation
+    positions = band_signal(prices, upper, lower)
+    return {
+        "return": _indicator(cache, "return", (), prices, pct_change),
+        "ma": average,
+        "std": deviation,
+        "upper_band": upper,
+        "lower_band": lower,
+        "position": forward_fill(positions),
+    }
+
+
+def hysteresis_positions(
+    zscores: np.ndarray, entry_threshold: float, exit_threshold: float
+) -> np.ndarray:
+    # Enter beyond entry, flatten inside exit, otherwise hold: the hold state is a
+    # forward fill of the bars where one of the two thresholds fired
+    magnitude = np.abs(zscores)
+    with np.errstate(invalid="ignore"):
+        sized = np.sign(zscores) * np.minimum(magnitude / entry_threshold, 1)
+        positions = np.where(
+            magnitude < exit_threshold,
+            0.0,
+            np.where(magnitude > entry_threshold, sized, np.nan),
+        )
+    return forward_fill(positions)
+
+
+def pairs(
+    prices: np.ndarray,
+    first: np.ndarray,
+    second: np.ndarray,
+    entry_threshold: float,
+    exit_threshold: float,
+    mean_window: int,
+    std_window: int,
+    hedge_ratios: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    # One column per pair: first[k] and second[k] index the price columns, and
+    # the spread holds hedge_ratios[k] of the first leg per unit of the second
+    # (the OLS ratio the pairs scanner screens; 1:1 when not given)
+    hedge = np.ones(len(first)) if hedge_ratios is None else np.asarray(hedge_ratios, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_prices = np.log(prices)
+        log_returns = np.log(prices / shift(prices))
+    spread = hedge * log_prices[:, first] - log_prices[:, second]
+    spread_ma = rolling_mean(spread, mean_window)
+    spread_std = rolling_std(spread, std_window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        zscore = (spread - spread_ma) / spread_std
+    positions = hysteresis_positions(zscore, entry_threshold, exit_threshold)
+    return {
+        "log_return": log_returns,
+        "spread": spread,
+        "spread_ma": spread_ma,
+        "spread_std": spread_std,
+        "spread_zscore": zscore,
+        "position": positions,
+        # Short hedge units of the first leg, long the second; a position set on
+        # a bar's close earns the next bar's log return, as in strategy_returns
+        "pair_return": (log_returns[:, second] - hedge * log_returns[:, first])
+        * shift(positions),
+    }
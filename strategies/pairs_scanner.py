@@ -0,0 +1,242 @@
+import contextlib
+import functools
+import heapq
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from strategies import kernels
+from utils.metrics import batch_metrics
+
+# Candidate rows are (score, first, second, stats); score = -ADF t-stat so the
+# min-heap root is always the weakest pair kept
+Candidate = Tuple[float, int, int, Dict[str, float]]
+
+SCAN_COLUMNS = ["first", "second", "correlation", "hedge_ratio", "adf_stat", "half_life"]
+
+# Log-price matrix of the scan in progress, attached once per worker. Kept
+# apart from the sweep's shared frame, which a scan must never replace.
+_scan_shared: Dict[str, Any] = {}
+
+
+def _attach_log_prices(name: str, shape: Tuple[int, int]) -> None:
+    shm = SharedMemory(name=name)
+    values = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    values.flags.writeable = False
+    _scan_shared["shm"] = shm
+    _scan_shared["log_prices"] = values
+
+
+def _pair_statistics(x: np.ndarray, ys: np.ndarray) -> Dict[str, np.ndarray]:
+    # Engle-Granger style screen of one log-price series against many:
+    # OLS hedge ratio, then a lag-0 Dickey-Fuller regression on the residual spread
+    n = len(x)
+    x_centered = x - x.mean()
+    ys_centered = ys - ys.mean(axis=0)
+    hedge_ratio = x_centered @ ys_centered / (x_centered @ x_centered)
+    spread = ys_centered - np.outer(x_centered, hedge_ratio)
+
+    returns_x = np.diff(x)
+    returns_y = np.diff(ys, axis=0)
+    returns_x = returns_x - returns_x.mean()
+    returns_y = returns_y - returns_y.mean(axis=0)
+    correlation = (returns_x @ returns_y) / np.sqrt(
+        (returns_x @ returns_x) * (returns_y * returns_y).sum(axis=0)
+    )
+
+    lagged = spread[:-1]
+    delta = np.diff(spread, axis=0)
+    lagged_centered = lagged - lagged.mean(axis=0)
+    delta_centered = delta - delta.mean(axis=0)
+    lag_variance = (lagged_centered * lagged_centered).sum(axis=0)
+    gamma = (lagged_centered * delta_centered).sum(axis=0) / lag_variance
+    residuals = delta_centered - lagged_centered * gamma
+    standard_error = np.sqrt((residuals * residuals).sum(axis=0) / (n - 3) / lag_variance)
+
+    return {
+        "correlation": correlation,
+        "hedge_ratio": hedge_ratio,
+        "adf_stat": gamma / standard_error,
+        "half_life": np.where(gamma < 0, -np.log(2) / gamma, np.inf),
+    }
+
+
+def _scan_block(
+    rows: Tuple[int, int],
+    top_k: int,
+    min_correlation: float,
+    max_adf_stat: float,
+    max_half_life: Optional[float],
+    log_prices: Optional[np.ndarray] = None,
+) -> List[Candidate]:
+    # Inline scans pass their matrix, pool workers read the attached one
+    if log_prices is None:
+        log_prices = _scan_shared["log_prices"]
+    heap: List[Candidate] = []
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for first in range(*rows):
+            seconds = np.arange(first + 1, log_prices.shape[1])
+            if not len(seconds):
+                continue
+            stats = _pair_statistics(log_prices[:, first], log_prices[:, seconds])
+            keep = (stats["adf_stat"] <= max_adf_stat) & (stats["correlation"] >= min_correlation)
+            if max_half_life is not None:
+                keep &= stats["half_life"] <= max_half_life
+            for k in np.flatnonzero(keep):
+                candidate = (
+                    -float(stats["adf_stat"][k]),
+                    first,
+                    int(seconds[k]),
+                    {name: float(values[k]) for name, values in stats.items()},
+                )
+                if len(heap) < top_k:
+                    heapq.heappush(heap, candidate)
+                elif candidate[0] > heap[0][0]:
+                    heapq.heapreplace(heap, candidate)
+    return heap
+
+
+def _in_worker() -> bool:
+    # Scans run from sweep or walk-forward workers (possibly daemonic) stay inline
+    return multiprocessing.current_process().daemon or multiprocessing.parent_process() is not None
+
+
+@contextlib.contextmanager
+def _log_price_pool(log_prices: np.ndarray, workers: int) -> Iterator[Callable]:
+    # Yields a map over blocks; the matrix is passed along inline, or copied
+    # once into shared memory that the workers map read-only
+    if workers <= 1:
+        yield functools.partial(map, functools.partial(_scan_block, log_prices=log_prices))
+        return
+
+    shm = SharedMemory(create=True, size=max(log_prices.nbytes, 1))
+    try:
+        np.ndarray(log_prices.shape, dtype=np.float64, buffer=shm.buf)[:] = log_prices
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_attach_log_prices,
+            initargs=(shm.name, log_prices.shape),
+        ) as executor:
+            yield functools.partial(executor.map, _scan_block)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+class PairsScanner:
+    # Below this many pairs, spawning workers costs more than the scan itself
+    min_parallel_pairs = 50000
+
+    def __init__(
+        self,
+        top_k: int = 10,
+        min_correlation: float = 0.0,
+        # Dickey-Fuller t-stat the hedged spread must fall below; -2.9 is
+        # roughly the 5% critical value of the regression with a constant
+        max_adf_stat: float = -2.9,
+        max_half_life: Optional[float] = None,
+        block_rows: int = 16,
+        workers: Optional[int] = None,
+    ) -> None:
+        self.top_k = top_k
+        self.min_correlation = min_correlation
+        self.max_adf_stat = max_adf_stat
+        self.max_half_life = max_half_life
+        self.block_rows = block_rows
+        self.workers = workers or os.cpu_count() or 1
+
+    def __str__(self):
+        return f"Pairs scanner keeping the top {self.top_k} pairs."
+
+    @staticmethod
+    def _clean(df: DataFrame) -> DataFrame:
+        # Statistics need a common history, so drop tickers that start late
+        prices = df.ffill()
+        complete = prices.columns[prices.notna().all() & (prices > 0).all()]
+        dropped = len(prices.columns) - len(complete)
+        if dropped:
+            print(f"Warning: {dropped} tickers without full price history skipped in pair scan.")
+        return prices[complete]
+
+    def scan(self, df: DataFrame) -> DataFrame:
+        prices = self._clean(df)
+        count = len(prices.columns)
+        if count < 2:
+            raise ValueError("Need at least two tickers with full price history to scan pairs.")
+
+        # Rows are split into blocks with roughly equal numbers of pairs
+        pairs_per_block = self.block_rows * count
+        blocks, start, pairs = [], 0, 0
+        for row in range(count):
+            pairs += count - row - 1
+            if pairs >= pairs_per_block or row == count - 1:
+                blocks.append((start, row + 1))
+                start, pairs = row + 1, 0
+
+        workers = min(self.workers, len(blocks))
+        if count * (count - 1) // 2 < self.min_parallel_pairs or _in_worker():
+            workers = 1
+        heap: List[Candidate] = []
+        with _log_price_pool(np.log(prices.to_numpy(dtype=np.float64)), workers) as scan:
+            results = scan(
+                blocks,
+                itertools.repeat(self.top_k),
+                itertools.repeat(self.min_correlation),
+                itertools.repeat(self.max_adf_stat),
+                itertools.repeat(self.max_half_life),
+            )
+            for block in results:
+                for candidate in block:
+                    if len(heap) < self.top_k:
+                        heapq.heappush(heap, candidate)
+                    elif candidate[0] > heap[0][0]:
+                        heapq.heapreplace(heap, candidate)
+
+        columns = list(prices.columns)
+        rows = [
+            {"first": columns[first], "second": columns[second], **stats}
+            for _, first, second, stats in sorted(heap, reverse=True)
+        ]
+        return DataFrame(rows, columns=SCAN_COLUMNS)
+
+    @staticmethod
+    def backtest(
+        df: DataFrame,
+        candidates: DataFrame,
+        entry_threshold: float = 2.0,
+        exit_threshold: float = 0.5,
+        mean_window: int = 50,
+        std_window: int = 20,
+    ) -> DataFrame:
+        # Every candidate runs through the pairs kernel in a single batch
+        if candidates.empty:
+            return candidates
+        columns = {ticker: i for i, ticker in enumerate(df.columns)}
+        blocks = kernels.pairs(
+            df.to_numpy(dtype=float, na_value=np.nan),
+            candidates["first"].map(columns).to_numpy(),
+            candidates["second"].map(columns).to_numpy(),
+            entry_threshold,
+            exit_threshold,
+            mean_window,
+            std_window,
+            # The spread traded is the hedged one the candidates were screened on
+            candidates["hedge_ratio"].to_numpy(),
+        )
+        # Every candidate's metrics in one batched pass
+        metrics = batch_metrics(
+            blocks["pair_return"][mean_window:], df.index[mean_window:], log_returns=True
+        )
+        columns = ["Return [%]", "Sharpe Ratio", "Max. Drawdown [%]"]
+        return pd.concat(
+            [candidates.reset_index(drop=True), metrics[columns].reset_index(drop=True)],
+            axis=1,
+        )
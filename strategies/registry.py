@@ -0,0 +1,171 @@
+import inspect
+import types
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Parameters every strategy receives from the pipeline rather than from the query
+DATA_PARAMETERS = ("df",)
+
+
+@dataclass(frozen=True)
+class ParameterSpec:
+    name: str
+    annotation: Any
+    default: Any
+    required: bool
+
+    @property
+    def type_name(self) -> str:
+        if self.annotation is inspect.Parameter.empty:
+            return "Any"
+        if isinstance(self.annotation, type):
+            return self.annotation.__name__
+        return str(self.annotation).replace("typing.", "")
+
+    def to_dict(self) -> Dict[str, Any]:
+        spec = {"name": self.name, "type": self.type_name, "required": self.required}
+        if not self.required:
+            spec["default"] = self.default
+        return spec
+
+
+@dataclass(frozen=True)
+class StrategySpec:
+    name: str
+    owner: str
+    func: Callable
+    parameters: Tuple[ParameterSpec, ...]
+    description: str
+    min_columns: int = 1
+    max_columns: Optional[int] = None
+    # Returns on a date depend only on prices up to that date
+    causal: bool = True
+    # For non-causal strategies: fit(df, **params) returns the arguments that
+    # pin down what the strategy would otherwise learn from the whole sample
+    fit: Optional[Callable[..., Dict[str, Any]]] = None
+
+    @property
+    def qualname(self) -> str:
+        return f"{self.owner}.{self.name}"
+
+    @property
+    def signature(self) -> str:
+        params = []
+        for parameter in self.parameters:
+            text = f"{parameter.name}: {parameter.type_name}"
+            if not parameter.required:
+                text += f" = {parameter.default!r}"
+            params.append(text)
+        return f"{self.name}({', '.join(params)})"
+
+    @property
+    def column_shape(self) -> str:
+        if self.max_columns == self.min_columns:
+            return f"exactly {self.min_columns} price columns"
+        if self.max_columns is None:
+            return f"at least {self.min_columns} price column(s)"
+        return f"{self.min_columns} to {self.max_columns} price columns"
+
+    def check_columns(self, df: Any) -> None:
+        count = len(df.columns)
+        if count < self.min_columns or (
+            self.max_columns is not None and count > self.max_columns
+        ):
+            raise ValueError(
+                f"Strategy '{self.name}' needs {self.column_shape}, got {count}."
+            )
+
+    def parameter(self, name: str) -> Optional[ParameterSpec]:
+        for parameter in self.parameters:
+            if parameter.name == name:
+                return parameter
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "owner": self.owner,
+            "description": self.description,
+            "signature": self.signature,
+            "columns": self.column_shape,
+            "parameters": [parameter.to_dict() for parameter in self.parameters],
+        }
+
+
+class StrategyRegistry:
+    def __init__(self) -> None:
+        self._specs: Dict[str, StrategySpec] = {}
+
+    def __str__(self):
+        return f"Registry of {len(self._specs)} strategies."
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    def __iter__(self) -> Iterator[StrategySpec]:
+        return iter(self._specs.values())
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def register(self, spec: StrategySpec) -> None:
+        if spec.name in self._specs and self._specs[spec.name].func is not spec.func:
+            raise ValueError(f"Strategy '{spec.name}' is already registered.")
+        self._specs[spec.name] = spec
+
+    def get(self, name: str) -> StrategySpec:
+        if name not in self._specs:
+            raise ValueError(f"Strategy '{name}' not found in any of the classes.")
+        return self._specs[name]
+
+    def names(self) -> List[str]:
+        return list(self._specs)
+
+    def describe(self) -> List[Dict[str, Any]]:
+        return [spec.to_dict() for spec in self._specs.values()]
+
+    def namespace(self) -> Dict[str, types.SimpleNamespace]:
+        # Lets generated code call "Traditional.long(...)" without the classes
+        owners: Dict[str, Dict[str, Callable]] = {}
+        for spec in self._specs.values():
+            owners.setdefault(spec.owner, {})[spec.name] = spec.func
+        return {owner: types.SimpleNamespace(**funcs) for owner, funcs in owners.items()}
+
+
+REGISTRY = StrategyRegistry()
+
+
+def register_strategy(
+    description: str,
+    min_columns: int = 1,
+    max_columns: Optional[int] = None,
+    causal: bool = True,
+    fit: Optional[Callable[..., Dict[str, Any]]] = None,
+) -> Callable[[Callable], Callable]:
+    def decorator(func: Callable) -> Callable:
+        parameters = tuple(
+            ParameterSpec(
+                name=parameter.name,
+                annotation=parameter.annotation,
+                default=None if parameter.default is inspect.Parameter.empty else parameter.default,
+                required=parameter.default is inspect.Parameter.empty,
+            )
+            for parameter in inspect.signature(func).parameters.values()
+            if parameter.name not in DATA_PARAMETERS
+        )
+        REGISTRY.register(
+            StrategySpec(
+                name=func.__name__,
+                owner=func.__qualname__.split(".")[0],
+                func=func,
+                parameters=parameters,
+                description=description,
+                min_columns=min_columns,
+                max_columns=max_columns,
+                causal=causal,
+                fit=fit,
+            )
+        )
+        return func
+
+    return decorator
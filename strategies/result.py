@@ -0,0 +1,170 @@
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import Any, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from strategies import kernels
+from utils.metrics import drawdown_episodes, get_metrics, is_capturing, rolling_metrics
+from utils.plot import PlotSpec, is_deferring, plot_specs, render_plots, rolling_specs
+from utils.trades import TradeLog
+
+
+# Trailing window of the rolling metrics, about one quarter of trading days
+ROLLING_WINDOW = 63
+
+
+def price_matrix(df: DataFrame) -> np.ndarray:
+    # A read-only view of the caller's prices (a copy only for mixed dtypes),
+    # so no strategy can write back into the frame it was given
+    prices = df.to_numpy(dtype=float, na_value=np.nan)
+    prices.flags.writeable = False
+    return prices
+
+
+def _read_only(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values)
+    values.flags.writeable = False
+    return values
+
+
+@dataclass(frozen=True)
+class StrategyResult:
+    strategy: str
+    index: pd.Index
+    tickers: Tuple[str, ...]
+    # (dates x tickers) view of the input prices
+    prices: np.ndarray
+    # Per-ticker strategy returns and positions, (dates x tickers)
+    returns: np.ndarray
+    positions: np.ndarray
+    # Portfolio series, one value per date
+    total_return: np.ndarray
+    equity: np.ndarray
+    drawdown: np.ndarray
+    trades: TradeLog
+    metrics: Mapping[str, Any]
+    # Intermediate series shown in frame(): (dates x tickers) or one per date
+    indicators: Mapping[str, np.ndarray] = field(default_factory=dict)
+    # Unrendered plots, and the (figure, title) pairs drawn from them unless
+    # plotting was deferred
+    plots: Tuple[PlotSpec, ...] = ()
+    figures: Tuple[Any, ...] = ()
+    # Whether total_return holds log returns (pairs trading)
+    log_returns: bool = False
+    # Tables a strategy produced besides its series, e.g. scanned pair candidates
+    tables: Mapping[str, DataFrame] = field(default_factory=dict)
+
+    def __str__(self):
+        return f"Result of {self.strategy} over {len(self.tickers)} tickers and {len(self.index)} dates."
+
+    @classmethod
+    def build(
+        cls,
+        strategy: str,
+        df: DataFrame,
+        prices: np.ndarray,
+        positions: np.ndarray,
+        returns: np.ndarray,
+        trades: TradeLog,
+        indicators: Optional[Mapping[str, np.ndarray]] = None,
+        total_return: Optional[np.ndarray] = None,
+        log_returns: bool = False,
+        start: int = 0,
+    ) -> "StrategyResult":
+        # Drops the first `start` warm-up bars by slicing, computes the equity
+        # curve and metrics, and plots unless a batch run is capturing metrics
+        # (or only describes the plots when plotting is deferred)
+        index = df.index[start:]
+        if total_return is None:
+            total_return = kernels.portfolio_returns(returns)
+        total = pd.Series(total_return[start:], index=index, name="Total_Return")
+        if log_returns:
+            cumulative = np.exp(total.cumsum())
+        else:
+            cumulative = (1 + total).cumprod()
+        cumulative = cumulative.rename("Cumulative_Return")
+        drawdown = (cumulative / cumulative.cummax() - 1).rename("Drawdown")
+
+        trades = trades.aligned(index)
+        equity_frame = pd.concat([total, cumulative, drawdown], axis=1)
+        metrics = get_metrics(equity_frame, strategy, trades)
+
+        result = cls(
+            strategy=strategy,
+            index=index,
+            tickers=tuple(df.columns),
+            prices=_read_only(prices[start:]),
+            returns=_read_only(returns[start:]),
+            positions=_read_only(positions[start:]),
+            total_return=_read_only(total.to_numpy()),
+            equity=_read_only(cumulative.to_numpy()),
+            drawdown=_read_only(drawdown.to_numpy()),
+            trades=trades,
+            metrics=MappingProxyType(metrics),
+            indicators=MappingProxyType(
+                {name: _read_only(values[start:]) for name, values in (indicators or {}).items()}
+            ),
+            log_returns=log_returns,
+        )
+        if is_capturing():
+            return result
+        plots = plot_specs(result.frame(), metrics, trades)
+        plots += rolling_specs(result.rolling(), ROLLING_WINDOW)
+        if is_deferring():
+            return replace(result, plots=tuple(plots))
+        return replace(result, plots=tuple(plots), figures=tuple(render_plots(plots)))
+
+    def frame(self) -> DataFrame:
+        # The wide table the strategies used to write into their input, built
+        # on demand for plotting and display; signal columns come from trades
+        frames = [DataFrame(self.prices, index=self.index, columns=list(self.tickers))]
+        for name, values in self.indicators.items():
+            if values.ndim == 1:
+                frames.append(pd.Series(values, index=self.index, name=name))
+            else:
+                frames.append(
+                    DataFrame(
+                        values,
+                        index=self.index,
+                        columns=[f"{ticker}_{name}" for ticker in self.tickers],
+                    )
+                )
+        frames.append(
+            DataFrame(
+                {
+                    "Total_Return": self.total_return,
+                    "Cumulative_Return": self.equity,
+                    "Drawdown": self.drawdown,
+                },
+                index=self.index,
+            )
+        )
+        return pd.concat(frames, axis=1)
+
+    def signals(self) -> DataFrame:
+        return self.trades.signal_frame()
+
+    def episodes(self) -> DataFrame:
+        return drawdown_episodes(self.equity, self.index, [self.strategy])
+
+    def rolling(
+        self, window: int = ROLLING_WINDOW, benchmark: Optional[Any] = None
+    ) -> DataFrame:
+        # Rolling metrics of the portfolio returns; benchmark is one of the
+        # tickers (beta against its price returns) or a return series
+        if isinstance(benchmark, str):
+            if benchmark not in self.tickers:
+                raise ValueError(f"Benchmark {benchmark} is not one of the tickers.")
+            column = self.tickers.index(benchmark)
+            benchmark = kernels.pct_change(self.prices[:, [column]])
+        return rolling_metrics(
+            self.total_return,
+            self.index,
+            window,
+            benchmark=benchmark,
+            names=[self.strategy],
+            log_returns=self.log_returns,
+        )
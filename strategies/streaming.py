@@ -0,0 +1,355 @@
+import warnings
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from strategies import kernels
+from strategies.incremental import (
+    MACD,
+    BollingerBands,
+    CumulativeMax,
+    PctChange,
+    RollingStats,
+)
+
+
+@dataclass(frozen=True)
+class Bar:
+    timestamp: pd.Timestamp
+    tickers: Tuple[str, ...]
+    close: np.ndarray
+
+
+@dataclass(frozen=True)
+class Fill:
+    timestamp: pd.Timestamp
+    ticker: str
+    side: str
+    position: float
+
+
+@dataclass(frozen=True)
+class StreamEvent:
+    timestamp: pd.Timestamp
+    positions: np.ndarray
+    fills: List[Fill] = field(default_factory=list)
+    total_return: float = np.nan
+    equity: float = np.nan
+    drawdown: float = np.nan
+
+
+# Bar sources. CSV and Parquet files are wide price tables (a date column or
+# index plus one close column per ticker, e.g. a saved PriceStore.get frame)
+# read in chunks; store_bars reads the per-ticker files of the price store.
+
+
+def frame_bars(df: DataFrame) -> Iterator[Bar]:
+    tickers = tuple(df.columns)
+    values = df.to_numpy(dtype=float, na_value=np.nan)
+    for timestamp, close in zip(df.index, values):
+        yield Bar(timestamp, tickers, close)
+
+
+def _chunk_bars(chunks: Iterable[DataFrame], date_column: str) -> Iterator[Bar]:
+    for chunk in chunks:
+        if date_column in chunk.columns:
+            chunk = chunk.set_index(date_column)
+        chunk.index = pd.to_datetime(chunk.index)
+        yield from frame_bars(chunk)
+
+
+def csv_bars(
+    path: str, date_column: str = "Date", chunksize: int = 10000
+) -> Iterator[Bar]:
+    with pd.read_csv(path, chunksize=chunksize) as reader:
+        yield from _chunk_bars(reader, date_column)
+
+
+def parquet_bars(
+    path: str, date_column: str = "Date", batch_size: int = 10000
+) -> Iterator[Bar]:
+    import pyarrow.parquet as pq
+
+    batches = pq.ParquetFile(path).iter_batches(batch_size=batch_size)
+    yield from _chunk_bars((batch.to_pandas() for batch in batches), date_column)
+
+
+def store_bars(
+    tickers: Sequence[str],
+    start: Any,
+    end: Any = None,
+    interval: str = "1d",
+    field: str = "Close",
+) -> Iterator[Bar]:
+    # Downloads any missing range first, like the batch pipeline's load_prices
+    from utils.price_store import PriceStore
+
+    yield from frame_bars(PriceStore.instance().get(tickers, start, end, interval, field))
+
+
+def simulated_bars(
+    tickers: Sequence[str],
+    start: str = "2020-01-01",
+    periods: Optional[int] = None,
+    freq: str = "B",
+    drift: float = 0.0002,
+    volatility: float = 0.02,
+    seed: Optional[int] = None,
+) -> Iterator[Bar]:
+    # Geometric random walk; periods=None streams forever
+    rng = np.random.default_rng(seed)
+    tickers = tuple(tickers)
+    close = np.full(len(tickers), 100.0)
+    timestamp = pd.Timestamp(start)
+    offset = pd.tseries.frequencies.to_offset(freq)
+    produced = 0
+    while periods is None or produced < periods:
+        yield Bar(timestamp, tickers, close.copy())
+        close = close * np.exp(rng.normal(drift, volatility, len(tickers)))
+        timestamp = timestamp + offset
+        produced += 1
+
+
+# Per-bar versions of the causal strategies, built on the incremental
+# indicators so each bar costs the same no matter how long the history is.
+
+
+class StreamingRule(ABC):
+    # Hold strategies close every position on the last bar, as the batch
+    # TradeLog.round_trips records them
+    closes_at_end = False
+
+    def __init__(self) -> None:
+        self._returns = PctChange()
+        self._position: Optional[np.ndarray] = None
+        self._tickers: Tuple[str, ...] = ()
+
+    def __str__(self):
+        return f"Streaming {type(self).__name__}."
+
+    def update(self, close: np.ndarray, tickers: Sequence[str] = ()) -> np.ndarray:
+        self._tickers = tuple(tickers)
+        returns = self._returns.update(close).value
+        if self._position is None:
+            self._position = np.full(close.shape, np.nan)
+        self._position = self._next_position(close, returns, self._position)
+        return returns
+
+    @property
+    def position(self) -> np.ndarray:
+        return self._position
+
+    def strategy_returns(self, previous: np.ndarray, returns: np.ndarray) -> np.ndarray:
+        # Yesterday's position earns today's return, as kernels.strategy_returns
+        return previous * returns
+
+    @abstractmethod
+    def _next_position(
+        self, close: np.ndarray, returns: np.ndarray, previous: np.ndarray
+    ) -> np.ndarray:
+        ...
+
+    @staticmethod
+    def _hold(signal: np.ndarray, previous: np.ndarray) -> np.ndarray:
+        # Forward fill: keep the previous position where there is no new signal
+        return np.where(np.isnan(signal), previous, signal)
+
+
+class HoldRule(StreamingRule):
+    # Each ticker holds a fixed side (1 long, -1 short, 0 flat) from the first bar
+    closes_at_end = True
+
+    @abstractmethod
+    def _sides(self, tickers: Tuple[str, ...]) -> List[int]:
+        ...
+
+    def _next_position(self, close, returns, previous):
+        return kernels.hold_positions(self._sides(self._tickers), close.shape)
+
+    def strategy_returns(self, previous, returns):
+        # As the batch hold strategies: flat tickers earn 0 and still count
+        # towards the average
+        with np.errstate(invalid="ignore"):
+            return np.where(self.position == 0, 0.0, self.position * returns)
+
+
+class LongRule(HoldRule):
+    def _sides(self, tickers):
+        return [1] * len(tickers)
+
+
+class ShortRule(HoldRule):
+    def _sides(self, tickers):
+        return [-1] * len(tickers)
+
+
+class LongShortRule(HoldRule):
+    def __init__(
+        self,
+        long_tickers: Optional[List[str]] = None,
+        short_tickers: Optional[List[str]] = None,
+    ) -> None:
+        super().__init__()
+        self._long = set(long_tickers or [])
+        self._short = set(short_tickers or [])
+
+    def _sides(self, tickers):
+        return [
+            1 if ticker in self._long else -1 if ticker in self._short else 0
+            for ticker in tickers
+        ]
+
+
+class MomentumRule(StreamingRule):
+    def __init__(self, window: int = 5) -> None:
+        super().__init__()
+        self._momentum = RollingStats(window)
+
+    def _next_position(self, close, returns, previous):
+        return kernels.momentum_signal(self._momentum.update(returns).mean)
+
+
+class MACDRule(StreamingRule):
+    def __init__(
+        self, fast_window: int = 12, slow_window: int = 26, signal_window: int = 9
+    ) -> None:
+        super().__init__()
+        self._macd = MACD(fast_window, slow_window, signal_window)
+
+    def _next_position(self, close, returns, previous):
+        macd = self._macd.update(close)
+        return self._hold(kernels.crossover_signal(macd.line, macd.signal), previous)
+
+
+class BollingerRule(StreamingRule):
+    def __init__(self, window: int = 20, num_std: float = 2) -> None:
+        super().__init__()
+        self._bands = BollingerBands(window, num_std)
+
+    def _next_position(self, close, returns, previous):
+        bands = self._bands.update(close)
+        return self._hold(kernels.band_signal(close, bands.upper, bands.lower), previous)
+
+
+# Strategies whose signals only use past bars; whole-sample ones cannot stream
+STREAMING_RULES: Dict[str, Type[StreamingRule]] = {
+    "long": LongRule,
+    "short": ShortRule,
+    "long_short": LongShortRule,
+    "momentum": MomentumRule,
+    "macd_trend_following": MACDRule,
+    "mean_reversion_bollinger_bands": BollingerRule,
+}
+
+
+class StreamingBacktest:
+    def __init__(self, strategy: str, initial_equity: float = 10000, **params: Any) -> None:
+        if strategy not in STREAMING_RULES:
+            raise ValueError(
+                f"Strategy '{strategy}' cannot run bar by bar, "
+                f"choose one of {', '.join(STREAMING_RULES)}."
+            )
+        self.strategy = strategy
+        self.initial_equity = initial_equity
+        self._rule = STREAMING_RULES[strategy](**params)
+        self._peak = CumulativeMax()
+        self._cumulative = 1.0
+        self._equity_peak = np.nan
+        self._previous: Optional[np.ndarray] = None
+        self._last: Optional[Bar] = None
+        self._closed = False
+        self._bars = 0
+        self._trades = 0
+        self._max_drawdown = 0.0
+
+    def __str__(self):
+        return f"Streaming backtest of {self.strategy}."
+
+    def run(self, bars: Iterable[Bar]) -> Iterator[StreamEvent]:
+        for bar in bars:
+            yield self.step(bar)
+        if self._last is not None:
+            event = self.close()
+            if event.fills:
+                yield event
+
+    def step(self, bar: Bar) -> StreamEvent:
+        if self._closed:
+            raise RuntimeError("Streaming backtest is closed, start a new one.")
+        returns = self._rule.update(bar.close, bar.tickers)
+        positions = self._rule.position
+        previous = self._previous
+        if previous is None:
+            previous = np.full(positions.shape, np.nan)
+
+        # Same arithmetic as the batch strategies: yesterday's position earns today's return
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            total_return = float(np.nanmean(self._rule.strategy_returns(previous, returns)))
+        cumulative = np.nan
+        if not np.isnan(total_return):
+            self._cumulative *= 1 + total_return
+            cumulative = self._cumulative
+            self._equity_peak = np.fmax(self._equity_peak, cumulative)
+        drawdown = float(self._peak.update(cumulative).drawdown)
+
+        fills = [
+            Fill(bar.timestamp, ticker, "Buy" if position > 0 else "Sell", float(position))
+            for ticker, position, changed in zip(bar.tickers, positions, positions != previous)
+            if changed and (position > 0 or position < 0)
+        ]
+
+        self._previous = positions
+        self._last = bar
+        self._bars += 1
+        self._trades += len(fills)
+        if drawdown < self._max_drawdown:
+            self._max_drawdown = drawdown
+        return StreamEvent(
+            timestamp=bar.timestamp,
+            positions=positions,
+            fills=fills,
+            total_return=total_return,
+            equity=cumulative * self.initial_equity,
+            drawdown=drawdown,
+        )
+
+    def _closing_fills(self) -> List[Fill]:
+        # Flatten on the last bar seen, the trades a batch run on the same bars ends with
+        if self._closed or self._last is None or not self._rule.closes_at_end:
+            return []
+        return [
+            Fill(self._last.timestamp, ticker, "Sell" if position > 0 else "Buy", 0.0)
+            for ticker, position in zip(self._last.tickers, self._previous)
+            if position > 0 or position < 0
+        ]
+
+    def close(self) -> StreamEvent:
+        # End of stream: no further bars, open positions are closed on the last one
+        if self._last is None:
+            raise RuntimeError("Streaming backtest has not seen any bars.")
+        fills = self._closing_fills()
+        self._trades += len(fills)
+        self._closed = True
+        return StreamEvent(
+            timestamp=self._last.timestamp,
+            positions=np.zeros(len(self._last.tickers)) if fills else self._previous,
+            fills=fills,
+            equity=self._cumulative * self.initial_equity,
+            drawdown=float(self._peak.drawdown),
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        # Counts the closing trades of a stream that is still open, as if it ended now
+        return {
+            "Bars": self._bars,
+            "# Trades": self._trades + len(self._closing_fills()),
+            "Equity Final [$]": round(self._cumulative * self.initial_equity, 2),
+            "Equity Peak [$]": round(float(self._equity_peak) * self.initial_equity, 2),
+            "Return [%]": round((self._cumulative - 1) * 100, 2),
+            "Max. Drawdown [%]": round(self._max_drawdown * 100, 2),
+        }
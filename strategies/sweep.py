@@ -0,0 +1,187 @@
+import contextlib
+import io
+import itertools
+import multiprocessing
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from strategies.registry import REGISTRY, StrategyRegistry, StrategySpec
+
+# Price frame the worker processes evaluate against, attached once per worker
+_shared: Dict[str, Any] = {}
+
+
+def _attach_prices(
+    name: str, shape: Tuple[int, int], index: pd.Index, columns: List[str]
+) -> None:
+    shm = SharedMemory(name=name)
+    values = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    values.flags.writeable = False
+    _shared["shm"] = shm
+    _shared["prices"] = DataFrame(values, index=index, columns=columns, copy=False)
+
+
+def shared_prices() -> DataFrame:
+    return _shared["prices"]
+
+
+def _evaluate(strategy: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    # Imported here so spawned workers register every strategy before lookup
+    import strategies  # noqa: F401
+    from utils.metrics import capture_metrics
+
+    spec = REGISTRY.get(strategy)
+    # Strategies only read their input, so every evaluation shares one frame
+    df = shared_prices()
+    try:
+        with capture_metrics() as results, contextlib.redirect_stdout(io.StringIO()):
+            with warnings.catch_warnings():
+                # Thousands of evaluations would repeat the same pandas warnings
+                warnings.simplefilter("ignore")
+                spec.func(df=df, **params)
+        if not results:
+            raise RuntimeError(f"Strategy '{strategy}' produced no metrics.")
+        return {**params, **results[-1], "error": None}
+    except Exception as e:
+        return {**params, "error": f"{type(e).__name__}: {str(e)}"}
+
+
+class _InlineExecutor:
+    # Stands in for a process pool when a single worker is requested
+    def map(self, fn, *iterables, chunksize: int = 1) -> Iterator[Any]:
+        return map(fn, *iterables)
+
+
+@contextlib.contextmanager
+def shared_price_pool(df: DataFrame, workers: int) -> Iterator[Any]:
+    if workers <= 1:
+        # Inline runs share this process's global, so a nested pool (a sweep
+        # inside a walk-forward window) must hand back the outer frame
+        missing = object()
+        previous = _shared.get("prices", missing)
+        _shared["prices"] = df.astype(np.float64)
+        try:
+            yield _InlineExecutor()
+        finally:
+            if previous is missing:
+                _shared.pop("prices", None)
+            else:
+                _shared["prices"] = previous
+        return
+
+    # One copy of the price matrix in shared memory, workers map it read-only
+    values = df.to_numpy(dtype=np.float64, na_value=np.nan)
+    shm = SharedMemory(create=True, size=max(values.nbytes, 1))
+    try:
+        np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf)[:] = values
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_attach_prices,
+            initargs=(shm.name, values.shape, df.index, list(df.columns)),
+        ) as executor:
+            yield executor
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+class ParameterSweep:
+    def __init__(
+        self,
+        strategy: str,
+        space: Dict[str, Any],
+        method: str = "grid",
+        samples: int = 100,
+        seed: Optional[int] = None,
+        workers: Optional[int] = None,
+        rank_by: str = "Sharpe Ratio",
+        ascending: bool = False,
+        registry: StrategyRegistry = REGISTRY,
+    ) -> None:
+        if method not in ("grid", "random"):
+            raise ValueError(f"Unknown search method '{method}', use 'grid' or 'random'.")
+        self._spec = registry.get(strategy)
+        self._space = space
+        self._method = method
+        self._samples = samples
+        self._seed = seed
+        self.workers = workers or os.cpu_count() or 1
+        self.rank_by = rank_by
+        self.ascending = ascending
+        self._check_space()
+
+    def __str__(self):
+        return f"Parameter sweep of {self._spec.qualname} ({self._method} search)."
+
+    @property
+    def spec(self) -> StrategySpec:
+        return self._spec
+
+    def _check_space(self) -> None:
+        for name, values in self._space.items():
+            if self._spec.parameter(name) is None:
+                raise ValueError(f"Strategy '{self._spec.name}' has no argument '{name}'")
+            # Tuples are (low, high) ranges and can only be sampled
+            if isinstance(values, tuple) and self._method == "grid":
+                raise ValueError(f"Grid search needs a list of values for '{name}'")
+
+    def combinations(self) -> List[Dict[str, Any]]:
+        names = list(self._space)
+        if self._method == "grid":
+            grid = itertools.product(*(list(self._space[name]) for name in names))
+            return [dict(zip(names, values)) for values in grid]
+
+        rng = np.random.default_rng(self._seed)
+        return [
+            {name: self._sample(rng, self._space[name]) for name in names}
+            for _ in range(self._samples)
+        ]
+
+    @staticmethod
+    def _sample(rng: np.random.Generator, values: Any) -> Any:
+        if isinstance(values, tuple):
+            low, high = values
+            if isinstance(low, int) and isinstance(high, int):
+                return int(rng.integers(low, high + 1))
+            return float(rng.uniform(low, high))
+        values = list(values)
+        return values[int(rng.integers(len(values)))]
+
+    def run(self, df: DataFrame) -> DataFrame:
+        combinations = self.combinations()
+        workers = min(self.workers, len(combinations))
+        with shared_price_pool(df, workers) as executor:
+            chunksize = max(1, len(combinations) // (workers * 4))
+            rows = list(
+                executor.map(
+                    _evaluate,
+                    itertools.repeat(self._spec.name),
+                    combinations,
+                    chunksize=chunksize,
+                )
+            )
+        return self._rank(rows)
+
+    def _rank(self, rows: List[Dict[str, Any]]) -> DataFrame:
+        table = DataFrame(rows)
+        if self.rank_by in table.columns:
+            table = table.sort_values(
+                self.rank_by, ascending=self.ascending, na_position="last", kind="stable"
+            )
+        table = table.reset_index(drop=True)
+        table.index = pd.RangeIndex(1, len(table) + 1, name="Rank")
+        return table
+
+
+def sweep(
+    df: DataFrame, strategy: str, space: Dict[str, Sequence[Any]], **kwargs
+) -> DataFrame:
+    return ParameterSweep(strategy, space, **kwargs).run(df)
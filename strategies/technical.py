@@ -1,8 +1,43 @@
+from dataclasses import replace
+from typing import Dict, Optional
+
 import numpy as np
 from pandas import DataFrame
 
-from utils.metrics import get_metrics
-from utils.plot import plot_results
+from strategies import kernels
+from strategies.indicator_cache import IndicatorCache
+from strategies.pairs_scanner import PairsScanner
+from strategies.registry import register_strategy
+from strategies.result import StrategyResult, price_matrix
+from utils.trades import TradeLog
+
+
+def _indicators(df: DataFrame):
+    # Shared across strategies and sweep runs on the same prices
+    return IndicatorCache.instance().view(df)
+
+
+def _kernel_result(
+    strategy: str, df: DataFrame, prices: np.ndarray, blocks: Dict[str, np.ndarray]
+) -> StrategyResult:
+    # Kernel blocks become the result's arrays; the wide per-ticker table is
+    # only assembled if the result is plotted or displayed
+    blocks["strategy"] = kernels.strategy_returns(blocks["position"], blocks["return"])
+    return StrategyResult.build(
+        strategy,
+        df,
+        prices,
+        positions=blocks["position"],
+        returns=blocks["strategy"],
+        trades=TradeLog.from_positions(blocks["position"], df.index, list(df.columns)),
+        indicators=blocks,
+    )
+
+def _fit_moving_average_ratio(df: DataFrame) -> Dict[str, np.ndarray]:
+    prices = price_matrix(df)
+    ratio = kernels.moving_average_ratio(prices, 20, (0.5, 0.95), _indicators(df))["ratio"]
+    return {"thresholds": kernels.ratio_thresholds(ratio, (0.5, 0.95))}
+
 
 class TechnicalAnalysis:
 
@@ -14,268 +49,157 @@ class TechnicalAnalysis:
     
     # momentum trading
     @staticmethod
-    def momentum(df: DataFrame = None, window: int = 5) -> None:
-        original_len_cols = len(df.columns)
-        for stock in df.columns[:original_len_cols]:
-            df[f"{stock}_return"] = df[stock].pct_change()
-            df[f"{stock}_momentum"] = (
-                df[f"{stock}_return"].rolling(window=window).mean()
-            )
-            df[f"{stock}_position"] = np.where(
-                df[f"{stock}_momentum"].isna(),
-                0,
-                np.where(df[f"{stock}_momentum"] > 0, 1, -1),
-            )
-            df[f"{stock}_strategy"] = (
-                df[f"{stock}_position"].shift(1) * df[f"{stock}_return"]
-            )
-
-            # Add buy and sell signals only when position changes
-            df[f"{stock}_signal"] = np.where(
-                df[f"{stock}_position"] != df[f"{stock}_position"].shift(),
-                np.where(
-                    df[f"{stock}_position"] == 1,
-                    "Buy",
-                    np.where(df[f"{stock}_position"] == -1, "Sell", None),
-                ),
-                None,
-            )
-
-        # Calculate total return across all stocks
-        df["Total_Return"] = df[
-            [col for col in df.columns if col.endswith("_strategy")]
-        ].mean(axis=1)
-        df["Cumulative_Return"] = (1 + df["Total_Return"]).cumprod()
-        df["Drawdown"] = (
-            df["Cumulative_Return"] / df["Cumulative_Return"].cummax()
-        ) - 1
-
-        # Generate outputs
-        metrics = get_metrics(df, "momentum")
-        figures = plot_results(df, metrics)
-        
-        return metrics, figures
+    @register_strategy("Go long when the rolling mean return over window is positive, short when negative.")
+    def momentum(df: DataFrame = None, window: int = 5) -> StrategyResult:
+        prices = price_matrix(df)
+        return _kernel_result(
+            "momentum", df, prices, kernels.momentum(prices, window, _indicators(df))
+        )
     
     # macd trend following
     @staticmethod
+    @register_strategy("Follow the trend when the MACD line crosses its signal line.")
     def macd_trend_following(
         df: DataFrame = None,
         fast_window: int = 12,
         slow_window: int = 26,
         signal_window: int = 9,
-    ) -> None:
-        for stock in df.columns:
-            df[f"{stock}_return"] = df[stock].pct_change()
-            df[f"{stock}_EMA12"] = df[stock].ewm(span=fast_window, adjust=False).mean()
-            df[f"{stock}_EMA26"] = df[stock].ewm(span=slow_window, adjust=False).mean()
-            df[f"{stock}_MACD"] = df[f"{stock}_EMA12"] - df[f"{stock}_EMA26"]
-            df[f"{stock}_MACD_signal"] = (
-                df[f"{stock}_MACD"].rolling(window=signal_window).mean()
-            )
-            df[f"{stock}_position"] = np.where(
-                df[f"{stock}_MACD"].isna(),
-                np.nan,
-                np.where(
-                    df[f"{stock}_MACD"] > df[f"{stock}_MACD_signal"],
-                    1,
-                    np.where(
-                        df[f"{stock}_MACD"] < df[f"{stock}_MACD_signal"], -1, np.nan
-                    ),
-                ),
-            )
-            df[f"{stock}_position"] = df[f"{stock}_position"].ffill()
-            df[f"{stock}_strategy"] = (
-                df[f"{stock}_position"].shift(1) * df[f"{stock}_return"]
-            )
-
-            # Add buy and sell signals only when position changes
-            df[f"{stock}_signal"] = np.where(
-                df[f"{stock}_position"] != df[f"{stock}_position"].shift(),
-                np.where(
-                    df[f"{stock}_position"] == 1,
-                    "Buy",
-                    np.where(df[f"{stock}_position"] == -1, "Sell", None),
-                ),
-                None,
-            )
-
-        df["Total_Return"] = df[
-            [col for col in df.columns if col.endswith("_strategy")]
-        ].mean(axis=1)
-        df["Cumulative_Return"] = (1 + df["Total_Return"]).cumprod()
-        df["Drawdown"] = (
-            df["Cumulative_Return"] / df["Cumulative_Return"].cummax()
-        ) - 1
-
-        # Generate outputs
-        metrics = get_metrics(df, "macd")
-        plot_results(df, metrics)
+    ) -> StrategyResult:
+        prices = price_matrix(df)
+        return _kernel_result(
+            "macd",
+            df,
+            prices,
+            kernels.macd(prices, fast_window, slow_window, signal_window, _indicators(df)),
+        )
 
     # Mean reversion variants
     @staticmethod
-    def mean_reversion_moving_average(df: DataFrame = None) -> None:
-        original_len_cols = len(df.columns)
-
-        # Calculate returns and z-scores
-        for stock in df.columns[:original_len_cols]:
-            df[f"{stock}_return"] = df[stock].pct_change()
-            df[f"{stock}_ma"] = df[stock].rolling(window=20).mean()
-            df[f"{stock}_ratio"] = df[stock] / df[f"{stock}_ma"]
-
-            percentiles = [0.5, 0.95]
-            p = df[f"{stock}_ratio"].dropna().quantile(percentiles)
-            long = p.iloc[0]
-            short = p.iloc[1]
-
-            df[f"{stock}_position"] = np.nan
-            df.loc[df[f"{stock}_ratio"] > short, f"{stock}_position"] = -1
-            df.loc[df[f"{stock}_ratio"] < long, f"{stock}_position"] = 1
-            df[f"{stock}_position"] = df[f"{stock}_position"].fillna(
-                method="ffill"
-            )  # We will always be in or out of a position.
-            df[f"{stock}_strategy"] = (
-                df[f"{stock}_position"].shift() * df[f"{stock}_return"]
-            )
-
-            # Add buy and sell signals only when position changes
-            df[f"{stock}_signal"] = np.where(
-                df[f"{stock}_position"] != df[f"{stock}_position"].shift(),
-                np.where(
-                    df[f"{stock}_position"] == 1,
-                    "Buy",
-                    np.where(df[f"{stock}_position"] == -1, "Sell", None),
-                ),
-                None,
-            )
-
-        # Calculate total return
-        df["Total_Return"] = df[
-            [col for col in df.columns if col.endswith("_strategy")]
-        ].mean(axis=1)
-        df["Cumulative_Return"] = (1 + df["Total_Return"]).cumprod()
-        df["Drawdown"] = (
-            df["Cumulative_Return"] / df["Cumulative_Return"].cummax()
-        ) - 1
-
-        # Generate outputs
-        metrics = get_metrics(df, "mean_reversion")
-        plot_results(df, metrics)
+    @register_strategy(
+        "Trade the price to 20-day moving average ratio back towards its median.",
+        # Thresholds are quantiles of the whole sample unless given
+        causal=False,
+        fit=_fit_moving_average_ratio,
+    )
+    def mean_reversion_moving_average(
+        df: DataFrame = None, thresholds: Optional[np.ndarray] = None
+    ) -> StrategyResult:
+        # Long below the median ratio, short above the 95th percentile
+        prices = price_matrix(df)
+        return _kernel_result(
+            "mean_reversion",
+            df,
+            prices,
+            kernels.moving_average_ratio(
+                prices, 20, (0.5, 0.95), _indicators(df), thresholds=thresholds
+            ),
+        )
 
     @staticmethod
+    @register_strategy("Short above the upper Bollinger band, buy below the lower band.")
     def mean_reversion_bollinger_bands(
         df: DataFrame = None, window: int = 20, num_std: int = 2
-    ) -> None:
-
-        for stock in df.columns:
-            df[f"{stock}_return"] = df[stock].pct_change()
-            df[f"{stock}_ma"] = df[stock].rolling(window=window).mean()
-            df[f"{stock}_std"] = df[stock].rolling(window=window).std()
-            df[f"{stock}_upper_band"] = df[f"{stock}_ma"] + (
-                num_std * df[f"{stock}_std"]
-            )
-            df[f"{stock}_lower_band"] = df[f"{stock}_ma"] - (
-                num_std * df[f"{stock}_std"]
-            )
-            df[f"{stock}_position"] = np.where(
-                df[stock].isna(),
-                np.nan,
-                np.where(
-                    df[stock] > df[f"{stock}_upper_band"],
-                    -1,
-                    np.where(df[stock] < df[f"{stock}_lower_band"], 1, np.nan),
-                ),
-            )
-            df[f"{stock}_position"] = df[f"{stock}_position"].ffill()
-            df[f"{stock}_strategy"] = (
-                df[f"{stock}_position"].shift(1) * df[f"{stock}_return"]
-            )
-
-            # Add buy and sell signals only when position changes
-            df[f"{stock}_signal"] = np.where(
-                df[f"{stock}_position"] != df[f"{stock}_position"].shift(),
-                np.where(
-                    df[f"{stock}_position"] == 1,
-                    "Buy",
-                    np.where(df[f"{stock}_position"] == -1, "Sell", None),
-                ),
-                None,
-            )
-
-        df["Total_Return"] = df[
-            [col for col in df.columns if col.endswith("_strategy")]
-        ].mean(axis=1)
-        df["Cumulative_Return"] = (1 + df["Total_Return"]).cumprod()
-        df["Drawdown"] = (
-            df["Cumulative_Return"] / df["Cumulative_Return"].cummax()
-        ) - 1
-
-        # Generates output
-        metrics = get_metrics(df, "bollinger_bands")
-        plot_results(df, metrics)
+    ) -> StrategyResult:
+        prices = price_matrix(df)
+        return _kernel_result(
+            "bollinger_bands",
+            df,
+            prices,
+            kernels.bollinger_bands(prices, window, num_std, _indicators(df)),
+        )
 
     @staticmethod
+    @register_strategy(
+        "Trade the z-score of the log-price spread between exactly two tickers.",
+        min_columns=2,
+        max_columns=2,
+    )
     def pairs_trading(
         df: DataFrame = None,
         entry_threshold: float = 2.0,
         exit_threshold: float = 0.5,
         mean_window: int = 50,
         std_window: int = 20,
-    ) -> None:
+        hedge_ratio: float = 1.0,
+    ) -> StrategyResult:
         if len(df.columns) != 2:
             raise ValueError("Number of stocks must be 2 for pairs trading.")
 
-        first_stock, second_stock = df.columns
-
-        # Calculate log returns
-        for stock in [first_stock, second_stock]:
-            df[f"{stock}_log_return"] = np.log(df[stock] / df[stock].shift(1))
-
-        # Calculate spread using log prices
-        df["spread"] = np.log(df[first_stock]) - np.log(df[second_stock])
-        df["spread_ma"] = df["spread"].rolling(window=mean_window).mean()
-        df["spread_std"] = df["spread"].rolling(window=std_window).std()
-        df["spread_zscore"] = (df["spread"] - df["spread_ma"]) / df["spread_std"]
-
-        # Generate signals with dynamic position sizing
-        def position_size(zscore, entry, exit):
-            if abs(zscore) < exit:
-                return 0
-            elif abs(zscore) > entry:
-                return np.sign(zscore) * min(abs(zscore) / entry, 1)
-            else:
-                return np.nan  # Will be forward filled
-
-        df["position"] = df["spread_zscore"].apply(
-            lambda z: position_size(z, entry_threshold, exit_threshold)
+        prices = price_matrix(df)
+        blocks = kernels.pairs(
+            prices,
+            np.array([0]),
+            np.array([1]),
+            entry_threshold,
+            exit_threshold,
+            mean_window,
+            std_window,
+            np.array([hedge_ratio]),
         )
-        df["position"] = df["position"].fillna(method="ffill")
-
-        df[f"{first_stock}_position"] = -df["position"]
-        df[f"{second_stock}_position"] = df["position"]
-
-        # Add buy and sell signals only when position changes
-        for stock in [first_stock, second_stock]:
-            df[f"{stock}_signal"] = np.where(
-                df[f"{stock}_position"] != df[f"{stock}_position"].shift(),
-                np.where(
-                    df[f"{stock}_position"] > 0,
-                    "Buy",
-                    np.where(df[f"{stock}_position"] < 0, "Sell", None),
-                ),
-                None,
-            )
-        df = df.iloc[mean_window:, :]
-
-        # Calculate returns
-        df["Total_Return"] = (
-            df[f"{first_stock}_log_return"] * df[f"{first_stock}_position"]
-            + df[f"{second_stock}_log_return"] * df[f"{second_stock}_position"]
+        # Short hedge_ratio units of the first leg, long the second
+        position = blocks["position"][:, 0]
+        legs = np.column_stack([-hedge_ratio * position, position])
+        indicators = {"log_return": blocks["log_return"], "position": legs}
+        for name in ("spread", "spread_ma", "spread_std", "spread_zscore"):
+            indicators[name] = blocks[name][:, 0]
+
+        # Record buy and sell trades only when position changes; the first
+        # mean_window bars have no z-score yet and are dropped
+        return StrategyResult.build(
+            "pair_trade",
+            df,
+            prices,
+            positions=legs,
+            returns=kernels.shift(legs) * blocks["log_return"],
+            trades=TradeLog.from_positions(legs, df.index, list(df.columns)),
+            indicators=indicators,
+            total_return=blocks["pair_return"][:, 0],
+            log_returns=True,
+            start=mean_window,
         )
-        df["Cumulative_Return"] = np.exp(df["Total_Return"].cumsum())
-        df["Drawdown"] = (
-            df["Cumulative_Return"] / df["Cumulative_Return"].cummax()
-        ) - 1
 
-        # Generate outputs
-        metrics = get_metrics(df, "pair_trade")
-        plot_results(df, metrics)
\ No newline at end of file
+    @staticmethod
+    @register_strategy(
+        "Scan every pair of tickers for cointegration and pairs-trade the strongest one.",
+        min_columns=2,
+        # The pair is picked with statistics over the whole sample
+        causal=False,
+    )
+    def pairs_scan(
+        df: DataFrame = None,
+        top_k: int = 10,
+        min_correlation: float = 0.5,
+        max_adf_stat: float = -2.9,
+        entry_threshold: float = 2.0,
+        exit_threshold: float = 0.5,
+        mean_window: int = 50,
+        std_window: int = 20,
+    ) -> StrategyResult:
+        scanner = PairsScanner(
+            top_k=top_k, min_correlation=min_correlation, max_adf_stat=max_adf_stat
+        )
+        candidates = scanner.backtest(
+            df,
+            scanner.scan(df),
+            entry_threshold,
+            exit_threshold,
+            mean_window,
+            std_window,
+        )
+        if candidates.empty:
+            raise ValueError(
+                f"No pair has a hedged-spread ADF statistic below {max_adf_stat}."
+            )
+
+        # Full metrics and plots for the strongest candidate, with every
+        # candidate's screen statistics and backtest alongside
+        best = candidates.iloc[0]
+        result = TechnicalAnalysis.pairs_trading(
+            df=df[[best["first"], best["second"]]],
+            entry_threshold=entry_threshold,
+            exit_threshold=exit_threshold,
+            mean_window=mean_window,
+            std_window=std_window,
+            hedge_ratio=float(best["hedge_ratio"]),
+        )
+        return replace(result, tables={"candidates": candidates})
\ No newline at end of file
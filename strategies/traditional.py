@@ -1,11 +1,28 @@
-from matplotlib.figure import Figure
-import pandas as pd
-import matplotlib.pyplot as plt
 from pandas import DataFrame
-from typing import List, Optional, Tuple, Dict
+from typing import List, Optional, Sequence
 import numpy as np
-from utils.metrics import get_metrics
-from utils.plot import plot_results
+from strategies import kernels
+from strategies.registry import register_strategy
+from strategies.result import StrategyResult, price_matrix
+from utils.trades import TradeLog
+
+
+def _hold_result(strategy: str, df: DataFrame, sides: Sequence[int]) -> StrategyResult:
+    # Every ticker holds its side (1 long, -1 short, 0 flat) for the whole period
+    prices = price_matrix(df)
+    positions = kernels.hold_positions(sides, prices.shape)
+    with np.errstate(invalid="ignore"):
+        returns = np.where(positions == 0, 0.0, positions * kernels.pct_change(prices))
+    return StrategyResult.build(
+        strategy,
+        df,
+        prices,
+        positions=positions,
+        returns=returns,
+        trades=TradeLog.round_trips(df.index, list(df.columns), sides),
+        indicators={"return": returns},
+    )
+
 
 class Traditional:
     def __init__(self):
@@ -15,86 +32,27 @@ class Traditional:
         return f"Experiment with traditional simple strategies."
 
     @staticmethod
-    def long(df: DataFrame = None) -> Tuple[Dict, List[Figure]]:
-        original_len_cols = len(df.columns)
-
-        # Calculate the returns for holding long positions
-        for stock in df.columns:
-            df[f"{stock}_return"] = df[stock].pct_change()
-
-        df["Total_Return"] = df[[col for col in df.columns if "return" in col]].mean(axis=1)
-        df["Cumulative_Return"] = (1 + df["Total_Return"]).cumprod()
-        df["Drawdown"] = (df["Cumulative_Return"] - df["Cumulative_Return"].cummax()) / df["Cumulative_Return"].cummax() - 1
-
-        # Add market signal column
-        for stock in df.columns[:original_len_cols]:
-            df[f"{stock}_signal"] = 0
-            df.loc[df.index[0], f"{stock}_signal"] = "Buy"
-            df.loc[df.index[-1], f"{stock}_signal"] = "Sell"
-
-        # Generate outputs
-        metrics = get_metrics(df, "long")
-        figures = plot_results(df, metrics)
-        
-        return metrics, figures
+    @register_strategy("Buy and hold every ticker for the whole period, equally weighted.")
+    def long(df: DataFrame = None) -> StrategyResult:
+        # Buy every stock on the first day and sell on the last
+        return _hold_result("long", df, [1] * len(df.columns))
 
     @staticmethod
-    def short(df: DataFrame) -> Tuple[Dict, List[Figure]]:
-        original_len_cols = len(df.columns)
-
-        # Calculate returns for short positions
-        for stock in df.columns:
-            df[f"{stock}_return"] = -1 * df[stock].pct_change()
-
-        df["Total_Return"] = df[[col for col in df.columns if "return" in col]].mean(axis=1)
-        df["Cumulative_Return"] = (1 + df["Total_Return"]).cumprod()
-        df["Drawdown"] = (df["Cumulative_Return"] / df["Cumulative_Return"].cummax()) - 1
-
-        # Add market signal column
-        for stock in df.columns[:original_len_cols]:
-            df[f"{stock}_signal"] = 0
-            df.loc[df.index[0], f"{stock}_signal"] = "Sell"
-            df.loc[df.index[-1], f"{stock}_signal"] = "Buy"
-
-        # Generate outputs
-        metrics = get_metrics(df, "short")
-        figures = plot_results(df, metrics)
-        
-        return metrics, figures
+    @register_strategy("Short every ticker for the whole period, equally weighted.")
+    def short(df: DataFrame) -> StrategyResult:
+        # Sell every stock on the first day and buy back on the last
+        return _hold_result("short", df, [-1] * len(df.columns))
 
     @staticmethod
+    @register_strategy("Hold long_tickers long and short_tickers short for the whole period.")
     def long_short(
         df: DataFrame = None,
         long_tickers: Optional[List[str]] = None,
         short_tickers: Optional[List[str]] = None,
-    ) -> Tuple[Dict, List[Figure]]:
-        original_len_cols = len(df.columns)
-
-        # Calculate returns
-        for stock in df.columns:
-            if stock in long_tickers:
-                df[f"{stock}_return"] = df[stock].pct_change()
-            elif stock in short_tickers:
-                df[f"{stock}_return"] = -1 * (df[stock].pct_change())
-            else:
-                df[f"{stock}_return"] = 0
-
-        df["Total_Return"] = df[[col for col in df.columns if "return" in col]].mean(axis=1)
-        df["Cumulative_Return"] = (1 + df["Total_Return"]).cumprod()
-        df["Drawdown"] = (df["Cumulative_Return"] / df["Cumulative_Return"].cummax()) - 1
-
-        # Add market signal column
-        for stock in df.columns[:original_len_cols]:
-            df[f"{stock}_signal"] = 0
-            if stock in long_tickers:
-                df.loc[df.index[0], f"{stock}_signal"] = "Buy"
-                df.loc[df.index[-1], f"{stock}_signal"] = "Sell"
-            elif stock in short_tickers:
-                df.loc[df.index[0], f"{stock}_signal"] = "Sell"
-                df.loc[df.index[-1], f"{stock}_signal"] = "Buy"
-
-        # Generate outputs
-        metrics = get_metrics(df, "long_short")
-        figures = plot_results(df, metrics)
-        
-        return metrics, figures
\ No newline at end of file
+    ) -> StrategyResult:
+        # Tickers in neither list stay flat but still count towards the average
+        sides = [
+            1 if stock in long_tickers else -1 if stock in short_tickers else 0
+            for stock in df.columns
+        ]
+        return _hold_result("long_short", df, sides)
@@ -0,0 +1,273 @@
+import contextlib
+import io
+import itertools
+import os
+import warnings
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from strategies.registry import REGISTRY, StrategyRegistry
+from strategies.sweep import ParameterSweep, shared_price_pool, shared_prices
+from utils.metrics import batch_metrics, capture_metrics, get_metrics
+from utils.trades import TradeLog
+
+Window = Tuple[int, int, int]
+
+
+def _equity_frame(returns: pd.Series) -> DataFrame:
+    frame = DataFrame({"Total_Return": returns})
+    frame["Cumulative_Return"] = (1 + frame["Total_Return"]).cumprod()
+    frame["Drawdown"] = (frame["Cumulative_Return"] / frame["Cumulative_Return"].cummax()) - 1
+    return frame
+
+
+def _run_strategy(
+    strategy: str,
+    params: Dict[str, Any],
+    start: Optional[int] = None,
+    stop: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    # Portfolio returns and (dates x tickers) positions, aligned to the slice
+    # Imported here so spawned workers register every strategy before lookup
+    import strategies  # noqa: F401
+
+    # Strategies only read their input, so windows are plain slices of the shared frame
+    df = shared_prices().iloc[start:stop]
+    try:
+        with capture_metrics():
+            with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                result = REGISTRY.get(strategy).func(df=df, **params)
+        returns = pd.Series(result.total_return, index=result.index)
+        positions = DataFrame(result.positions, index=result.index, columns=list(result.tickers))
+        return (
+            returns.reindex(df.index).to_numpy(dtype=float),
+            positions.reindex(index=df.index, columns=df.columns).to_numpy(dtype=float),
+        )
+    except Exception:
+        # A failing combination is never selected
+        return np.full(len(df), np.nan), np.full(df.shape, np.nan)
+
+
+def _run_returns(
+    strategy: str,
+    params: Dict[str, Any],
+    start: Optional[int] = None,
+    stop: Optional[int] = None,
+) -> np.ndarray:
+    return _run_strategy(strategy, params, start, stop)[0]
+
+
+def _run_positions(
+    strategy: str,
+    params: Dict[str, Any],
+    start: Optional[int] = None,
+    stop: Optional[int] = None,
+) -> np.ndarray:
+    return _run_strategy(strategy, params, start, stop)[1]
+
+
+def _scores(returns: np.ndarray, index: pd.Index, rank_by: str) -> np.ndarray:
+    # One batched metrics pass over every column; all-NaN columns score NaN
+    returns = np.asarray(returns, dtype=float).reshape(len(index), -1)
+    try:
+        table = batch_metrics(returns, index)
+        scores = pd.to_numeric(table[rank_by], errors="coerce").to_numpy(dtype=float)
+    except Exception:
+        return np.full(returns.shape[1], np.nan)
+    scores[np.isnan(returns).all(axis=0)] = np.nan
+    return scores
+
+
+def _score(returns: np.ndarray, index: pd.Index, rank_by: str) -> float:
+    return float(_scores(returns, index, rank_by)[0])
+
+
+def _best(scores: List[float], ascending: bool) -> int:
+    scores = np.asarray(scores, dtype=float)
+    if np.isnan(scores).all():
+        return 0
+    return int(np.nanargmin(scores) if ascending else np.nanargmax(scores))
+
+
+def _select_window(
+    returns: np.ndarray, index: pd.Index, rank_by: str, ascending: bool
+) -> Tuple[int, float]:
+    scores = _scores(returns, index, rank_by)
+    best = _best(scores, ascending)
+    return best, float(scores[best])
+
+
+def _fit_window(
+    strategy: str,
+    combinations: List[Dict[str, Any]],
+    window: Window,
+    rank_by: str,
+    ascending: bool,
+) -> Tuple[int, float, np.ndarray, np.ndarray]:
+    # Whatever the strategy learns from its sample is fitted on the train slice
+    # only and passed back in as arguments for the test slice
+    start, split, stop = window
+    fit = REGISTRY.get(strategy).fit
+    train = shared_prices().iloc[start:split]
+    fitted = [{**params, **fit(train, **params)} for params in combinations]
+    scores = [
+        _score(_run_returns(strategy, params, start, split), train.index, rank_by)
+        for params in fitted
+    ]
+    best = _best(scores, ascending)
+    # With the fitted arguments fixed the strategy is causal, so the train
+    # slice only warms up its indicators for the test slice
+    returns, positions = _run_strategy(strategy, fitted[best], start, stop)
+    return best, float(scores[best]), returns[split - start :], positions[split - start :]
+
+
+class WalkForward:
+    def __init__(
+        self,
+        strategy: str,
+        space: Dict[str, Any],
+        train_size: int = 252,
+        test_size: int = 63,
+        step: Optional[int] = None,
+        method: str = "grid",
+        samples: int = 100,
+        seed: Optional[int] = None,
+        workers: Optional[int] = None,
+        rank_by: str = "Sharpe Ratio",
+        ascending: bool = False,
+        registry: StrategyRegistry = REGISTRY,
+    ) -> None:
+        self._sweep = ParameterSweep(
+            strategy, space, method=method, samples=samples, seed=seed, registry=registry
+        )
+        self._spec = self._sweep.spec
+        if not self._spec.causal and self._spec.fit is None:
+            raise ValueError(
+                f"Strategy '{self._spec.name}' looks at the whole sample and has no fit "
+                "step, so it cannot be walked forward without look-ahead."
+            )
+        self.train_size = train_size
+        self.test_size = test_size
+        self.step = step or test_size
+        if self.step < self.test_size:
+            raise ValueError("step must be at least test_size so test windows do not overlap.")
+        self.workers = workers or os.cpu_count() or 1
+        self.rank_by = rank_by
+        self.ascending = ascending
+        self._equity: Optional[DataFrame] = None
+        self._windows: Optional[DataFrame] = None
+        self._trades: Optional[TradeLog] = None
+
+    def __str__(self):
+        return f"Walk-forward optimization of {self._spec.qualname}."
+
+    @property
+    def equity(self) -> DataFrame:
+        return self._equity
+
+    @property
+    def windows(self) -> DataFrame:
+        return self._windows
+
+    @property
+    def trades(self) -> TradeLog:
+        return self._trades
+
+    def split(self, length: int) -> List[Window]:
+        windows = []
+        start = 0
+        while start + self.train_size < length:
+            split = start + self.train_size
+            windows.append((start, split, min(split + self.test_size, length)))
+            start += self.step
+        if not windows:
+            raise ValueError(
+                f"Need more than {self.train_size} rows of prices for one walk-forward window."
+            )
+        return windows
+
+    def run(self, df: DataFrame) -> Dict[str, Any]:
+        combinations = self._sweep.combinations()
+        windows = self.split(len(df))
+        name = self._spec.name
+
+        workers = min(self.workers, max(len(combinations), len(windows)))
+        with shared_price_pool(df, workers) as executor:
+            if self._spec.causal:
+                # Indicators are computed once over the full history per combination
+                # and every overlapping train/test slice reuses them
+                returns = np.column_stack(
+                    list(executor.map(_run_returns, itertools.repeat(name), combinations))
+                )
+                selections = list(
+                    executor.map(
+                        _select_window,
+                        [returns[start:split] for start, split, _ in windows],
+                        [df.index[start:split] for start, split, _ in windows],
+                        itertools.repeat(self.rank_by),
+                        itertools.repeat(self.ascending),
+                    )
+                )
+                # Positions only for the combinations some window selected
+                chosen = sorted({best for best, _ in selections})
+                positions = dict(
+                    zip(
+                        chosen,
+                        executor.map(
+                            _run_positions,
+                            itertools.repeat(name),
+                            [combinations[best] for best in chosen],
+                        ),
+                    )
+                )
+                fitted = [
+                    (best, score, returns[split:stop, best], positions[best][split:stop])
+                    for (best, score), (_, split, stop) in zip(selections, windows)
+                ]
+            else:
+                fitted = list(
+                    executor.map(
+                        _fit_window,
+                        itertools.repeat(name),
+                        itertools.repeat(combinations),
+                        windows,
+                        itertools.repeat(self.rank_by),
+                        itertools.repeat(self.ascending),
+                    )
+                )
+
+        rows = []
+        out_of_sample = []
+        for (start, split, stop), (best, score, test_returns, _) in zip(windows, fitted):
+            rows.append(
+                {
+                    "Train Start": df.index[start],
+                    "Train End": df.index[split - 1],
+                    "Test Start": df.index[split],
+                    "Test End": df.index[stop - 1],
+                    **combinations[best],
+                    self.rank_by: score,
+                }
+            )
+            out_of_sample.append(pd.Series(test_returns, index=df.index[split:stop]))
+
+        self._windows = DataFrame(rows)
+        self._equity = _equity_frame(pd.concat(out_of_sample))
+        # Trades of the positions actually held out of sample, including the
+        # switch between windows' selected combinations
+        self._trades = TradeLog.from_positions(
+            np.concatenate([test_positions for *_, test_positions in fitted]),
+            self._equity.index,
+            list(df.columns),
+        )
+        return get_metrics(self._equity, f"walk_forward_{name}", self._trades)
+
+
+def walk_forward(
+    df: DataFrame, strategy: str, space: Dict[str, Any], **kwargs
+) -> Dict[str, Any]:
+    return WalkForward(strategy, space, **kwargs).run(df)
@@ -0,0 +1,116 @@
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.llm_cache import CompletionCache
+from utils.llm_helper import LLMHelper
+
+TICKERS = pd.DataFrame(
+    {"ticker": ["AAPL", "MSFT", "XOM"], "sector": ["Technology", "Technology", "Energy"]}
+)
+
+RESPONSES = {
+    "pandas_code_generate": "self._ticker_data[self._ticker_data['sector'] == 'Technology']",
+    "strategy_identifier": "long",
+    "strategy_call": "Traditional.long(self._strategy_data)",
+    "gpt_code_generate": (
+        "index = pd.bdate_range('2024-01-01', periods=30, name='Date')\n"
+        "_strategy_data = pd.DataFrame("
+        "{t: 100 + np.arange(30.0) * (i + 1) for i, t in enumerate(tickers)}, index=index)"
+    ),
+}
+
+
+def prompt_key(helper, messages):
+    system = messages[0]["content"]
+    return next(key for key in RESPONSES if helper._prompts[key]["system"] == system)
+
+
+def completion(content):
+    message = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeClient:
+    def __init__(self, helper):
+        self._helper = helper
+        self.chat = SimpleNamespace(completions=self)
+        self.calls = []
+
+    def create(self, model, messages, **options):
+        key = prompt_key(self._helper, messages)
+        self.calls.append(key)
+        return completion(RESPONSES[key])
+
+
+class FakeAsyncClient(FakeClient):
+    def __init__(self, helper, latency=0.05):
+        super().__init__(helper)
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, model, messages, **options):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            return super().create(model, messages, **options)
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture(autouse=True)
+def no_cache(tmp_path, monkeypatch):
+    cache = CompletionCache(tmp_path / "llm.sqlite", enabled=False)
+    monkeypatch.setattr(CompletionCache, "_instance", cache)
+
+
+def make_helper(use_async):
+    helper = LLMHelper("Go long tech stocks in January 2024", TICKERS, api_key="test")
+    helper.use_intent_parser = False
+    helper.use_planner = False
+    helper.use_async_pipeline = use_async
+    helper.client = FakeClient(helper)
+    helper.async_client = FakeAsyncClient(helper)
+    return helper
+
+
+def test_async_pipeline_matches_the_sequential_one():
+    sequential = make_helper(use_async=False)
+    sequential.execute_code()
+    concurrent = make_helper(use_async=True)
+    concurrent.execute_code()
+
+    assert sorted(sequential.client.calls) == sorted(concurrent.async_client.calls)
+    assert concurrent.client.calls == []
+    pd.testing.assert_frame_equal(sequential.strategy_data, concurrent.strategy_data)
+    assert list(concurrent.strategy_data.columns) == ["AAPL", "MSFT"]
+
+    expected, actual = sequential.strategy_result, concurrent.strategy_result
+    np.testing.assert_allclose(expected.returns, actual.returns)
+    np.testing.assert_allclose(expected.total_return, actual.total_return)
+
+
+def test_independent_calls_overlap():
+    helper = make_helper(use_async=True)
+    helper.execute_code()
+    assert helper.async_client.max_in_flight == 2
+    for stage in ("pandas_code_generate", "strategy_identify", "strategy_call_generate"):
+        assert helper.stage_timings[stage] >= helper.async_client.latency
+
+
+def test_unknown_strategy_stops_before_loading_prices():
+    helper = make_helper(use_async=True)
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setitem(RESPONSES, "strategy_identifier", "other")
+        with pytest.raises(ValueError, match="Strategy not found"):
+            helper.execute_code()
+    assert "gpt_code_generate" not in helper.async_client.calls
@@ -0,0 +1,155 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+import pytest
+
+from utils.code_cache import SNIPPET_BUILTINS, CodeValidationError, compile_snippet
+
+NAMESPACE = {
+    "pd": pd,
+    "self": None,
+    "df": None,
+    "load_prices": None,
+    "tickers": None,
+    "__builtins__": SNIPPET_BUILTINS,
+}
+
+
+def run(source, attributes=()):
+    namespace = dict(NAMESPACE)
+    exec(compile_snippet(source, namespace, "test snippet", attributes), namespace)
+    return namespace
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        # Submodules of pandas reach os and the rest of the standard library
+        "result = pd.io.common.os.getcwd()",
+        "result = pd.io.common.os.system('true')",
+        "result = pd.io.common.os.mean",
+        "result = pd.core.frame",
+        # Unpickling runs arbitrary code, and writers touch the file system
+        "result = pd.read_pickle('payload.pkl')",
+        "result = pd.read_csv('/etc/passwd')",
+        "df.to_pickle('out.pkl')",
+        "df.to_csv('out.csv')",
+        # String evaluation escapes the validator
+        "result = pd.eval('1 + 1')",
+        "result = df.query('a > 1')",
+        # Dunder walks to object.__subclasses__
+        "result = pd.DataFrame.__class__",
+        "result = ().__class__.__base__.__subclasses__()",
+        # Attributes outside the allow-list
+        "result = df.mro()",
+        "result = pd.util.hash_pandas_object(df)",
+    ],
+)
+def test_rejects_attribute_escapes(source):
+    with pytest.raises(CodeValidationError):
+        compile_snippet(source, NAMESPACE)
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        # Writers named as strings are looked up by agg/apply/transform/pipe
+        "result = pd.DataFrame({'a': [1]}).agg('to_csv', path_or_buf='x.csv')",
+        "result = pd.Series([1]).agg('to_csv', path_or_buf='x.csv')",
+        "result = pd.DataFrame({'a': [1]}).apply('to_pickle', path='x.pkl')",
+        "result = df.aggregate(['sum', 'to_csv'], path_or_buf='x.csv')",
+        "result = df.agg({'a': 'to_pickle'}, path='x.pkl')",
+        "result = df.agg(func='to_csv', path_or_buf='x.csv')",
+        "result = df.transform('to_json', path_or_buf='x.json')",
+        "result = df.pipe('to_parquet', 'x.parquet')",
+        "result = df.groupby('a').agg('__class__')",
+    ],
+)
+def test_rejects_methods_named_by_string(source):
+    with pytest.raises(CodeValidationError):
+        compile_snippet(source, NAMESPACE)
+
+
+def test_accepts_safe_methods_named_by_string():
+    result = run(
+        "df = pd.DataFrame({'a': [1, 2], 'b': ['x', 'y']})\n"
+        "total = df['a'].agg('sum')\n"
+        "stats = df[['a']].agg(['min', 'max'])\n"
+        "labels = df['b'].map({'x': 'Tech', 'y': 'Energy'})"
+    )
+    assert result["total"] == 3
+    assert result["stats"]["a"].tolist() == [1, 2]
+    assert result["labels"].tolist() == ["Tech", "Energy"]
+
+
+def test_executes_with_restricted_builtins():
+    # Names the validator is given still cannot reach builtins it left out
+    namespace = dict(NAMESPACE, open=None)
+    code = compile_snippet("result = len([1, 2])", namespace)
+    exec(code, namespace)
+    assert namespace["result"] == 2
+    assert "open" not in SNIPPET_BUILTINS and "eval" not in SNIPPET_BUILTINS
+    with pytest.raises(ImportError):
+        SNIPPET_BUILTINS["__import__"]("os")
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "for _ in range(10**12):\n    pass",
+        "result = [i for i in range(2, 10**9)]",
+        "result = sum(range(1 << 40))",
+        "result = list(range(10**10**10))",
+    ],
+)
+def test_rejects_large_range_literals(source):
+    with pytest.raises(CodeValidationError, match="too large"):
+        compile_snippet(source, NAMESPACE)
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "result = (lambda: 1)()",
+        "result = [print][0]('x')",
+    ],
+)
+def test_rejects_calls_on_expressions(source):
+    with pytest.raises(CodeValidationError):
+        compile_snippet(source, NAMESPACE)
+
+
+def test_rejects_unknown_names_and_imports():
+    with pytest.raises(CodeValidationError):
+        compile_snippet("result = open('/etc/passwd')", NAMESPACE)
+    with pytest.raises(CodeValidationError):
+        compile_snippet("import os", NAMESPACE)
+    with pytest.raises(CodeValidationError):
+        compile_snippet("result = self._private", NAMESPACE)
+
+
+def test_caller_attributes_are_scoped_to_the_call():
+    source = "result = self._ticker_data"
+    compile_snippet(source, NAMESPACE, "test snippet", {"_ticker_data"})
+    with pytest.raises(CodeValidationError):
+        compile_snippet(source, NAMESPACE, "test snippet")
+
+
+def test_accepts_generated_snippets():
+    ticker_data = pd.DataFrame(
+        {"ticker": ["AAA", "BBB", "CCC"], "sector": ["Tech", "Energy", "Tech"], "beta": [1.5, 0.5, 2.0]}
+    )
+    universe = type("Helper", (), {"_ticker_data": ticker_data})()
+    namespace = dict(NAMESPACE, self=universe)
+    source = (
+        "result = self._ticker_data[(self._ticker_data['sector'] == 'Tech') "
+        "& (self._ticker_data.beta > 1) & self._ticker_data['ticker'].str.startswith('A')]"
+    )
+    exec(compile_snippet(source, namespace, "pandas code", {"_ticker_data", "beta"}), namespace)
+    assert namespace["result"]["ticker"].tolist() == ["AAA"]
+
+    result = run("dates = pd.to_datetime(['2020-01-01', '2021-01-01'])\nresult = [i * 2 for i in range(10)]")
+    assert result["result"][-1] == 18
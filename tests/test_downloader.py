@@ -0,0 +1,129 @@
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+import pytest
+
+from utils.downloader import BulkDownloader, PartialDownloadError, TokenBucket
+
+START = pd.Timestamp("2024-01-01")
+END = pd.Timestamp("2024-02-01")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def frame(ticker):
+    index = pd.bdate_range(START, END, inclusive="left")
+    return pd.DataFrame({"Close": float(len(ticker))}, index=index)
+
+
+class FakeDownload:
+    def __init__(self, failures=None, empty=()):
+        # ticker -> number of attempts that fail before it succeeds
+        self.failures = dict(failures or {})
+        self.empty = set(empty)
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def __call__(self, tickers, start, end, interval, throttle):
+        frames, errors = {}, {}
+        for ticker in tickers:
+            throttle()
+            with self._lock:
+                self.requests.append(ticker)
+                if self.failures.get(ticker, 0) > 0:
+                    self.failures[ticker] -= 1
+                    errors[ticker] = "HTTP 429"
+                    continue
+            if ticker not in self.empty:
+                frames[ticker] = frame(ticker)
+        if errors:
+            raise PartialDownloadError(frames, errors)
+        return frames
+
+
+def test_token_bucket_allows_a_burst_then_paces():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, capacity=3, clock=clock, sleep=clock.sleep)
+    delays = [bucket.acquire() for _ in range(5)]
+    assert delays[:3] == [0.0, 0.0, 0.0]
+    # Past the burst every call waits one token's worth of time
+    assert delays[3:] == [pytest.approx(0.5), pytest.approx(0.5)]
+    assert clock.now == pytest.approx(1.0)
+
+
+def test_token_bucket_refills_up_to_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1.0, capacity=2, clock=clock, sleep=clock.sleep)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 100
+    assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(1.0)
+
+
+def test_fetch_collects_frames_and_empty_tickers():
+    download = FakeDownload(empty={"ZZZ"})
+    downloader = BulkDownloader(download, chunk_size=2, rate=1000, sleep=lambda s: None)
+    tickers = ["AAPL", "MSFT", "ZZZ", "GOOG", "AAPL"]
+    df, report = downloader.download(tickers, START, END)
+
+    assert sorted(download.requests) == ["AAPL", "GOOG", "MSFT", "ZZZ"]
+    assert list(df.columns) == ["AAPL", "MSFT", "GOOG"]
+    assert report.empty == ["ZZZ"]
+    assert report.failed == {}
+    assert report.requests == 4 and report.retries == 0
+
+
+def test_only_failed_tickers_are_retried():
+    sleeps = []
+    download = FakeDownload(failures={"MSFT": 2})
+    downloader = BulkDownloader(
+        download, chunk_size=3, rate=1000, backoff=1.0, sleep=sleeps.append
+    )
+    report = downloader.fetch(["AAPL", "MSFT", "GOOG"], START, END, "1d")
+
+    assert download.requests.count("AAPL") == 1
+    assert download.requests.count("MSFT") == 3
+    assert report.retries == 2
+    assert sorted(report.succeeded) == ["AAPL", "GOOG", "MSFT"]
+    # Exponential backoff with up to 100% jitter
+    backoffs = [s for s in sleeps if s >= 1.0]
+    assert 1.0 <= backoffs[0] <= 2.0 and 2.0 <= backoffs[1] <= 4.0
+
+
+def test_tickers_fail_after_max_retries():
+    download = FakeDownload(failures={"BAD": 10})
+    downloader = BulkDownloader(
+        download, rate=1000, max_retries=2, backoff=0.0, sleep=lambda s: None
+    )
+    report = downloader.fetch(["AAPL", "BAD"], START, END, "1d")
+    assert report.failed == {"BAD": "HTTP 429"}
+    assert download.requests.count("BAD") == 3
+    assert report.empty == []
+
+
+def test_limiter_is_charged_per_upstream_request():
+    sleeps = []
+    download = FakeDownload()
+    downloader = BulkDownloader(
+        download, chunk_size=10, max_workers=1, rate=2.0, burst=1, sleep=sleeps.append
+    )
+    downloader.fetch([f"T{i}" for i in range(5)], START, END, "1d")
+    # One chunk, but five requests: the bucket must have gone into debt
+    assert len(download.requests) == 5
+    assert sum(sleeps) >= 1.5
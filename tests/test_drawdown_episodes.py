@@ -0,0 +1,111 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.technical import TechnicalAnalysis
+from utils.metrics import capture_metrics, drawdown_episodes
+
+
+def reference_episodes(equity, index, name):
+    # A bar-by-bar walk over one equity curve
+    rows = []
+    peak = -np.inf
+    episode = None
+    for i, value in enumerate(equity):
+        peak = max(peak, value)
+        drawdown = value / peak - 1
+        if drawdown < 0:
+            if episode is None:
+                episode = {"series": name, "start": i, "trough": i, "depth": drawdown}
+            elif drawdown < episode["depth"]:
+                episode["trough"], episode["depth"] = i, drawdown
+        elif episode is not None:
+            episode["recovery"] = i
+            rows.append(episode)
+            episode = None
+    if episode is not None:
+        episode["recovery"] = None
+        rows.append(episode)
+
+    table = []
+    for row in rows:
+        recovered = row["recovery"] is not None
+        end = row["recovery"] if recovered else len(equity) - 1
+        recovery = index[row["recovery"]] if recovered else pd.NaT
+        table.append(
+            {
+                "series": row["series"],
+                "start": index[row["start"]],
+                "trough": index[row["trough"]],
+                "recovery": recovery,
+                "depth": row["depth"],
+                "bars": (row["recovery"] if recovered else len(equity)) - row["start"],
+                "length": index[end] - index[row["start"]],
+                "time_to_recover": recovery - index[row["trough"]],
+            }
+        )
+    return table
+
+
+def make_equity(seed=0, dates=300, series=4):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0003, 0.015, size=(dates, series))
+    # One curve ends under water, one never falls
+    returns[-30:, 0] = -np.abs(returns[-30:, 0])
+    returns[:, 1] = np.abs(returns[:, 1])
+    return np.cumprod(1 + returns, axis=0)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_episodes_match_a_bar_by_bar_walk(seed):
+    equity = make_equity(seed)
+    index = pd.bdate_range("2020-01-01", periods=len(equity), name="Date")
+    names = ["W", "X", "Y", "Z"]
+    table = drawdown_episodes(equity, index, names)
+
+    expected = []
+    for k, name in enumerate(names):
+        expected += reference_episodes(equity[:, k], index, name)
+    expected = pd.DataFrame(expected, columns=table.columns)
+    pd.testing.assert_frame_equal(table, expected, check_dtype=False)
+
+    # The open episode is the last one of the first curve, and the rising
+    # curve has none
+    last = table[table["series"] == "W"].iloc[-1]
+    assert pd.isna(last["recovery"]) and pd.isna(last["time_to_recover"])
+    assert "X" not in set(table["series"])
+
+
+def test_episodes_start_on_the_first_bar_below_a_peak():
+    equity = np.array([1.0, 1.1, 1.0, 0.9, 1.1, 1.2, 1.15, 1.2, 1.19])
+    index = pd.bdate_range("2024-01-01", periods=len(equity))
+    table = drawdown_episodes(equity, index, ["s"])
+    assert list(table["start"]) == [index[2], index[6], index[8]]
+    assert list(table["trough"]) == [index[3], index[6], index[8]]
+    assert list(table["bars"]) == [2, 1, 1]
+    np.testing.assert_allclose(table["depth"], [0.9 / 1.1 - 1, 1.15 / 1.2 - 1, 1.19 / 1.2 - 1])
+    assert table["recovery"].iloc[:2].tolist() == [index[4], index[7]]
+    assert pd.isna(table["recovery"].iloc[2])
+
+
+def test_episodes_agree_with_the_metrics_durations():
+    rng = np.random.default_rng(5)
+    index = pd.bdate_range("2020-01-01", periods=250, name="Date")
+    df = pd.DataFrame(
+        100 * np.exp(np.cumsum(rng.normal(0, 0.02, size=(250, 2)), axis=0)),
+        index=index,
+        columns=["A", "B"],
+    )
+    with capture_metrics():
+        result = TechnicalAnalysis.momentum(df=df)
+    episodes = result.episodes()
+    assert episodes["length"].max() == result.metrics["Max. Drawdown Duration"]
+    assert episodes["length"].mean() == result.metrics["Avg. Drawdown Duration"]
+    assert episodes["depth"].min() * 100 == pytest.approx(
+        result.metrics["Max. Drawdown [%]"], abs=0.005
+    )
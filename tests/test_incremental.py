@@ -0,0 +1,120 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.incremental import (
+    EMA,
+    MACD,
+    BollingerBands,
+    CumulativeMax,
+    PctChange,
+    RollingStats,
+    ZScore,
+)
+
+
+def make_prices(seed=0, dates=400, tickers=3, gaps=True):
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0.0003, 0.02, size=(dates, tickers))
+    df = pd.DataFrame(100 * np.exp(np.cumsum(steps, axis=0)))
+    if gaps:
+        df.iloc[:30, 2] = np.nan
+        df.iloc[200:205, 1] = np.nan
+        df.iloc[300, 0] = np.nan
+    return df
+
+
+def stream(indicator, df, read):
+    # Feeds one bar at a time and stacks what `read` takes from the indicator
+    return np.array([read(indicator.update(row)) for row in df.to_numpy()])
+
+
+def test_pct_change():
+    df = make_prices()
+    expected = df.ffill().pct_change(fill_method=None)
+    # What pct_change() computes with its default padding of missing prices
+    np.testing.assert_allclose(stream(PctChange(), df, lambda i: i.value), expected)
+
+
+@pytest.mark.parametrize("window", [1, 2, 5, 20, 63])
+def test_rolling_stats(window):
+    df = make_prices()
+    stats = RollingStats(window)
+    mean, std = [], []
+    for row in df.to_numpy():
+        stats.update(row)
+        mean.append(stats.mean)
+        std.append(stats.std)
+    np.testing.assert_allclose(mean, df.rolling(window).mean(), rtol=1e-9)
+    np.testing.assert_allclose(std, df.rolling(window).std(), rtol=1e-6)
+
+
+def test_rolling_stats_of_a_constant_window():
+    values = pd.Series([1.0, 2.0, 3.0, 3.0, 3.0, 3.0, 4.0])
+    stats = RollingStats(3)
+    result = [(float(stats.update(v).mean), float(stats.std)) for v in values]
+    expected = zip(values.rolling(3).mean(), values.rolling(3).std())
+    for (mean, std), (mean_ref, std_ref) in zip(result, expected):
+        assert mean == pytest.approx(mean_ref, nan_ok=True)
+        assert std == pytest.approx(std_ref, nan_ok=True)
+    # Exactly zero, as pandas reports it, not a rounding residue
+    assert result[4][1] == 0.0
+
+
+@pytest.mark.parametrize("span", [3, 12, 26])
+def test_ema(span):
+    df = make_prices()
+    expected = df.ewm(span=span, adjust=False).mean()
+    np.testing.assert_allclose(stream(EMA(span), df, lambda i: i.value), expected, rtol=1e-12)
+
+
+def test_macd():
+    df = make_prices(gaps=False)
+    macd = MACD(12, 26, 9)
+    line, signal = [], []
+    for row in df.to_numpy():
+        macd.update(row)
+        line.append(macd.line)
+        signal.append(macd.signal)
+    expected = df.ewm(span=12, adjust=False).mean() - df.ewm(span=26, adjust=False).mean()
+    np.testing.assert_allclose(line, expected, rtol=1e-9)
+    np.testing.assert_allclose(signal, expected.rolling(9).mean(), rtol=1e-9, atol=1e-12)
+
+
+def test_bollinger_bands():
+    df = make_prices()
+    upper = stream(BollingerBands(20, 2), df, lambda i: i.upper)
+    lower = stream(BollingerBands(20, 2), df, lambda i: i.lower)
+    mean, std = df.rolling(20).mean(), df.rolling(20).std()
+    np.testing.assert_allclose(upper, mean + 2 * std, rtol=1e-9)
+    np.testing.assert_allclose(lower, mean - 2 * std, rtol=1e-9)
+
+
+def test_zscore():
+    spread = np.log(make_prices(gaps=False))
+    expected = (spread - spread.rolling(50).mean()) / spread.rolling(20).std()
+    np.testing.assert_allclose(
+        stream(ZScore(50, 20), spread, lambda i: i.value), expected, rtol=1e-6
+    )
+
+
+def test_cumulative_max_and_drawdown():
+    df = make_prices()
+    peak = stream(CumulativeMax(), df, lambda i: i.value)
+    drawdown = stream(CumulativeMax(), df, lambda i: i.drawdown)
+    np.testing.assert_allclose(peak, df.cummax())
+    np.testing.assert_allclose(drawdown, df / df.cummax() - 1)
+
+
+def test_scalar_updates():
+    values = make_prices(tickers=1, gaps=False)[0]
+    ema = EMA(10)
+    for value in values:
+        ema.update(value)
+    assert np.ndim(ema.value) == 0
+    assert float(ema.value) == pytest.approx(values.ewm(span=10, adjust=False).mean().iloc[-1])
@@ -0,0 +1,147 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies import kernels
+from strategies.indicator_cache import IndicatorCache
+from strategies.technical import TechnicalAnalysis
+from utils.plot import defer_plots
+
+
+def make_prices(seed=0, dates=250, tickers=4):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2020-01-01", periods=dates, name="Date")
+    steps = rng.normal(0.0005, 0.02, size=(dates, tickers))
+    return pd.DataFrame(
+        100 * np.exp(np.cumsum(steps, axis=0)),
+        index=index,
+        columns=[f"T{i}" for i in range(tickers)],
+    )
+
+
+def counting(compute):
+    # Wraps a compute callback and records which column positions it was asked for
+    calls = []
+
+    def wrapper(columns):
+        calls.append(list(columns))
+        return compute(columns)
+
+    return wrapper, calls
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    IndicatorCache.instance().clear()
+
+
+@pytest.mark.parametrize(
+    "strategy, params",
+    [
+        ("momentum", {"window": 5}),
+        ("momentum", {"window": 20}),
+        ("macd_trend_following", {}),
+        ("mean_reversion_moving_average", {}),
+        ("mean_reversion_bollinger_bands", {"window": 10, "num_std": 1}),
+    ],
+)
+def test_cached_results_match_uncached_ones(strategy, params):
+    df = make_prices()
+    cache = IndicatorCache.instance()
+    run = getattr(TechnicalAnalysis, strategy)
+    with defer_plots():
+        cache.enabled = False
+        try:
+            expected = run(df=df, **params)
+        finally:
+            cache.enabled = True
+        cold = run(df=df, **params)
+        warm = run(df=df, **params)
+        # A shuffled universe reuses columns cached under the old order
+        shuffled = run(df=df[df.columns[::-1]], **params)
+
+    # Cached columns may be summed in a different order than a fresh block
+    for result in (cold, warm):
+        np.testing.assert_allclose(result.positions, expected.positions, rtol=1e-12)
+        np.testing.assert_allclose(result.total_return, expected.total_return, rtol=1e-12)
+    np.testing.assert_allclose(
+        shuffled.positions[:, ::-1], expected.positions, rtol=1e-12
+    )
+
+
+def test_only_unseen_columns_are_computed():
+    cache = IndicatorCache(max_bytes=10**9, spill=False, enabled=True)
+    df = make_prices()
+    prices = df.to_numpy()
+    compute, calls = counting(lambda columns: kernels.rolling_mean(prices[:, columns], 5))
+
+    first = cache.view(df[["T0", "T1"]]).get("mean", (5,), compute)
+    second = cache.view(df).get("mean", (5,), compute)
+    assert calls == [[0, 1], [2, 3]]
+    np.testing.assert_array_equal(second[:, :2], first)
+    np.testing.assert_allclose(second, kernels.rolling_mean(prices, 5))
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 4
+
+    # Other parameters, other dates or other prices are different columns
+    cache.view(df).get("mean", (6,), compute)
+    cache.view(df.iloc[1:]).get("mean", (5,), compute)
+    cache.view(df * 2).get("mean", (5,), compute)
+    assert calls[2:] == [[0, 1, 2, 3]] * 3
+
+
+def test_least_recently_used_columns_are_evicted():
+    df = make_prices(dates=100, tickers=1)
+    column_bytes = 100 * 8
+    cache = IndicatorCache(max_bytes=2 * column_bytes, spill=False, enabled=True)
+    view = cache.view(df)
+    compute, calls = counting(lambda columns: np.ones((100, len(columns))))
+
+    view.get("a", (), compute)
+    view.get("b", (), compute)
+    view.get("a", (), compute)
+    view.get("c", (), compute)
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 2 * column_bytes
+    # "b" was the least recently used, "a" survived its refresh
+    calls.clear()
+    view.get("a", (), compute)
+    view.get("b", (), compute)
+    assert len(calls) == 1
+
+
+def test_cached_columns_are_read_only():
+    cache = IndicatorCache(spill=False, enabled=True)
+    df = make_prices(tickers=1)
+    column = np.arange(len(df), dtype=float)
+    cache.view(df).get("x", (), lambda columns: column[:, None].copy())
+    key = next(iter(cache._columns))
+    with pytest.raises(ValueError):
+        cache.get(key)[0] = 1.0
+    # The caller's block stays writable
+    result = cache.view(df).get("x", (), lambda columns: column[:, None])
+    result[0, 0] = 1.0
+    assert cache.get(key)[0] == 0.0
+
+
+def test_disabled_cache_has_no_view():
+    assert IndicatorCache(spill=False, enabled=False).view(make_prices()) is None
+
+
+def test_evicted_columns_spill_to_disk(tmp_path):
+    df = make_prices(dates=100, tickers=1)
+    cache = IndicatorCache(tmp_path, max_bytes=100 * 8, spill=True, enabled=True)
+    view = cache.view(df)
+    compute, calls = counting(lambda columns: np.full((100, len(columns)), len(calls)))
+
+    first = view.get("a", (), compute).copy()
+    view.get("b", (), compute)
+    assert len(list(tmp_path.glob("*.npy"))) == 1
+    # Read back from disk rather than recomputed
+    np.testing.assert_array_equal(view.get("a", (), compute), first)
+    assert len(calls) == 2
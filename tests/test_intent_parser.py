@@ -0,0 +1,105 @@
+import sys
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+import pytest
+
+from utils.intent_parser import IntentParser
+
+TICKERS = pd.DataFrame(
+    {
+        "ticker": ["AAPL", "MSFT", "XOM", "KO", "BRK.B"],
+        "sector": ["Technology", "Technology", "Energy", "Consumer Staples", "Financials"],
+    }
+)
+
+
+@pytest.fixture
+def parser():
+    return IntentParser(TICKERS, today=date(2024, 6, 15))
+
+
+def tickers(plan):
+    (predicate,) = plan.filters
+    assert (predicate.column, predicate.op) == ("ticker", "in")
+    return predicate.value
+
+
+@pytest.mark.parametrize(
+    "query, strategy, start, end",
+    [
+        ("Go long AAPL over the past year", "long", "2023-06-15", "2024-06-15"),
+        ("short MSFT since 2023-03-01", "short", "2023-03-01", "2024-06-15"),
+        ("momentum AAPL in 2022", "momentum", "2022-01-01", "2023-01-01"),
+        ("MACD on XOM ytd", "macd_trend_following", "2024-01-01", "2024-06-15"),
+        (
+            "bollinger bands KO from 2021 to 2022",
+            "mean_reversion_bollinger_bands",
+            "2021-01-01",
+            "2023-01-01",
+        ),
+        (
+            "mean reversion AAPL between 2023-01-01 and 2023-12-31",
+            "mean_reversion_moving_average",
+            "2023-01-01",
+            "2024-01-01",
+        ),
+        ("Backtest long AAPL for the last 3 months.", "long", "2024-03-15", "2024-06-15"),
+    ],
+)
+def test_parses_strategy_and_dates(parser, query, strategy, start, end):
+    plan = parser.parse(query)
+    assert plan is not None
+    assert (plan.strategy, plan.start_date, plan.end_date) == (strategy, start, end)
+
+
+def test_collects_tickers_in_order(parser):
+    plan = parser.parse("pairs trading $aapl and MSFT since 2023")
+    assert plan.strategy == "pairs_trading"
+    assert tickers(plan) == ["AAPL", "MSFT"]
+
+
+def test_long_short_splits_the_sides(parser):
+    plan = parser.parse("long AAPL MSFT short XOM over the past year")
+    assert plan.strategy == "long_short"
+    assert tickers(plan) == ["AAPL", "MSFT", "XOM"]
+    assert plan.arguments == {"long_tickers": ["AAPL", "MSFT"], "short_tickers": ["XOM"]}
+
+
+def test_parses_numeric_arguments(parser):
+    plan = parser.parse("10-day momentum on AAPL in 2023")
+    assert plan.arguments == {"window": 10}
+
+    plan = parser.parse("bollinger KO window 30 num std 3 in 2023")
+    assert plan.arguments == {"window": 30, "num_std": 3}
+
+    plan = parser.parse("pairs AAPL MSFT entry threshold 2.5 in 2023")
+    assert plan.arguments == {"entry_threshold": 2.5}
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        # No date range
+        "long AAPL",
+        # Unknown ticker
+        "long TSLA over the past year",
+        # Unrecognized words need the LLM
+        "long the cheapest energy stocks over the past year",
+        "long AAPL when RSI is below 30 over the past year",
+        # Ambiguous or missing strategy
+        "momentum and macd AAPL in 2023",
+        "AAPL in 2023",
+        # Lower-case words are not tickers unless marked with $
+        "long ko in 2023",
+        # Argument does not fit the signature
+        "momentum AAPL window 2.5 in 2023",
+        # Range lies in the future
+        "long AAPL in 2025",
+    ],
+)
+def test_falls_back_to_the_llm(parser, query):
+    assert parser.parse(query) is None
@@ -0,0 +1,159 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies import kernels
+from strategies.indicator_cache import IndicatorCache
+from strategies.technical import TechnicalAnalysis
+from utils.plot import defer_plots
+
+
+def make_prices(seed=0, dates=300, tickers=4):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2020-01-01", periods=dates, name="Date")
+    steps = rng.normal(0.0005, 0.02, size=(dates, tickers))
+    prices = pd.DataFrame(
+        100 * np.exp(np.cumsum(steps, axis=0)),
+        index=index,
+        columns=[f"T{i}" for i in range(tickers)],
+    )
+    # A late listing: leading NaNs must not leak into the other columns
+    prices.iloc[:40, -1] = np.nan
+    return prices
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    IndicatorCache.instance().clear()
+
+
+# Per-column references, the pandas code the kernels replaced
+
+
+def reference_momentum(df, window=5):
+    positions, returns = {}, {}
+    for stock in df.columns:
+        ret = df[stock].pct_change()
+        momentum = ret.rolling(window=window).mean()
+        positions[stock] = np.where(momentum.isna(), 0, np.where(momentum > 0, 1, -1))
+        returns[stock] = pd.Series(positions[stock], index=df.index).shift(1) * ret
+    return pd.DataFrame(positions, index=df.index), pd.DataFrame(returns)
+
+
+def reference_macd(df, fast_window=12, slow_window=26, signal_window=9):
+    positions, returns = {}, {}
+    for stock in df.columns:
+        ret = df[stock].pct_change()
+        line = (
+            df[stock].ewm(span=fast_window, adjust=False).mean()
+            - df[stock].ewm(span=slow_window, adjust=False).mean()
+        )
+        signal = line.rolling(window=signal_window).mean()
+        position = np.where(
+            line.isna(),
+            np.nan,
+            np.where(line > signal, 1, np.where(line < signal, -1, np.nan)),
+        )
+        positions[stock] = pd.Series(position, index=df.index).ffill()
+        returns[stock] = positions[stock].shift(1) * ret
+    return pd.DataFrame(positions), pd.DataFrame(returns)
+
+
+def reference_moving_average(df):
+    positions, returns = {}, {}
+    for stock in df.columns:
+        ret = df[stock].pct_change()
+        ratio = df[stock] / df[stock].rolling(window=20).mean()
+        long, short = ratio.dropna().quantile([0.5, 0.95])
+        position = pd.Series(np.nan, index=df.index)
+        position[ratio > short] = -1
+        position[ratio < long] = 1
+        positions[stock] = position.ffill()
+        returns[stock] = positions[stock].shift() * ret
+    return pd.DataFrame(positions), pd.DataFrame(returns)
+
+
+def reference_bollinger(df, window=20, num_std=2):
+    positions, returns = {}, {}
+    for stock in df.columns:
+        ret = df[stock].pct_change()
+        ma = df[stock].rolling(window=window).mean()
+        std = df[stock].rolling(window=window).std()
+        upper, lower = ma + num_std * std, ma - num_std * std
+        position = np.where(
+            df[stock].isna(),
+            np.nan,
+            np.where(df[stock] > upper, -1, np.where(df[stock] < lower, 1, np.nan)),
+        )
+        positions[stock] = pd.Series(position, index=df.index).ffill()
+        returns[stock] = positions[stock].shift(1) * ret
+    return pd.DataFrame(positions), pd.DataFrame(returns)
+
+
+CASES = [
+    ("momentum", {}, reference_momentum),
+    ("momentum", {"window": 12}, reference_momentum),
+    ("macd_trend_following", {}, reference_macd),
+    ("macd_trend_following", {"fast_window": 5, "slow_window": 20}, reference_macd),
+    ("mean_reversion_moving_average", {}, reference_moving_average),
+    ("mean_reversion_bollinger_bands", {}, reference_bollinger),
+    ("mean_reversion_bollinger_bands", {"window": 10, "num_std": 1}, reference_bollinger),
+]
+
+
+@pytest.mark.parametrize("name, params, reference", CASES)
+def test_strategies_match_the_per_column_code(name, params, reference):
+    df = make_prices()
+    original = df.copy()
+    with defer_plots():
+        result = getattr(TechnicalAnalysis, name)(df=df, **params)
+
+    positions, returns = reference(original, **params)
+    np.testing.assert_allclose(result.positions, positions.to_numpy(dtype=float), atol=1e-12)
+    np.testing.assert_allclose(result.returns, returns.to_numpy(dtype=float), atol=1e-12)
+    np.testing.assert_allclose(result.total_return, returns.mean(axis=1), atol=1e-12)
+    # Strategies no longer write their columns into the caller's frame
+    pd.testing.assert_frame_equal(df, original)
+
+
+def test_primitives_match_pandas():
+    df = make_prices(seed=1)
+    df.iloc[100:103, 1] = np.nan
+    values = df.to_numpy()
+
+    np.testing.assert_array_equal(kernels.forward_fill(values), df.ffill().to_numpy())
+    np.testing.assert_array_equal(kernels.shift(values, 3), df.shift(3).to_numpy())
+    np.testing.assert_allclose(
+        kernels.pct_change(values), df.ffill().pct_change(fill_method=None).to_numpy()
+    )
+    for window in (1, 5, 20):
+        np.testing.assert_allclose(
+            kernels.rolling_mean(values, window), df.rolling(window).mean().to_numpy()
+        )
+    # pandas updates the variance online and drifts in the last digits; the
+    # kernel takes each window's std directly
+    for window in (2, 20):
+        np.testing.assert_allclose(
+            kernels.rolling_std(values, window),
+            df.rolling(window).std().to_numpy(),
+            rtol=1e-6,
+        )
+    clean = make_prices(seed=2).iloc[:, :3]
+    for span in (3, 12, 26):
+        np.testing.assert_allclose(
+            kernels.ewm_mean(clean.to_numpy(), span),
+            clean.ewm(span=span, adjust=False).mean().to_numpy(),
+        )
+
+
+def test_windows_longer_than_the_data():
+    values = make_prices(dates=5).to_numpy()
+    assert np.isnan(kernels.rolling_mean(values, 10)).all()
+    assert np.isnan(kernels.rolling_std(values, 10)).all()
+    assert np.isnan(kernels.shift(values, 10)).all()
+
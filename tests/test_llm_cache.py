@@ -0,0 +1,84 @@
+import sys
+from itertools import count
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest
+
+import utils.llm_cache
+from utils.llm_cache import CompletionCache
+
+MESSAGES = [{"role": "user", "content": "Backtest AAPL"}]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    # Strictly increasing access times so LRU order never depends on clock resolution
+    ticks = count()
+    clock = SimpleNamespace(time=lambda: float(next(ticks)))
+    monkeypatch.setattr(utils.llm_cache, "time", clock)
+    return CompletionCache(tmp_path / "llm.sqlite", max_bytes=30, enabled=True)
+
+
+def test_key_depends_on_every_input():
+    key = CompletionCache.make_key("gpt", "plan", MESSAGES, "1")
+    assert key == CompletionCache.make_key("gpt", "plan", list(MESSAGES), "1")
+    assert key != CompletionCache.make_key("gpt-mini", "plan", MESSAGES, "1")
+    assert key != CompletionCache.make_key("gpt", "code", MESSAGES, "1")
+    assert key != CompletionCache.make_key("gpt", "plan", MESSAGES, "2")
+    assert key != CompletionCache.make_key(
+        "gpt", "plan", [{"role": "user", "content": "Backtest MSFT"}], "1"
+    )
+
+
+def test_round_trip_and_counters(cache):
+    assert cache.get("a") is None
+    cache.put("a", "response")
+    assert cache.get("a") == "response"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["bytes"] == len("response")
+
+
+def test_evicts_least_recently_used(cache):
+    cache.put("a", "x" * 10)
+    cache.put("b", "x" * 10)
+    cache.put("c", "x" * 10)
+    # Reading "a" makes "b" the oldest entry
+    assert cache.get("a") is not None
+    cache.put("d", "x" * 10)
+
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in "acd")
+    assert cache.evictions == 1
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_oversized_response_evicts_down_to_the_limit(cache):
+    cache.put("a", "x" * 10)
+    cache.put("b", "x" * 25)
+    assert cache.get("a") is None
+    assert cache.get("b") == "x" * 25
+    assert cache.stats()["bytes"] == 25
+
+
+def test_replacing_a_key_does_not_double_count(cache):
+    cache.put("a", "x" * 20)
+    cache.put("a", "y" * 20)
+    assert cache.stats()["entries"] == 1
+    assert cache.evictions == 0
+    assert cache.get("a") == "y" * 20
+
+
+def test_disabled_cache_is_a_no_op(tmp_path):
+    cache = CompletionCache(tmp_path / "llm.sqlite", enabled=False)
+    cache.put("a", "response")
+    assert cache.get("a") is None
+    assert not (tmp_path / "llm.sqlite").exists()
+
+
+def test_entries_persist_across_instances(tmp_path):
+    CompletionCache(tmp_path / "llm.sqlite", enabled=True).put("a", "response")
+    assert CompletionCache(tmp_path / "llm.sqlite", enabled=True).get("a") == "response"
@@ -0,0 +1,135 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.metrics import batch_metrics, get_metrics
+
+
+def reference_metrics(df, strategy):
+    # The per-column pandas get_metrics that batch_metrics replaced, minus its print
+    metrics = {}
+    metrics["Start"] = df.index.min()
+    metrics["End"] = df.index.max()
+    metrics["Duration"] = metrics["End"] - metrics["Start"]
+    metrics["Exposure Time [%]"] = round((df["Total_Return"].count() / len(df)) * 100, 2)
+    metrics["Equity Initial [$]"] = 10000
+    metrics["Equity Final [$]"] = round(df["Cumulative_Return"].iloc[-1] * 10000, 2)
+    metrics["Equity Peak [$]"] = round(df["Cumulative_Return"].max() * 10000, 2)
+    metrics["Return [%]"] = round((df["Cumulative_Return"].iloc[-1] - 1) * 100, 2)
+    metrics["Return (Ann.) [%]"] = round(
+        ((1 + metrics["Return [%]"] / 100) ** (252 / len(df)) - 1) * 100, 2
+    )
+    metrics["Volatility (Ann.) [%]"] = round(df["Total_Return"].std() * np.sqrt(252) * 100, 2)
+    metrics["Sharpe Ratio"] = round(
+        metrics["Return (Ann.) [%]"] / metrics["Volatility (Ann.) [%]"], 2
+    )
+    negative_returns = df["Total_Return"][df["Total_Return"] < 0]
+    downside_deviation = np.sqrt(np.mean(negative_returns**2)) * np.sqrt(252)
+    metrics["Sortino Ratio"] = round(metrics["Return (Ann.) [%]"] / (downside_deviation * 100), 2)
+    max_drawdown = df["Drawdown"].min()
+    metrics["Max. Drawdown [%]"] = round(max_drawdown * 100, 2)
+    metrics["Calmar Ratio"] = round(
+        metrics["Return (Ann.) [%]"] / abs(metrics["Max. Drawdown [%]"]), 2
+    )
+    drawdowns = df["Drawdown"][df["Drawdown"] < 0]
+    metrics["Avg. Drawdown [%]"] = round(drawdowns.mean() * 100, 2)
+    drawdown_periods = (df["Drawdown"] < 0).astype(int).diff().fillna(0)
+    drawdown_starts = df.index[drawdown_periods == 1]
+    drawdown_ends = df.index[drawdown_periods == -1]
+    if len(drawdown_ends) < len(drawdown_starts):
+        drawdown_ends = drawdown_ends.append(df.index[-1:])
+    drawdown_durations = drawdown_ends - drawdown_starts
+    metrics["Max. Drawdown Duration"] = drawdown_durations.max()
+    metrics["Avg. Drawdown Duration"] = drawdown_durations.mean()
+    action_columns = [col for col in df.columns if col.endswith("_signal")]
+    buy_count = (df[action_columns] == "Buy").sum().sum()
+    sell_count = (df[action_columns] == "Sell").sum().sum()
+    metrics["# Trades"] = buy_count + sell_count
+    metrics["Best Day [%]"] = round(df["Total_Return"].max() * 100, 2)
+    metrics["Worst Day [%]"] = round(df["Total_Return"].min() * 100, 2)
+    metrics["Avg. Trade [%]"] = round(df["Total_Return"].mean() * 100, 2)
+    metrics["Max. Trade Duration"] = (df.index[-1] - df.index[0]).days
+    metrics["strategy"] = strategy
+    return metrics
+
+
+def equity_frame(returns, index, log_returns=False):
+    df = pd.DataFrame({"Total_Return": returns}, index=index)
+    if log_returns:
+        df["Cumulative_Return"] = np.exp(df["Total_Return"].cumsum())
+    else:
+        df["Cumulative_Return"] = (1 + df["Total_Return"]).cumprod()
+    df["Drawdown"] = df["Cumulative_Return"] / df["Cumulative_Return"].cummax() - 1
+    return df
+
+
+def assert_same_metrics(actual, expected):
+    assert list(actual) == list(expected)
+    for name, value in expected.items():
+        if pd.isna(value):
+            assert pd.isna(actual[name]), name
+        else:
+            assert actual[name] == value, name
+
+
+def make_returns(seed=0, dates=300):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0004, 0.015, size=(dates, 5))
+    # A late start, a gap, a series that never falls and one that never recovers
+    returns[:40, 1] = np.nan
+    returns[100:110, 2] = np.nan
+    returns[:, 3] = np.abs(returns[:, 3])
+    returns[150:, 4] = -np.abs(returns[150:, 4])
+    return returns
+
+
+@pytest.mark.parametrize("log_returns", [False, True])
+def test_batch_metrics_match_the_per_column_code(log_returns):
+    returns = make_returns()
+    index = pd.bdate_range("2020-01-01", periods=len(returns), name="Date")
+    table = batch_metrics(
+        returns, index, names=list("ABCDE"), strategy="test", log_returns=log_returns
+    )
+    assert list(table.index) == list("ABCDE")
+    for k, name in enumerate("ABCDE"):
+        expected = reference_metrics(
+            equity_frame(returns[:, k], index, log_returns), "test"
+        )
+        assert_same_metrics(table.loc[name].to_dict(), expected)
+
+
+def test_given_equity_curves_are_used_as_is():
+    returns = make_returns(seed=2)[:, 0]
+    index = pd.bdate_range("2020-01-01", periods=len(returns))
+    df = equity_frame(returns, index)
+    df["Cumulative_Return"] *= 1.5
+    df["Drawdown"] = df["Drawdown"] * 2
+    table = batch_metrics(
+        returns,
+        index,
+        cumulative=df["Cumulative_Return"].to_numpy(),
+        drawdown=df["Drawdown"].to_numpy(),
+        trades=[7],
+    )
+    expected = reference_metrics(df, None)
+    expected["# Trades"] = 7
+    assert_same_metrics(table.iloc[0].to_dict(), expected)
+
+
+def test_get_metrics_matches_and_stays_quiet(capsys):
+    returns = make_returns(seed=3)[:, 2]
+    index = pd.bdate_range("2020-01-01", periods=len(returns), name="Date")
+    df = equity_frame(returns, index)
+    # Old-style signal columns are still counted when no trade log is given
+    df["A_signal"] = None
+    df.iloc[[5, 60], df.columns.get_loc("A_signal")] = ["Buy", "Sell"]
+    df["B_signal"] = None
+    df.iloc[[9], df.columns.get_loc("B_signal")] = ["Sell"]
+
+    assert_same_metrics(get_metrics(df, "quiet"), reference_metrics(df, "quiet"))
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,120 @@
+import itertools
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.pairs_scanner import PairsScanner, _pair_statistics
+from strategies.technical import TechnicalAnalysis
+from utils.metrics import capture_metrics
+
+
+def make_universe(seed=0, dates=400, pairs=4, singles=6):
+    # Cointegrated pairs (second = hedge * first + stationary gap) among random walks
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2019-01-01", periods=dates, name="Date")
+    columns = {}
+    for k in range(pairs):
+        log_first = np.log(40 + 10 * k) + np.cumsum(rng.normal(0.0002, 0.015, dates))
+        gap = np.zeros(dates)
+        for i in range(1, dates):
+            gap[i] = (0.6 + 0.1 * k) * gap[i - 1] + rng.normal(0, 0.01)
+        columns[f"P{k}A"] = np.exp(log_first)
+        columns[f"P{k}B"] = np.exp((0.8 + 0.2 * k) * log_first + 0.3 + gap)
+    for k in range(singles):
+        columns[f"S{k}"] = 30 * np.exp(np.cumsum(rng.normal(0.0002, 0.02, dates)))
+    return pd.DataFrame(columns, index=index)
+
+
+def reference_statistics(x, y):
+    # One pair at a time with explicit least squares
+    design = np.column_stack([np.ones_like(x), x])
+    (_, hedge_ratio), *_ = np.linalg.lstsq(design, y, rcond=None)
+    spread = y - hedge_ratio * x
+    spread = spread - spread.mean()
+
+    delta = np.diff(spread)
+    design = np.column_stack([np.ones(len(delta)), spread[:-1]])
+    coefficients, *_ = np.linalg.lstsq(design, delta, rcond=None)
+    residuals = delta - design @ coefficients
+    sigma2 = residuals @ residuals / (len(delta) - 2)
+    covariance = sigma2 * np.linalg.inv(design.T @ design)
+    gamma = coefficients[1]
+    return {
+        "correlation": np.corrcoef(np.diff(x), np.diff(y))[0, 1],
+        "hedge_ratio": hedge_ratio,
+        "adf_stat": gamma / np.sqrt(covariance[1, 1]),
+        "half_life": -np.log(2) / gamma if gamma < 0 else np.inf,
+    }
+
+
+def test_statistics_match_per_pair_regressions():
+    log_prices = np.log(make_universe().to_numpy())
+    stats = _pair_statistics(log_prices[:, 0], log_prices[:, 1:])
+    for k in range(1, log_prices.shape[1]):
+        expected = reference_statistics(log_prices[:, 0], log_prices[:, k])
+        for name, value in expected.items():
+            assert stats[name][k - 1] == pytest.approx(value, rel=1e-8)
+
+
+def test_scan_matches_a_brute_force_screen():
+    df = make_universe()
+    log_prices = np.log(df.to_numpy())
+    rows = []
+    for first, second in itertools.combinations(range(len(df.columns)), 2):
+        stats = reference_statistics(log_prices[:, first], log_prices[:, second])
+        if stats["adf_stat"] <= -2.9 and stats["correlation"] >= 0.1:
+            rows.append((stats["adf_stat"], df.columns[first], df.columns[second]))
+    expected = [(first, second) for _, first, second in sorted(rows)[:5]]
+
+    table = PairsScanner(top_k=5, min_correlation=0.1, workers=1).scan(df)
+    assert list(zip(table["first"], table["second"])) == expected
+    assert table["adf_stat"].is_monotonic_increasing
+    # The planted pairs are the most cointegrated
+    assert set(expected[:4]) == {(f"P{k}A", f"P{k}B") for k in range(4)}
+
+
+def test_parallel_scan_matches_the_serial_one():
+    df = make_universe(seed=1)
+    serial = PairsScanner(top_k=8, block_rows=2, workers=1).scan(df)
+    scanner = PairsScanner(top_k=8, block_rows=2, workers=2)
+    scanner.min_parallel_pairs = 0
+    pd.testing.assert_frame_equal(serial, scanner.scan(df))
+
+
+def test_tickers_without_full_history_are_skipped(capsys):
+    df = make_universe()
+    df.iloc[:20, 0] = np.nan
+    table = PairsScanner(top_k=20, workers=1).scan(df)
+    assert "P0A" not in set(table["first"]) | set(table["second"])
+    assert "1 tickers without full price history" in capsys.readouterr().out
+
+
+def test_backtest_matches_pairs_trading():
+    df = make_universe()
+    scanner = PairsScanner(top_k=3, workers=1)
+    table = scanner.backtest(df, scanner.scan(df))
+    for _, row in table.iterrows():
+        with capture_metrics():
+            result = TechnicalAnalysis.pairs_trading(
+                df=df[[row["first"], row["second"]]], hedge_ratio=row["hedge_ratio"]
+            )
+        for name in ("Return [%]", "Sharpe Ratio", "Max. Drawdown [%]"):
+            assert row[name] == result.metrics[name]
+
+
+def test_pairs_scan_trades_the_strongest_candidate():
+    df = make_universe()
+    with capture_metrics():
+        result = TechnicalAnalysis.pairs_scan(df=df, top_k=3)
+    best = result.tables["candidates"].iloc[0]
+    assert result.tickers == (best["first"], best["second"])
+    assert result.metrics["Return [%]"] == best["Return [%]"]
+
+    with pytest.raises(ValueError, match="ADF statistic below -50"):
+        with capture_metrics():
+            TechnicalAnalysis.pairs_scan(df=df, max_adf_stat=-50)
@@ -0,0 +1,109 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies import kernels
+from strategies.technical import TechnicalAnalysis
+from utils.metrics import capture_metrics
+
+
+def make_pair(seed=0, dates=500, hedge=1.0):
+    # Two cointegrated legs: B tracks hedge * log(A) plus a mean-reverting gap
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2019-01-01", periods=dates, name="Date")
+    log_a = np.log(50) + np.cumsum(rng.normal(0.0002, 0.015, dates))
+    gap = np.zeros(dates)
+    for i in range(1, dates):
+        gap[i] = 0.9 * gap[i - 1] + rng.normal(0, 0.01)
+    log_b = hedge * log_a + 0.5 + gap
+    return pd.DataFrame({"A": np.exp(log_a), "B": np.exp(log_b)}, index=index)
+
+
+def reference_positions(zscore, entry, exit):
+    # The per-element apply the vectorized hysteresis replaced
+    def position_size(z):
+        if abs(z) < exit:
+            return 0
+        elif abs(z) > entry:
+            return np.sign(z) * min(abs(z) / entry, 1)
+        else:
+            return np.nan
+
+    return zscore.apply(position_size).ffill()
+
+
+def reference_pairs(df, entry=2.0, exit=0.5, mean_window=50, std_window=20):
+    log_returns = np.log(df / df.shift(1))
+    spread = np.log(df["A"]) - np.log(df["B"])
+    zscore = (spread - spread.rolling(mean_window).mean()) / spread.rolling(std_window).std()
+    position = reference_positions(zscore, entry, exit)
+    legs = pd.DataFrame({"A": -position, "B": position})
+    # The old code multiplied by the same bar's return; a position set on a
+    # close now earns the next bar's return
+    total = (log_returns * legs.shift(1)).sum(axis=1, min_count=2)
+    return zscore, legs, total
+
+
+@pytest.mark.parametrize("entry, exit", [(2.0, 0.5), (1.0, 0.2), (1.5, 1.5)])
+def test_hysteresis_matches_the_apply(entry, exit):
+    rng = np.random.default_rng(1)
+    zscores = pd.DataFrame(rng.normal(0, 1.5, size=(400, 5)))
+    zscores.iloc[:30] = np.nan
+    zscores.iloc[100:110, 2] = np.nan
+    expected = zscores.apply(lambda column: reference_positions(column, entry, exit))
+    np.testing.assert_allclose(
+        kernels.hysteresis_positions(zscores.to_numpy(), entry, exit), expected
+    )
+
+
+@pytest.mark.parametrize("params", [{}, {"entry_threshold": 1.5, "exit_threshold": 0.25}])
+def test_pairs_trading_matches_the_per_series_code(params):
+    df = make_pair()
+    with capture_metrics():
+        result = TechnicalAnalysis.pairs_trading(df=df, **params)
+
+    zscore, legs, total = reference_pairs(
+        df, params.get("entry_threshold", 2.0), params.get("exit_threshold", 0.5)
+    )
+    # The first mean_window bars have no z-score and are dropped
+    np.testing.assert_allclose(result.indicators["spread_zscore"], zscore.iloc[50:], rtol=1e-6)
+    np.testing.assert_allclose(result.positions, legs.iloc[50:], rtol=1e-6)
+    np.testing.assert_allclose(result.total_return, total.iloc[50:], rtol=1e-6)
+    np.testing.assert_allclose(result.equity, np.exp(total.iloc[50:].cumsum()), rtol=1e-6)
+
+
+def test_hedge_ratio_weights_the_first_leg():
+    df = make_pair(seed=2, hedge=1.6)
+    with capture_metrics():
+        result = TechnicalAnalysis.pairs_trading(df=df, hedge_ratio=1.6)
+
+    spread = 1.6 * np.log(df["A"]) - np.log(df["B"])
+    np.testing.assert_allclose(result.indicators["spread"], spread.iloc[50:])
+    position = result.positions[:, 1]
+    np.testing.assert_allclose(result.positions[:, 0], -1.6 * position)
+
+    log_returns = np.log(df / df.shift(1)).iloc[50:].to_numpy()
+    previous = np.concatenate([[np.nan], position[:-1]])
+    expected = previous * (log_returns[:, 1] - 1.6 * log_returns[:, 0])
+    np.testing.assert_allclose(result.total_return[1:], expected[1:])
+
+
+def test_positions_are_causal():
+    df = make_pair(seed=3)
+    with capture_metrics():
+        full = TechnicalAnalysis.pairs_trading(df=df)
+        cut = TechnicalAnalysis.pairs_trading(df=df.iloc[:300])
+    np.testing.assert_allclose(full.positions[:250], cut.positions)
+    np.testing.assert_allclose(full.total_return[:250], cut.total_return)
+
+
+def test_needs_exactly_two_columns():
+    df = make_pair()
+    df["C"] = df["A"]
+    with pytest.raises(ValueError, match="must be 2"):
+        TechnicalAnalysis.pairs_trading(df=df)
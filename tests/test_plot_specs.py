@@ -0,0 +1,118 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib.figure import Figure
+
+from strategies.technical import TechnicalAnalysis
+from utils.metrics import capture_metrics
+from utils.plot import PlotSpec, defer_plots
+
+
+def make_prices(seed=0, dates=150):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2020-01-01", periods=dates, name="Date")
+    return pd.DataFrame(
+        100 * np.exp(np.cumsum(rng.normal(0, 0.02, size=(dates, 2)), axis=0)),
+        index=index,
+        columns=["A", "B"],
+    )
+
+
+@pytest.fixture(autouse=True)
+def close_figures():
+    # Other modules may leave pyplot figures open; counts here start from none
+    plt.close("all")
+    yield
+    plt.close("all")
+
+
+def test_specs_draw_nothing_until_rendered():
+    calls = []
+    spec = PlotSpec("Counted", lambda fig: calls.append(fig.add_subplot(111)))
+    assert calls == []
+
+    figure = spec.render()
+    assert isinstance(figure, Figure) and len(calls) == 1
+    # Plain figures stay out of pyplot's registry; pyplot ones join it
+    assert plt.get_fignums() == []
+    spec.render(pyplot=True)
+    assert len(plt.get_fignums()) == 1
+
+
+def test_deferred_strategies_return_specs_only():
+    with defer_plots():
+        result = TechnicalAnalysis.momentum(df=make_prices())
+    assert [spec.title for spec in result.plots] == [
+        "Strategy Overview",
+        "A Performance",
+        "B Performance",
+        "Rolling Metrics",
+    ]
+    assert result.figures == ()
+    assert plt.get_fignums() == []
+
+    with capture_metrics():
+        assert TechnicalAnalysis.momentum(df=make_prices()).plots == ()
+
+
+def test_eager_strategies_render_every_spec():
+    result = TechnicalAnalysis.momentum(df=make_prices())
+    assert [title for _, title in result.figures] == [spec.title for spec in result.plots]
+    assert len(plt.get_fignums()) == len(result.plots)
+
+
+def test_rendered_plots_show_what_the_old_figures_did():
+    with defer_plots():
+        result = TechnicalAnalysis.momentum(df=make_prices())
+    frame = result.frame()
+    signals = result.signals()
+    dates = frame.index
+
+    overview = result.plots[0].render()
+    line = overview.axes[0].lines[0]
+    np.testing.assert_array_equal(line.get_xdata(), dates)
+    np.testing.assert_allclose(line.get_ydata(), frame["Cumulative_Return"] - 1)
+
+    for spec, ticker in zip(result.plots[1:3], ["A", "B"]):
+        ax = spec.render().axes[0]
+        cumulative = (1 + frame[f"{ticker}_return"]).cumprod() - 1
+        np.testing.assert_allclose(ax.lines[0].get_ydata(), cumulative)
+        # Markers where the old "{ticker}_signal" column said Buy and Sell
+        buys, sells = ax.collections
+        for markers, side in ((buys, "Buy"), (sells, "Sell")):
+            mask = (signals[f"{ticker}_signal"] == side).to_numpy()
+            np.testing.assert_allclose(markers.get_offsets()[:, 1], cumulative[mask])
+            assert len(markers.get_offsets()) == mask.sum() > 0
+
+
+def test_plot_tabs_keep_a_bounded_number_of_canvases():
+    pytest.importorskip("PyQt6")
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+
+    from trading_app import PlotTabWidget
+
+    app = QApplication.instance() or QApplication([])
+    calls = []
+    tabs = PlotTabWidget()
+    for k in range(6):
+        tabs.add_plot(PlotSpec(f"Plot {k}", lambda fig, k=k: calls.append(k)))
+    assert calls == [0]
+
+    for k in [1, 2, 3, 4, 5, 1]:
+        tabs.show_plot(k)
+    # Showing 4 and 5 evicted 0 and 1, so going back to 1 renders it again
+    assert calls == [0, 1, 2, 3, 4, 5, 1]
+    assert len(tabs._rendered) == tabs.max_rendered
+    app.processEvents()
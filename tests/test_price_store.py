@@ -0,0 +1,144 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.downloader import DownloadReport
+from utils.price_store import PriceStore
+
+START = pd.Timestamp("2024-01-01")
+END = pd.Timestamp("2024-03-01")
+
+
+def bars(ticker, start, end):
+    index = pd.bdate_range(start, end, inclusive="left")
+    # Deterministic prices so overlapping fetches must agree exactly
+    seed = sum(map(ord, ticker)) * 7
+    close = np.array([(seed + day.toordinal()) % 1000 + 100 for day in index], float)
+    return pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1.0},
+        index=index,
+    )
+
+
+class FakeFetcher:
+    def __init__(self, fail=()):
+        self.calls = []
+        self.fail = set(fail)
+
+    def __call__(self, tickers, start, end, interval):
+        self.calls.append((sorted(tickers), start, end))
+        report = DownloadReport()
+        for ticker in tickers:
+            if ticker in self.fail:
+                report.failed[ticker] = "boom"
+            else:
+                report.frames[ticker] = bars(ticker, start, end)
+        return report
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(tmp_path / "prices", FakeFetcher())
+
+
+def test_missing_ranges():
+    covered = [
+        (pd.Timestamp("2024-01-10"), pd.Timestamp("2024-01-20")),
+        (pd.Timestamp("2024-02-01"), pd.Timestamp("2024-02-10")),
+    ]
+    assert PriceStore._missing_ranges(covered, START, END) == [
+        (START, pd.Timestamp("2024-01-10")),
+        (pd.Timestamp("2024-01-20"), pd.Timestamp("2024-02-01")),
+        (pd.Timestamp("2024-02-10"), END),
+    ]
+    inside = (pd.Timestamp("2024-01-12"), pd.Timestamp("2024-01-18"))
+    assert PriceStore._missing_ranges(covered, *inside) == []
+    assert PriceStore._missing_ranges([], START, END) == [(START, END)]
+
+
+def test_get_matches_a_single_download(store):
+    df = store.get(["aapl", "msft"], START, END)
+    expected = pd.DataFrame({t: bars(t, START, END)["Close"] for t in ["AAPL", "MSFT"]})
+    pd.testing.assert_frame_equal(df, expected, check_names=False, check_freq=False)
+    assert df.index.name == "Date"
+
+
+def test_only_gaps_are_fetched(store):
+    store.get(["AAPL"], "2024-01-15", "2024-02-01")
+    fetcher = store._fetcher
+    fetcher.calls.clear()
+
+    df = store.get(["AAPL"], START, END)
+    assert fetcher.calls == [
+        (["AAPL"], START, pd.Timestamp("2024-01-15")),
+        (["AAPL"], pd.Timestamp("2024-02-01"), END),
+    ]
+    pd.testing.assert_series_equal(
+        df["AAPL"], bars("AAPL", START, END)["Close"], check_names=False, check_freq=False
+    )
+
+    fetcher.calls.clear()
+    store.get(["AAPL"], "2024-01-20", "2024-02-20")
+    assert fetcher.calls == []
+
+
+def test_coverage_ranges_merge(store):
+    store.get(["AAPL"], "2024-01-01", "2024-01-15")
+    store.get(["AAPL"], "2024-02-01", "2024-02-15")
+    store.get(["AAPL"], "2024-01-10", "2024-02-05")
+    assert store._read_coverage("AAPL", "1d") == [
+        (pd.Timestamp("2024-01-01"), pd.Timestamp("2024-02-15"))
+    ]
+
+
+def test_tickers_with_the_same_gap_share_a_request(store):
+    store.get(["AAPL"], START, END)
+    store._fetcher.calls.clear()
+    store.get(["AAPL", "MSFT", "GOOG"], START, END)
+    assert store._fetcher.calls == [(["GOOG", "MSFT"], START, END)]
+
+
+def test_failed_tickers_stay_uncovered(tmp_path):
+    fetcher = FakeFetcher(fail={"BAD"})
+    store = PriceStore(tmp_path / "prices", fetcher)
+    df = store.get(["AAPL", "BAD"], START, END)
+    assert list(df.columns) == ["AAPL"]
+    assert store._read_coverage("BAD", "1d") == []
+
+    fetcher.calls.clear()
+    fetcher.fail.clear()
+    df = store.get(["AAPL", "BAD"], START, END)
+    assert fetcher.calls == [(["BAD"], START, END)]
+    assert list(df.columns) == ["AAPL", "BAD"]
+
+
+def test_parts_are_compacted(store):
+    for month in range(1, 12):
+        start = pd.Timestamp(2023, month, 1)
+        store.update(["AAPL"], start, start + pd.offsets.MonthBegin())
+    assert len(store._parts("AAPL", "1d")) > store.max_parts
+
+    before = store.load("AAPL")
+    assert len(store._parts("AAPL", "1d")) == 1
+    pd.testing.assert_frame_equal(store.load("AAPL"), before, check_freq=False)
+    assert before.index.is_monotonic_increasing and before.index.is_unique
+
+
+def test_clear_keeps_the_lock_file(store):
+    store.get(["AAPL"], START, END)
+    store.clear()
+    assert store._parts("AAPL", "1d") == []
+    assert (store._cache_dir / ".lock").exists()
+
+
+def test_lock_is_reentrant(store):
+    with store._locked():
+        with store._locked():
+            assert store._lock_depth == 2
+        assert store._lock_handle is not None
+    assert store._lock_depth == 0 and store._lock_handle is None
@@ -0,0 +1,110 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+import pytest
+
+from utils.query_plan import PlanError, QueryPlan
+
+TICKERS = pd.DataFrame(
+    {
+        "Symbol": ["AAPL", "MSFT", "XOM", "JPM", "KO"],
+        "Sector": ["Technology", "Technology", "Energy", "Financials", "Consumer Staples"],
+        "Market Cap": [3.0e12, 2.8e12, 4.5e11, 5.0e11, 2.6e11],
+    }
+)
+
+
+def plan(**overrides):
+    payload = {
+        "strategy": "momentum",
+        "start_date": "2023-01-01",
+        "end_date": "2024-01-01",
+        "filters": [],
+        "arguments": {},
+    }
+    payload.update(overrides)
+    return QueryPlan.from_json(json.dumps(payload))
+
+
+def test_round_trips_through_json():
+    parsed = plan(
+        filters=[{"column": "Sector", "op": "==", "value": "Energy"}],
+        arguments={"window": 10},
+    )
+    assert QueryPlan.from_dict(parsed.to_dict()) == parsed
+    assert parsed.filters[0].column == "Sector"
+
+
+def test_missing_end_date_defaults_to_today():
+    parsed = QueryPlan.from_dict({"strategy": "long", "start_date": "2023-01-01"})
+    assert pd.Timestamp(parsed.end_date).normalize() == pd.Timestamp.today().normalize()
+
+
+@pytest.mark.parametrize(
+    "text", ["not json", "[1, 2]", json.dumps({"start_date": "2023-01-01"})]
+)
+def test_rejects_malformed_plans(text):
+    with pytest.raises(PlanError):
+        QueryPlan.from_json(text)
+
+
+@pytest.mark.parametrize(
+    "filters, expected",
+    [
+        ([{"column": "Sector", "op": "==", "value": "Technology"}], ["AAPL", "MSFT"]),
+        ([{"column": "Market Cap", "op": ">=", "value": 5.0e11}], ["AAPL", "MSFT", "JPM"]),
+        ([{"column": "Symbol", "op": "in", "value": "KO"}], ["KO"]),
+        (
+            [{"column": "Sector", "op": "not in", "value": ["Technology"]}],
+            ["XOM", "JPM", "KO"],
+        ),
+        ([{"column": "Sector", "op": "contains", "value": "consumer"}], ["KO"]),
+        (
+            [
+                {"column": "Sector", "op": "==", "value": "Technology"},
+                {"column": "Market Cap", "op": "<", "value": 2.9e12},
+            ],
+            ["MSFT"],
+        ),
+    ],
+)
+def test_select_matches_the_equivalent_pandas_filter(filters, expected):
+    parsed = plan(filters=filters)
+    parsed.validate(TICKERS)
+    assert parsed.select(TICKERS)["Symbol"].tolist() == expected
+
+
+def test_arguments_are_coerced_to_the_signature():
+    arguments = {"entry_threshold": "2.5", "mean_window": 30.0}
+    parsed = plan(strategy="pairs_trading", arguments=arguments)
+    parsed.validate(TICKERS)
+    assert parsed.arguments == {"entry_threshold": 2.5, "mean_window": 30}
+    assert isinstance(parsed.arguments["mean_window"], int)
+
+    parsed = plan(strategy="long_short", arguments={"long_tickers": "AAPL"})
+    parsed.validate(TICKERS)
+    assert parsed.arguments == {"long_tickers": ["AAPL"]}
+
+
+@pytest.mark.parametrize(
+    "overrides, message",
+    [
+        ({"strategy": "astrology"}, "not found"),
+        (
+            {"filters": [{"column": "Country", "op": "==", "value": "US"}]},
+            "Unknown filter column",
+        ),
+        ({"filters": [{"column": "Sector", "op": "~", "value": "x"}]}, "Unsupported filter"),
+        ({"end_date": "2022-01-01"}, "must be after"),
+        ({"start_date": None}, "start and an end date"),
+        ({"arguments": {"lookback": 5}}, "has no argument"),
+        ({"arguments": {"window": 2.5}}, "must be int"),
+    ],
+)
+def test_validate_rejects_bad_plans(overrides, message):
+    with pytest.raises(PlanError, match=message):
+        plan(**overrides).validate(TICKERS)
@@ -0,0 +1,111 @@
+import dataclasses
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+import pytest
+import yaml
+
+from strategies import StrategyResult
+from trader_engine import QueryResult, TraderEngine
+from utils import llm_helper
+from utils.llm_cache import CompletionCache
+from utils.llm_helper import LLMHelper
+from utils.metrics import capture_metrics, get_metrics
+from utils.ticker_universe import TickerUniverse
+
+TICKERS = pd.DataFrame(
+    {"ticker": ["AAPL", "MSFT", "XOM"], "sector": ["Technology", "Technology", "Energy"]}
+)
+PROMPTS = yaml.safe_load((Path(llm_helper.__file__).parent / "prompts.yaml").read_text())
+
+
+def respond(key, user):
+    # Canned completions; the sector filter follows the query text
+    if key == "pandas_code_generate":
+        sector = "Energy" if "energy" in user else "Technology"
+        return f"self._ticker_data[self._ticker_data['sector'] == '{sector}']"
+    return {
+        "strategy_identifier": "long",
+        "strategy_call": "Traditional.long(self._strategy_data)",
+        "gpt_code_generate": (
+            "index = pd.bdate_range('2024-01-01', periods=30, name='Date')\n"
+            "_strategy_data = pd.DataFrame("
+            "{t: 100 + np.arange(30.0) * (i + 1) for i, t in enumerate(tickers)}, index=index)"
+        ),
+    }[key]
+
+
+class FakeClient:
+    keys = []
+
+    def __init__(self, api_key):
+        FakeClient.keys.append(api_key)
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, model, messages, **options):
+        system, user = messages[0]["content"], messages[1]["content"]
+        key = next(key for key, prompt in PROMPTS.items() if prompt["system"] == system)
+        message = SimpleNamespace(content=respond(key, user))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    monkeypatch.setattr(CompletionCache, "_instance", CompletionCache(enabled=False))
+    monkeypatch.setattr(TickerUniverse, "instance", lambda: SimpleNamespace(data=TICKERS))
+    monkeypatch.setattr(llm_helper.openai, "OpenAI", FakeClient)
+    monkeypatch.setattr(llm_helper.openai, "api_key", None)
+    # The step-by-step pipeline, so every stage goes through the fake client
+    monkeypatch.setattr(LLMHelper, "use_intent_parser", False)
+    monkeypatch.setattr(LLMHelper, "use_planner", False)
+    monkeypatch.setattr(LLMHelper, "use_async_pipeline", False)
+    FakeClient.keys = []
+
+
+def test_query_returns_what_the_strategy_computed(capsys):
+    result = TraderEngine(api_key="default").query("Go long tech stocks in January 2024")
+    assert isinstance(result, QueryResult)
+    assert isinstance(result.result, StrategyResult)
+    assert result.strategy == "long"
+    assert list(result.data.columns) == ["AAPL", "MSFT"]
+
+    # The figures the old engine printed, now returned
+    with capture_metrics():
+        expected = get_metrics(result.result.frame(), "long", result.trades)
+    # Rising prices never draw down, so several figures are NaN on both sides
+    pd.testing.assert_series_equal(pd.Series(dict(result.metrics)), pd.Series(expected))
+    assert result.trades is result.result.trades
+    assert len(result.trades) == 4
+    assert "Return [%]" not in capsys.readouterr().out
+
+    # Plots are described but left for the caller to render
+    assert result.plots and result.result.figures == ()
+    assert result.stage_timings["total"] >= 0
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        result.strategy = "other"
+
+
+def test_concurrent_queries_keep_their_own_data():
+    engine = TraderEngine(api_key="default")
+    queries = ["Go long tech stocks in January 2024", "Go long energy stocks in January 2024"]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(engine.query, queries * 3))
+    for result in results:
+        expected = ["XOM"] if "energy" in result.query else ["AAPL", "MSFT"]
+        assert list(result.data.columns) == expected
+        assert list(result.result.tickers) == expected
+
+
+def test_api_keys_are_passed_per_query():
+    engine = TraderEngine(api_key="default")
+    engine.query("Go long tech stocks in January 2024")
+    engine.query("Go long tech stocks in January 2024", api_key="mine")
+    assert set(FakeClient.keys) == {"default", "mine"}
+
+    with pytest.raises(ValueError, match="API key is not set"):
+        TraderEngine().query("Go long tech stocks in January 2024")
@@ -0,0 +1,78 @@
+import inspect
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+import pytest
+
+from strategies.registry import REGISTRY, StrategyRegistry, StrategySpec
+from strategies.technical import TechnicalAnalysis
+from strategies.traditional import Traditional
+
+CLASSES = {"Traditional": Traditional, "TechnicalAnalysis": TechnicalAnalysis}
+
+
+def public_methods(cls):
+    return {
+        name
+        for name in dir(cls)
+        if callable(getattr(cls, name)) and not name.startswith("_")
+    }
+
+
+def test_registry_covers_every_public_strategy():
+    # The names the old pipeline found by scanning the classes with dir()
+    scanned = set().union(*(public_methods(cls) for cls in CLASSES.values()))
+    assert set(REGISTRY.names()) == scanned
+
+
+@pytest.mark.parametrize("name", REGISTRY.names())
+def test_spec_matches_the_method_signature(name):
+    spec = REGISTRY.get(name)
+    assert getattr(CLASSES[spec.owner], name) is spec.func
+
+    signature = inspect.signature(spec.func)
+    expected = [p for p in signature.parameters.values() if p.name != "df"]
+    assert [p.name for p in spec.parameters] == [p.name for p in expected]
+    for parameter, original in zip(spec.parameters, expected):
+        assert parameter.annotation == original.annotation
+        assert parameter.required == (original.default is inspect.Parameter.empty)
+        if not parameter.required:
+            assert parameter.default is original.default
+
+
+def test_namespace_resolves_qualified_calls():
+    namespace = REGISTRY.namespace()
+    for spec in REGISTRY:
+        owner, name = spec.qualname.split(".")
+        assert getattr(namespace[owner], name) is spec.func
+
+
+def test_describe_is_serializable():
+    described = {entry["name"]: entry for entry in REGISTRY.describe()}
+    assert described["momentum"]["signature"] == "momentum(window: int = 5)"
+    assert described["pairs_trading"]["columns"] == "exactly 2 price columns"
+    assert described["long"]["columns"] == "at least 1 price column(s)"
+
+
+def test_check_columns():
+    spec = REGISTRY.get("pairs_trading")
+    spec.check_columns(pd.DataFrame(columns=["A", "B"]))
+    with pytest.raises(ValueError, match="exactly 2 price columns, got 3"):
+        spec.check_columns(pd.DataFrame(columns=["A", "B", "C"]))
+
+
+def test_unknown_and_duplicate_names():
+    with pytest.raises(ValueError, match="not found"):
+        REGISTRY.get("astrology")
+
+    registry = StrategyRegistry()
+    spec = REGISTRY.get("long")
+    registry.register(spec)
+    registry.register(spec)
+    assert len(registry) == 1
+    clash = StrategySpec(spec.name, spec.owner, lambda df: None, (), spec.description)
+    with pytest.raises(ValueError, match="already registered"):
+        registry.register(clash)
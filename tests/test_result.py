@@ -0,0 +1,157 @@
+import dataclasses
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.technical import TechnicalAnalysis
+from strategies.traditional import Traditional
+from utils.metrics import capture_metrics, get_metrics
+
+
+def make_prices(seed=0, dates=200, tickers=3):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2020-01-01", periods=dates, name="Date")
+    steps = rng.normal(0.0003, 0.02, size=(dates, tickers))
+    return pd.DataFrame(
+        100 * np.exp(np.cumsum(steps, axis=0)),
+        index=index,
+        columns=["A", "B", "C"][:tickers],
+    )
+
+
+# The old strategies wrote these columns into the frame they were given
+
+
+def add_totals(df, column_suffix):
+    df["Total_Return"] = df[[c for c in df.columns if c.endswith(column_suffix)]].mean(axis=1)
+    df["Cumulative_Return"] = (1 + df["Total_Return"]).cumprod()
+    # The form every old strategy but long() used; long() subtracted 1 twice
+    df["Drawdown"] = df["Cumulative_Return"] / df["Cumulative_Return"].cummax() - 1
+    return df
+
+
+def reference_hold(df, sides):
+    for stock in list(df.columns):
+        if stock in sides:
+            df[f"{stock}_return"] = sides[stock] * df[stock].pct_change()
+        else:
+            df[f"{stock}_return"] = 0.0
+    return add_totals(df, "_return")
+
+
+def reference_momentum(df, window=5):
+    for stock in list(df.columns):
+        df[f"{stock}_return"] = df[stock].pct_change()
+        df[f"{stock}_momentum"] = df[f"{stock}_return"].rolling(window=window).mean()
+        df[f"{stock}_position"] = np.where(
+            df[f"{stock}_momentum"].isna(), 0, np.where(df[f"{stock}_momentum"] > 0, 1, -1)
+        )
+        df[f"{stock}_strategy"] = df[f"{stock}_position"].shift(1) * df[f"{stock}_return"]
+    return add_totals(df, "_strategy")
+
+
+def reference_bollinger(df, window=20, num_std=2):
+    for stock in list(df.columns):
+        df[f"{stock}_return"] = df[stock].pct_change()
+        df[f"{stock}_ma"] = df[stock].rolling(window=window).mean()
+        df[f"{stock}_std"] = df[stock].rolling(window=window).std()
+        df[f"{stock}_upper_band"] = df[f"{stock}_ma"] + num_std * df[f"{stock}_std"]
+        df[f"{stock}_lower_band"] = df[f"{stock}_ma"] - num_std * df[f"{stock}_std"]
+        df[f"{stock}_position"] = np.where(
+            df[stock] > df[f"{stock}_upper_band"],
+            -1,
+            np.where(df[stock] < df[f"{stock}_lower_band"], 1, np.nan),
+        )
+        df[f"{stock}_position"] = df[f"{stock}_position"].ffill()
+        df[f"{stock}_strategy"] = df[f"{stock}_position"].shift(1) * df[f"{stock}_return"]
+    return add_totals(df, "_strategy")
+
+
+CASES = [
+    (Traditional.long, {}, lambda df: reference_hold(df, {"A": 1, "B": 1, "C": 1})),
+    (Traditional.short, {}, lambda df: reference_hold(df, {"A": -1, "B": -1, "C": -1})),
+    (
+        Traditional.long_short,
+        {"long_tickers": ["A"], "short_tickers": ["C"]},
+        lambda df: reference_hold(df, {"A": 1, "C": -1}),
+    ),
+    (TechnicalAnalysis.momentum, {}, reference_momentum),
+    (TechnicalAnalysis.momentum, {"window": 20}, lambda df: reference_momentum(df, 20)),
+    (TechnicalAnalysis.mean_reversion_bollinger_bands, {}, reference_bollinger),
+]
+
+
+@pytest.mark.parametrize("run, params, reference", CASES)
+def test_frame_matches_the_old_wide_table(run, params, reference):
+    df = make_prices()
+    with capture_metrics():
+        result = run(df=df, **params)
+    expected = reference(df.copy())
+
+    frame = result.frame()
+    assert set(frame.columns) <= set(expected.columns)
+    # pandas' rolling std drifts from the exact windowed value by ~1e-7
+    pd.testing.assert_frame_equal(
+        frame, expected[frame.columns], check_dtype=False, check_exact=False, rtol=1e-6
+    )
+
+
+@pytest.mark.parametrize("run, params, reference", CASES)
+def test_metrics_match_get_metrics_of_the_frame(run, params, reference):
+    df = make_prices(seed=1)
+    with capture_metrics():
+        result = run(df=df, **params)
+        expected = get_metrics(reference(df.copy()), result.strategy, result.trades)
+    assert dict(result.metrics) == expected
+
+
+@pytest.mark.parametrize(
+    "run, params",
+    [
+        (Traditional.long, {}),
+        (Traditional.long_short, {"long_tickers": ["A"], "short_tickers": ["B"]}),
+        (TechnicalAnalysis.momentum, {}),
+        (TechnicalAnalysis.macd_trend_following, {}),
+        (TechnicalAnalysis.mean_reversion_moving_average, {}),
+        (TechnicalAnalysis.mean_reversion_bollinger_bands, {}),
+        (TechnicalAnalysis.pairs_trading, {}),
+    ],
+)
+def test_the_input_frame_is_left_alone(run, params):
+    df = make_prices(tickers=2)
+    original = df.copy()
+    with capture_metrics():
+        run(df=df, **params)
+    pd.testing.assert_frame_equal(df, original)
+
+
+def test_results_are_read_only():
+    df = make_prices()
+    with capture_metrics():
+        result = TechnicalAnalysis.momentum(df=df)
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        result.strategy = "other"
+    for values in (
+        result.prices,
+        result.positions,
+        result.returns,
+        result.total_return,
+        result.equity,
+        result.drawdown,
+        result.indicators["momentum"],
+    ):
+        with pytest.raises(ValueError):
+            values[..., 0] = 0.0
+    with pytest.raises(TypeError):
+        result.metrics["Return [%]"] = 0.0
+
+    # frame() is a fresh table the caller may change freely
+    frame = result.frame()
+    frame["Total_Return"] = 0.0
+    assert not np.all(result.total_return[1:] == 0.0)
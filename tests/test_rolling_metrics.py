@@ -0,0 +1,127 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.metrics import batch_metrics, rolling_metrics
+
+METRICS = ["Sharpe Ratio", "Sortino Ratio", "Volatility (Ann.) [%]", "Max. Drawdown [%]"]
+
+
+def make_returns(seed=0, dates=300, series=3, gaps=False):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0004, 0.015, size=(dates, series))
+    if gaps:
+        returns[:25, 1] = np.nan
+        returns[120:130, 2] = np.nan
+    return returns
+
+
+def reference_window(returns, log_returns=False):
+    # Every figure of one trailing window, from the window's own bars
+    filled = np.nan_to_num(returns)
+    valid = returns[~np.isnan(returns)]
+    growth = filled if log_returns else np.log1p(filled)
+    annual = np.expm1(growth.sum() * 252 / len(returns)) * 100
+    volatility = valid.std(ddof=1) * np.sqrt(252) * 100
+    negative = filled[filled < 0]
+    downside = np.sqrt(np.mean(negative**2)) * np.sqrt(252) * 100
+    # Equity from the level the window started at
+    equity = np.exp(np.concatenate([[0.0], np.cumsum(growth)]))
+    drawdown = (equity / np.maximum.accumulate(equity) - 1).min() * 100
+    return {
+        "Sharpe Ratio": annual / volatility,
+        "Sortino Ratio": annual / downside,
+        "Volatility (Ann.) [%]": volatility,
+        "Max. Drawdown [%]": drawdown,
+    }
+
+
+def reference_rolling(returns, window, min_periods=None, log_returns=False):
+    min_periods = window if min_periods is None else min_periods
+    expected = {name: np.full(returns.shape, np.nan) for name in METRICS}
+    for k in range(returns.shape[1]):
+        for i in range(len(returns)):
+            block = returns[max(0, i - window + 1) : i + 1, k]
+            if np.count_nonzero(~np.isnan(block)) < min_periods:
+                continue
+            for name, value in reference_window(block, log_returns).items():
+                expected[name][i, k] = value
+    return expected
+
+
+@pytest.mark.parametrize("window", [5, 21, 63])
+def test_volatility_matches_pandas_rolling_std(window):
+    returns = make_returns()
+    index = pd.bdate_range("2020-01-01", periods=len(returns), name="Date")
+    table = rolling_metrics(returns, index, window)
+    expected = pd.DataFrame(returns).rolling(window).std() * np.sqrt(252) * 100
+    np.testing.assert_allclose(table["Volatility (Ann.) [%]"], expected, rtol=1e-7)
+
+
+@pytest.mark.parametrize(
+    "window, min_periods, gaps, log_returns",
+    [
+        (21, None, False, False),
+        (63, None, True, False),
+        (21, None, False, True),
+        # Partial leading windows, and a window longer than the data
+        (21, 10, True, False),
+        (400, 30, True, False),
+    ],
+)
+def test_rolling_metrics_match_a_window_by_window_loop(window, min_periods, gaps, log_returns):
+    returns = make_returns(seed=1, gaps=gaps)
+    index = pd.bdate_range("2020-01-01", periods=len(returns), name="Date")
+    table = rolling_metrics(
+        returns, index, window, min_periods=min_periods, log_returns=log_returns
+    )
+    expected = reference_rolling(returns, window, min_periods, log_returns)
+    for name in METRICS:
+        np.testing.assert_allclose(table[name], expected[name], rtol=1e-7, err_msg=name)
+
+
+def test_full_window_matches_batch_metrics():
+    # Over the whole sample the last window is the full-period figure
+    returns = make_returns(seed=2, dates=126)
+    index = pd.bdate_range("2020-01-01", periods=len(returns), name="Date")
+    table = rolling_metrics(returns, index, len(returns))
+    batch = batch_metrics(returns, index)
+    # Drawdown differs by design: windows also count the level they start from
+    for name in METRICS[:3]:
+        np.testing.assert_allclose(
+            table[name].iloc[-1].round(2), batch[name], atol=0.01, err_msg=name
+        )
+
+
+def test_beta_matches_pandas_rolling_cov():
+    returns = make_returns(seed=3)
+    rng = np.random.default_rng(4)
+    market = rng.normal(0.0003, 0.01, size=len(returns))
+    returns[:, 0] = 1.5 * market + rng.normal(0, 0.002, size=len(returns))
+    index = pd.bdate_range("2020-01-01", periods=len(returns), name="Date")
+    table = rolling_metrics(returns, index, 42, benchmark=market, names=list("ABC"))
+
+    frame = pd.DataFrame(returns, columns=list("ABC"))
+    market = pd.Series(market)
+    for name in "ABC":
+        expected = frame[name].rolling(42).cov(market) / market.rolling(42).var()
+        np.testing.assert_allclose(table["Beta", name], expected, rtol=1e-7, atol=1e-12)
+    assert table["Beta", "A"].iloc[-1] == pytest.approx(1.5, abs=0.1)
+
+
+def test_layout_and_window_checks():
+    returns = make_returns(series=2)
+    index = pd.bdate_range("2020-01-01", periods=len(returns), name="Date")
+    table = rolling_metrics(returns, index, 10, names=["x", "y"])
+    assert table.index.equals(index)
+    assert list(table.columns.names) == ["metric", "series"]
+    assert list(table.columns) == [(name, s) for name in METRICS for s in ["x", "y"]]
+    assert table.iloc[:9].isna().all().all()
+    assert table.iloc[9:].notna().all().all()
+    with pytest.raises(ValueError, match="at least 2"):
+        rolling_metrics(returns, index, 1)
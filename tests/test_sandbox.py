@@ -0,0 +1,96 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.code_cache import SNIPPET_BUILTINS, compile_snippet
+from utils.sandbox import SandboxError, SandboxPool, SandboxTimeout
+
+UNIVERSE = pd.DataFrame(
+    {
+        "ticker": ["AAPL", "MSFT", "XOM", "KO"],
+        "sector": ["Technology", "Technology", "Energy", "Consumer Staples"],
+        "cap": [3.0e12, 2.8e12, 4.5e11, 2.6e11],
+    }
+)
+UNIVERSE.attrs["fingerprint"] = "universe"
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = SandboxPool(workers=1, timeout=30, memory_limit=None)
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+
+def run_locally(source, names, result_name, attributes=()):
+    namespace = {**names, "pd": pd, "np": np, "__builtins__": SNIPPET_BUILTINS}
+    exec(compile_snippet(source, namespace, "snippet", attributes), namespace)
+    return namespace[result_name]
+
+
+def test_matches_in_process_execution(pool):
+    source = "result = self._ticker_data[self._ticker_data['cap'] > 1e12]"
+    names = {"self": SimpleNamespace(_ticker_data=UNIVERSE)}
+    expected = run_locally(source, names, "result", {"_ticker_data"})
+    actual = pool.run(source, names, "result", attributes={"_ticker_data"})
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_price_frames_round_trip(pool):
+    source = (
+        "index = pd.bdate_range('2020-01-01', periods=500, name='Date')\n"
+        "result = DataFrame({'A': np.arange(500.0), 'B': np.arange(500) * 2}, index=index)"
+    )
+    result = pool.run(source, {}, "result")
+    assert result.index.name == "Date"
+    np.testing.assert_array_equal(result["A"].to_numpy(), np.arange(500.0))
+    np.testing.assert_array_equal(result["B"].to_numpy(), np.arange(500) * 2)
+
+    mixed = pool.run("result = DataFrame({'a': [1.0], 'b': [[1, 2]]})", {}, "result")
+    assert list(mixed["b"].iloc[0]) == [1, 2]
+
+
+def test_cached_input_frames_are_not_resent(pool):
+    names = {"self": SimpleNamespace(_ticker_data=UNIVERSE)}
+    source = "result = len(self._ticker_data)"
+    assert pool.run(source, names, "result", attributes={"_ticker_data"}) == 4
+
+    worker = pool._idle.queue[0]
+    handles = []
+    kind, (key, shared) = pool._pack_value(UNIVERSE, worker, handles)
+    assert kind == "frame" and shared is None and handles == []
+    assert pool.run(source, names, "result", attributes={"_ticker_data"}) == 4
+
+
+def test_output_is_forwarded(pool, capsys):
+    assert pool.run("print('hello')\nresult = 1", {}, "result") == 1
+    assert capsys.readouterr().out == "hello\n"
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "import os\nresult = 1",
+        "result = open('/etc/passwd').read()",
+        "result = 1 / 0",
+    ],
+)
+def test_errors_surface_as_sandbox_errors(pool, source):
+    with pytest.raises(SandboxError):
+        pool.run(source, {}, "result")
+    assert pool.run("result = 2", {}, "result") == 2
+
+
+def test_timeout_replaces_the_worker(pool):
+    before = pool._all[0].process.pid
+    with pytest.raises(SandboxTimeout):
+        pool.run("n = 10**12\nfor i in range(n):\n    pass", {}, "result", timeout=1)
+    assert pool._all[0].process.pid != before
+    assert pool.run("result = 3", {}, "result") == 3
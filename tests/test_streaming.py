@@ -0,0 +1,103 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.registry import REGISTRY
+from strategies.streaming import (
+    StreamingBacktest,
+    csv_bars,
+    frame_bars,
+    parquet_bars,
+    simulated_bars,
+)
+from utils.metrics import capture_metrics
+
+
+def make_prices(seed=1, dates=300):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2020-01-01", periods=dates, name="Date")
+    steps = rng.normal(0.0, 0.02, size=(dates, 3))
+    return pd.DataFrame(
+        100 * np.exp(np.cumsum(steps, axis=0)), index=index, columns=["A", "B", "C"]
+    )
+
+
+CASES = [
+    ("long", {}),
+    ("short", {}),
+    ("long_short", {"long_tickers": ["A"], "short_tickers": ["C"]}),
+    ("momentum", {"window": 5}),
+    ("macd_trend_following", {}),
+    ("mean_reversion_bollinger_bands", {}),
+    ("mean_reversion_bollinger_bands", {"window": 10, "num_std": 1}),
+]
+
+
+@pytest.mark.parametrize("strategy, params", CASES)
+def test_streaming_matches_the_batch_strategy(strategy, params):
+    df = make_prices()
+    with capture_metrics():
+        batch = REGISTRY.get(strategy).func(df=df, **params)
+
+    backtest = StreamingBacktest(strategy, **params)
+    events = list(backtest.run(frame_bars(df)))
+    bars = events[: len(df)]
+
+    np.testing.assert_allclose([e.positions for e in bars], batch.positions)
+    np.testing.assert_allclose([e.total_return for e in bars], batch.total_return)
+    np.testing.assert_allclose(
+        [e.equity for e in bars], batch.equity * backtest.initial_equity
+    )
+    np.testing.assert_allclose([e.drawdown for e in bars], batch.drawdown)
+
+    fills = sorted(
+        (f.timestamp, f.ticker, f.side, f.position) for e in events for f in e.fills
+    )
+    trades = sorted(batch.trades.to_frame().itertuples(index=False, name=None))
+    assert fills == [(d, t, s, pytest.approx(p)) for d, t, s, p in trades]
+    assert backtest.summary()["# Trades"] == batch.metrics["# Trades"]
+    assert backtest.summary()["Return [%]"] == batch.metrics["Return [%]"]
+
+
+def test_file_sources_match_the_frame(tmp_path):
+    df = make_prices(dates=50)
+    df.to_csv(tmp_path / "prices.csv")
+    df.to_parquet(tmp_path / "prices.parquet")
+    expected = list(frame_bars(df))
+
+    for bars in (
+        csv_bars(str(tmp_path / "prices.csv"), chunksize=7),
+        parquet_bars(str(tmp_path / "prices.parquet"), batch_size=7),
+    ):
+        bars = list(bars)
+        assert [b.timestamp for b in bars] == [b.timestamp for b in expected]
+        assert all(b.tickers == ("A", "B", "C") for b in bars)
+        np.testing.assert_allclose([b.close for b in bars], [b.close for b in expected])
+
+
+def test_simulated_bars_are_reproducible():
+    first = [b.close for b in simulated_bars(["A", "B"], periods=20, seed=3)]
+    second = [b.close for b in simulated_bars(["A", "B"], periods=20, seed=3)]
+    np.testing.assert_array_equal(first, second)
+
+
+def test_summary_of_an_open_stream_counts_closing_trades():
+    backtest = StreamingBacktest("long")
+    for bar in list(frame_bars(make_prices()))[:10]:
+        backtest.step(bar)
+    # Three opening buys plus the sells that would close them now
+    assert backtest.summary()["# Trades"] == 6
+
+    backtest.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        backtest.step(next(frame_bars(make_prices())))
+
+
+def test_whole_sample_strategies_cannot_stream():
+    with pytest.raises(ValueError, match="cannot run bar by bar"):
+        StreamingBacktest("mean_reversion_moving_average")
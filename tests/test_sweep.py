@@ -0,0 +1,100 @@
+import importlib
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.registry import REGISTRY
+from utils.metrics import capture_metrics
+
+# The package re-exports the sweep() function under the module's name
+sweep_module = importlib.import_module("strategies.sweep")
+ParameterSweep = sweep_module.ParameterSweep
+
+
+def make_prices(seed=0, dates=250, tickers=3):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2021-01-01", periods=dates, name="Date")
+    steps = rng.normal(0.0003, 0.015, size=(dates, tickers))
+    return pd.DataFrame(
+        100 * np.exp(np.cumsum(steps, axis=0)),
+        index=index,
+        columns=[f"T{i}" for i in range(tickers)],
+    )
+
+
+SPACE = {"window": [3, 5, 10, 20], "num_std": [1, 2]}
+
+
+def test_parallel_sweep_matches_the_serial_one():
+    df = make_prices()
+    serial = ParameterSweep("mean_reversion_bollinger_bands", SPACE, workers=1).run(df)
+    parallel = ParameterSweep("mean_reversion_bollinger_bands", SPACE, workers=2).run(df)
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert len(serial) == 8 and serial["error"].isna().all()
+
+
+def test_rows_match_direct_strategy_calls():
+    df = make_prices(seed=1)
+    table = ParameterSweep("momentum", {"window": [2, 5, 15]}, workers=1).run(df)
+    for _, row in table.iterrows():
+        with capture_metrics() as results:
+            REGISTRY.get("momentum").func(df=df, window=int(row["window"]))
+        for name, value in results[-1].items():
+            if isinstance(value, float):
+                assert row[name] == pytest.approx(value, nan_ok=True)
+            else:
+                assert row[name] == value
+
+
+def test_rows_are_ranked():
+    space = {"window": [2, 5, 10, 20]}
+    table = ParameterSweep("momentum", space, workers=1).run(make_prices())
+    assert list(table.index) == [1, 2, 3, 4]
+    assert table["Sharpe Ratio"].is_monotonic_decreasing
+
+
+def test_the_input_frame_is_untouched():
+    df = make_prices()
+    original = df.copy()
+    ParameterSweep("mean_reversion_bollinger_bands", SPACE, workers=1).run(df)
+    pd.testing.assert_frame_equal(df, original)
+
+
+def test_random_search_is_reproducible():
+    space = {"window": (2, 30), "num_std": [1, 2, 3]}
+    first = ParameterSweep(
+        "mean_reversion_bollinger_bands", space, method="random", samples=20, seed=7
+    )
+    second = ParameterSweep(
+        "mean_reversion_bollinger_bands", space, method="random", samples=20, seed=7
+    )
+    combos = first.combinations()
+    assert combos == second.combinations()
+    assert all(2 <= combo["window"] <= 30 for combo in combos)
+    assert all(isinstance(combo["window"], int) for combo in combos)
+
+
+def test_failed_evaluations_are_reported_per_row():
+    df = make_prices()
+    table = ParameterSweep("momentum", {"window": [5, "x"]}, workers=1).run(df)
+    errors = table.set_index("window")["error"]
+    assert errors[5] is None
+    assert errors["x"].startswith("TypeError")
+
+
+@pytest.mark.parametrize(
+    "space, method, message",
+    [
+        ({"lookback": [1, 2]}, "grid", "has no argument"),
+        ({"window": (2, 10)}, "grid", "needs a list"),
+        ({"window": [2]}, "bayes", "Unknown search method"),
+    ],
+)
+def test_rejects_bad_spaces(space, method, message):
+    with pytest.raises(ValueError, match=message):
+        ParameterSweep("momentum", space, method=method)
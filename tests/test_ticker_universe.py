@@ -0,0 +1,140 @@
+import ast
+import sys
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+import pytest
+
+from utils import ticker_universe, type_convert
+from utils.ticker_universe import TickerUniverse
+from utils.type_convert import convert_data
+
+
+def converted_columns():
+    # The column lists convert_data works through, read from its source
+    tree = ast.parse(Path(type_convert.__file__).read_text())
+    return {
+        node.targets[0].id: [element.value for element in node.value.elts]
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.List)
+    }
+
+
+def make_csv(market_caps=(5e9, 2e10, 5e7)):
+    # The remote layout: one row per field, one column per ticker
+    columns = converted_columns()
+    tickers = ["AAA", "BBB", "CCC"]
+    fields = {}
+    for name in columns["string_columns"]:
+        fields[name] = [f"{name}-{t}" for t in tickers]
+    for name in columns["integer_columns"]:
+        fields[name] = [1000 * (k + 1) for k in range(3)]
+    for name in columns["float_columns"]:
+        fields[name] = [0.5 * (k + 1) for k in range(3)]
+    for name in columns["epoch_columns"]:
+        fields[name] = [1700000000 + 86400 * k for k in range(3)]
+    fields["marketCap"] = list(market_caps)
+    fields["zip"] = ["10001", "94105", "02139"]
+    fields["companyOfficers"] = ["[]", "[{'name': 'A'}]", "[]"]
+    frame = pd.DataFrame(fields, index=tickers).T
+    frame.index.name = "field"
+    return frame.to_csv()
+
+
+def reference_universe(text):
+    # What LoadData.__init__ used to do on every query
+    tickers = pd.read_csv(StringIO(text), header=0).transpose()
+    tickers.columns = tickers.iloc[0]
+    tickers = tickers.iloc[1:]
+    tickers.reset_index(inplace=True)
+    tickers.rename(columns={"index": "ticker"}, inplace=True)
+    return convert_data(tickers)
+
+
+class FakeRemote:
+    def __init__(self, text):
+        self.text = text
+        self.requests = 0
+        self.error = None
+
+    def get(self, url, timeout):
+        self.requests += 1
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(
+            text=self.text, content=self.text.encode(), raise_for_status=lambda: None
+        )
+
+
+@pytest.fixture
+def remote(monkeypatch):
+    remote = FakeRemote(make_csv())
+    monkeypatch.setattr(ticker_universe, "requests", remote)
+    return remote
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(ticker_universe, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def test_parse_matches_the_old_loader():
+    text = make_csv()
+    expected = reference_universe(text)
+    pd.testing.assert_frame_equal(TickerUniverse._parse(text), expected)
+    # Microcaps are dropped as before
+    assert list(expected["ticker"]) == ["AAA", "BBB"]
+
+
+def test_warm_loads_skip_the_network(tmp_path, remote, clock):
+    universe = TickerUniverse(tmp_path)
+    expected = reference_universe(remote.text)
+    pd.testing.assert_frame_equal(universe.data, expected)
+    pd.testing.assert_frame_equal(universe.data, expected)
+    assert remote.requests == 1
+
+    # A new process reads the converted frame from disk
+    pd.testing.assert_frame_equal(TickerUniverse(tmp_path).data, expected)
+    assert remote.requests == 1
+
+
+def test_expired_cache_is_only_reparsed_when_it_changed(tmp_path, remote, clock, monkeypatch):
+    universe = TickerUniverse(tmp_path, ttl=60)
+    first = universe.data
+    parses = []
+    parse = TickerUniverse._parse
+
+    def counted(text):
+        parses.append(text)
+        return parse(text)
+
+    monkeypatch.setattr(TickerUniverse, "_parse", staticmethod(counted))
+
+    clock.now += 61
+    assert universe.data is first
+    assert remote.requests == 2 and parses == []
+
+    remote.text = make_csv(market_caps=(5e9, 5e7, 2e10))
+    clock.now += 61
+    assert list(universe.data["ticker"]) == ["AAA", "CCC"]
+    assert len(parses) == 1
+    # The refreshed frame is the one a new process now reads
+    assert list(TickerUniverse(tmp_path, ttl=60).data["ticker"]) == ["AAA", "CCC"]
+
+
+def test_failed_refresh_falls_back_to_the_cache(tmp_path, remote, clock, capsys):
+    universe = TickerUniverse(tmp_path, ttl=60)
+    expected = universe.data.copy()
+    remote.error = OSError("offline")
+    clock.now += 61
+    pd.testing.assert_frame_equal(universe.data, expected)
+    assert "using cached ticker data" in capsys.readouterr().out
+
+    with pytest.raises(RuntimeError, match="Error loading ticker data"):
+        TickerUniverse(tmp_path / "empty").data
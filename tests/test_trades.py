@@ -0,0 +1,152 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.technical import TechnicalAnalysis
+from strategies.traditional import Traditional
+from utils.metrics import capture_metrics
+from utils.trades import BUY, SELL, TradeLog
+
+
+def make_positions(seed=0, dates=200, tickers=3):
+    # Forward-filled -1/0/1 positions with a NaN warm-up, as the kernels produce
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2021-01-01", periods=dates, name="Date")
+    values = rng.choice([-1.0, 0.0, 1.0, np.nan], size=(dates, tickers), p=[0.1, 0.1, 0.1, 0.7])
+    positions = pd.DataFrame(values, index=index, columns=[f"T{i}" for i in range(tickers)])
+    positions = positions.ffill()
+    positions.iloc[:10] = np.nan
+    return positions
+
+
+def reference_signals(positions):
+    # The object-dtype "{ticker}_signal" columns the strategies used to write
+    signals = {}
+    for stock in positions.columns:
+        position = positions[stock]
+        signals[f"{stock}_signal"] = np.where(
+            position != position.shift(),
+            np.where(position == 1, "Buy", np.where(position == -1, "Sell", None)),
+            None,
+        )
+    return pd.DataFrame(signals, index=positions.index)
+
+
+def reference_trade_count(signals):
+    # How the old get_metrics counted trades
+    return (signals == "Buy").sum().sum() + (signals == "Sell").sum().sum()
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_from_positions_matches_the_signal_columns(seed):
+    positions = make_positions(seed)
+    log = TradeLog.from_positions(positions.to_numpy(), positions.index, list(positions.columns))
+    expected = reference_signals(positions)
+
+    pd.testing.assert_frame_equal(log.signal_frame(), expected)
+    assert len(log) == reference_trade_count(expected)
+    assert log.buys == (expected == "Buy").sum().sum()
+    assert log.sells == (expected == "Sell").sum().sum()
+
+
+def test_strategy_trades_match_the_signal_columns():
+    rng = np.random.default_rng(3)
+    index = pd.bdate_range("2021-01-01", periods=250, name="Date")
+    df = pd.DataFrame(
+        100 * np.exp(np.cumsum(rng.normal(0, 0.02, size=(250, 3)), axis=0)),
+        index=index,
+        columns=["A", "B", "C"],
+    )
+    for run in (TechnicalAnalysis.momentum, TechnicalAnalysis.macd_trend_following):
+        with capture_metrics():
+            result = run(df=df)
+        positions = pd.DataFrame(result.positions, index=result.index, columns=df.columns)
+        expected = reference_signals(positions)
+        pd.testing.assert_frame_equal(result.signals(), expected)
+        assert result.metrics["# Trades"] == reference_trade_count(expected)
+
+
+@pytest.mark.parametrize(
+    "strategy, params, sides",
+    [
+        ("long", {}, {"A": "Buy", "B": "Buy", "C": "Buy"}),
+        ("short", {}, {"A": "Sell", "B": "Sell", "C": "Sell"}),
+        (
+            "long_short",
+            {"long_tickers": ["A"], "short_tickers": ["C"]},
+            {"A": "Buy", "C": "Sell"},
+        ),
+    ],
+)
+def test_round_trips_match_the_hold_signals(strategy, params, sides):
+    index = pd.bdate_range("2021-01-01", periods=20, name="Date")
+    df = pd.DataFrame(
+        np.linspace(100, 120, 60).reshape(20, 3), index=index, columns=["A", "B", "C"]
+    )
+    with capture_metrics():
+        result = getattr(Traditional, strategy)(df=df, **params)
+
+    # The old code marked the first bar with the opening side and the last
+    # with the closing one, and nothing for untraded tickers
+    opposite = {"Buy": "Sell", "Sell": "Buy"}
+    signals = result.signals()
+    for ticker in df.columns:
+        column = signals[f"{ticker}_signal"]
+        if ticker in sides:
+            assert column.iloc[0] == sides[ticker]
+            assert column.iloc[-1] == opposite[sides[ticker]]
+            assert column.iloc[1:-1].isna().all()
+        else:
+            assert column.isna().all()
+    assert result.metrics["# Trades"] == 2 * len(sides)
+
+
+def test_from_signals_round_trips():
+    positions = make_positions()
+    log = TradeLog.from_positions(positions.to_numpy(), positions.index, list(positions.columns))
+    parsed = TradeLog.from_signals(log.signal_frame())
+    assert parsed.tickers == log.tickers
+    order = np.lexsort((log.ticker_ids, log.rows))
+    np.testing.assert_array_equal(parsed.rows, log.rows[order])
+    np.testing.assert_array_equal(parsed.ticker_ids, log.ticker_ids[order])
+    np.testing.assert_array_equal(parsed.sides, log.sides[order])
+
+
+def test_aligned_drops_and_renumbers_trades():
+    positions = make_positions()
+    log = TradeLog.from_positions(positions.to_numpy(), positions.index, list(positions.columns))
+    later = positions.index[50:]
+    aligned = log.aligned(later)
+    assert aligned.index.equals(later)
+    assert len(aligned) == int(np.count_nonzero(log.rows >= 50))
+    np.testing.assert_array_equal(later[aligned.rows], log.index[log.rows[log.rows >= 50]])
+    assert log.aligned(positions.index) is log
+
+
+def test_for_ticker_and_to_frame():
+    index = pd.bdate_range("2021-01-01", periods=5)
+    positions = np.array(
+        [[np.nan, 1], [1, 1], [1, -1], [-0.5, -1], [0, 0]], dtype=float
+    )
+    log = TradeLog.from_positions(positions, index, ["A", "B"])
+
+    dates, sides = log.for_ticker("A")
+    assert list(dates) == [index[1], index[3]]
+    assert list(sides) == [BUY, SELL]
+    dates, sides = log.for_ticker("missing")
+    assert len(dates) == len(sides) == 0
+
+    frame = log.to_frame()
+    assert list(frame.columns) == ["Date", "Ticker", "Side", "Position"]
+    assert list(zip(frame["Date"], frame["Ticker"], frame["Side"])) == [
+        (index[0], "B", "Buy"),
+        (index[1], "A", "Buy"),
+        (index[2], "B", "Sell"),
+        (index[3], "A", "Sell"),
+    ]
+    np.testing.assert_allclose(frame["Position"], [1, 1, -1, -0.5])
@@ -0,0 +1,121 @@
+import importlib
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.registry import REGISTRY
+from utils.metrics import capture_metrics, get_metrics
+from utils.plot import defer_plots
+
+# The package re-exports the walk_forward() function under the module's name
+walk_forward_module = importlib.import_module("strategies.walk_forward")
+WalkForward = walk_forward_module.WalkForward
+
+
+def make_prices(seed=0, dates=400, tickers=3):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2019-01-01", periods=dates, name="Date")
+    steps = rng.normal(0.0003, 0.015, size=(dates, tickers))
+    return pd.DataFrame(
+        100 * np.exp(np.cumsum(steps, axis=0)),
+        index=index,
+        columns=[f"T{i}" for i in range(tickers)],
+    )
+
+
+def full_returns(df, strategy, params):
+    with capture_metrics(), defer_plots():
+        result = REGISTRY.get(strategy).func(df=df, **params)
+    return pd.Series(result.total_return, index=result.index).reindex(df.index)
+
+
+def sharpe(returns):
+    # The get_metrics Sharpe ratio of a return slice
+    frame = pd.DataFrame({"Total_Return": returns})
+    frame["Cumulative_Return"] = (1 + frame["Total_Return"]).cumprod()
+    frame["Drawdown"] = frame["Cumulative_Return"] / frame["Cumulative_Return"].cummax() - 1
+    with capture_metrics() as results:
+        get_metrics(frame, "reference")
+    return results[-1]["Sharpe Ratio"]
+
+
+def test_split_tiles_the_test_windows():
+    walk = WalkForward("momentum", {"window": [5]}, train_size=100, test_size=30)
+    windows = walk.split(265)
+    assert windows[0] == (0, 100, 130)
+    assert windows[-1] == (150, 250, 265)
+    # Test windows are back to back and never overlap their training slice
+    for (_, split, stop), (_, next_split, _) in zip(windows, windows[1:]):
+        assert stop == next_split
+    assert all(start < split < stop for start, split, stop in windows)
+
+    with pytest.raises(ValueError, match="Need more than 100 rows"):
+        walk.split(100)
+    with pytest.raises(ValueError, match="step must be at least"):
+        WalkForward("momentum", {"window": [5]}, test_size=30, step=10)
+
+
+def test_matches_a_brute_force_walk_forward():
+    df = make_prices()
+    space = {"window": [2, 5, 10, 20]}
+    walk = WalkForward("momentum", space, train_size=120, test_size=40, workers=1)
+    metrics = walk.run(df)
+    # Trades are counted from the out-of-sample positions
+    assert metrics["# Trades"] == len(walk.trades) > 0
+
+    # Causal strategies run once over the whole history and are sliced per window
+    returns = [full_returns(df, "momentum", {"window": w}) for w in space["window"]]
+    expected = []
+    for chosen, (start, split, stop) in zip(walk.windows["window"], walk.split(len(df))):
+        scores = [sharpe(r.iloc[start:split]) for r in returns]
+        # Ties go to the first combination
+        best = int(np.argmax(scores))
+        assert chosen == space["window"][best]
+        expected.append(returns[best].iloc[split:stop])
+    assert walk.windows["Test Start"].tolist() == [
+        df.index[split] for _, split, _ in walk.split(len(df))
+    ]
+
+    pd.testing.assert_series_equal(
+        walk.equity["Total_Return"], pd.concat(expected), check_names=False
+    )
+
+
+def test_parallel_run_matches_the_serial_one():
+    df = make_prices(seed=1)
+    space = {"window": [10, 20], "num_std": [1, 2]}
+    serial = WalkForward(
+        "mean_reversion_bollinger_bands", space, train_size=150, test_size=50, workers=1
+    )
+    parallel = WalkForward(
+        "mean_reversion_bollinger_bands", space, train_size=150, test_size=50, workers=2
+    )
+    assert serial.run(df) == parallel.run(df)
+    pd.testing.assert_frame_equal(serial.windows, parallel.windows)
+    pd.testing.assert_frame_equal(serial.equity, parallel.equity)
+    assert len(serial.trades) == len(parallel.trades) > 0
+
+
+def test_fitted_strategies_do_not_look_ahead():
+    df = make_prices(seed=2)
+    walk = WalkForward(
+        "mean_reversion_moving_average", {}, train_size=150, test_size=50, workers=1
+    )
+    walk.run(df)
+    first = walk.equity["Total_Return"].iloc[:50]
+
+    # Rewriting everything after the first test window must not change it
+    changed = df.copy()
+    changed.iloc[200:] *= np.linspace(1, 3, len(df) - 200)[:, None]
+    walk.run(changed)
+    pd.testing.assert_series_equal(walk.equity["Total_Return"].iloc[:50], first)
+
+
+def test_whole_sample_strategies_without_fit_are_rejected():
+    with pytest.raises(ValueError, match="cannot be walked forward"):
+        WalkForward("pairs_scan", {"top_k": [5]})
@@ -1,30 +1,63 @@
+from dataclasses import dataclass
+from typing import Any, Mapping, Optional, Tuple
 from pandas import DataFrame
 import groq
-import openai
 from utils.load_data import LoadData
-from strategies import Traditional, TechnicalAnalysis, MachineLearning
+from utils.plot import PlotSpec, defer_plots
+from utils.sandbox import SandboxPool
+from utils.trades import TradeLog
+from strategies import Traditional, TechnicalAnalysis, MachineLearning, StrategyResult
+
+
+@dataclass(frozen=True)
+class QueryResult:
+    # Everything one query produced, handed to the caller instead of printed
+    query: str
+    strategy: str
+    metrics: Mapping[str, Any]
+    # Unrendered plots; render() each one when it is about to be shown
+    plots: Tuple[PlotSpec, ...]
+    trades: TradeLog
+    # Seconds per pipeline stage, plus "total"
+    stage_timings: Mapping[str, float]
+    result: StrategyResult
+    data: DataFrame
+
+    def __str__(self):
+        return f"Result of query '{self.query}' using {self.strategy}."
 
 
 class TraderEngine:
     def __str__(self):
         return f"Load tickers data from Yahoo Finance."
 
-    def __init__(self):
+    def __init__(self, use_sandbox: bool = False, api_key: Optional[str] = None):
+        # Default key for queries that do not bring their own
+        self._api_key = api_key
         self.Traditional = Traditional()
         self.TechnicalAnalysis = TechnicalAnalysis()
+        # Workers start importing pandas now so the first query does not wait
+        self._sandbox = SandboxPool.instance() if use_sandbox else None
+        if self._sandbox is not None:
+            self._sandbox.start()
+
+    def query(self, query: str, api_key: Optional[str] = None) -> QueryResult:
+        # Load the data; each query keeps its own loader and key so queries
+        # can run concurrently
+        data_loader = LoadData(query, sandbox=self._sandbox, api_key=api_key or self._api_key)
+        with defer_plots():
+            data_loader.execute()
 
-    def set_api_key(self, api_key: str):
-        openai.api_key = api_key
-
-    def query(self, query: str) -> str:
-        # Load the data
-        self._data_loader = LoadData(query)
-        self._data_loader.execute()
-
-    @property
-    def strategy_data(self) -> DataFrame:
-        df = self._data_loader.strategy_data
-        df = df[
-            [ticker for ticker in df.columns if ticker != "Date" and "_" not in ticker]
-        ]
-        return df
\ No newline at end of file
+        result = data_loader.strategy_result
+        if not isinstance(result, StrategyResult):
+            raise RuntimeError("Strategy call did not return a strategy result.")
+        return QueryResult(
+            query=query,
+            strategy=result.strategy,
+            metrics=result.metrics,
+            plots=result.plots,
+            trades=result.trades,
+            stage_timings=data_loader.stage_timings,
+            result=result,
+            data=data_loader.strategy_data,
+        )
@@ -1,20 +1,26 @@
 import sys
+import multiprocessing
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                            QLineEdit, QPushButton, QLabel, QTableWidget, QTableWidgetItem,
                            QHeaderView, QProgressBar, QTabWidget, QScrollArea, QHBoxLayout)
 from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QRectF
 from PyQt6.QtGui import QFont, QPainter, QPen, QColor, QIcon
+from collections import OrderedDict
 from trader_engine import TraderEngine
-from io import StringIO
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
 class PlotTabWidget(QWidget):
+    # Rendered figures kept around for quick back-and-forth navigation
+    max_rendered = 4
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.current_plot = 0
+        # Plot specs; a spec is only rendered when it is navigated to
         self.plots = []
+        self._rendered = OrderedDict()
         self.setup_ui()
         
     def setup_ui(self):
@@ -116,12 +122,9 @@ class PlotTabWidget(QWidget):
         layout.addWidget(scroll_area)
         layout.addWidget(nav_container)
 
-    def add_plot(self, figure, title):
-        # Create canvas for the matplotlib figure
-        canvas = FigureCanvas(figure)
-        
-        # Store the plot
-        self.plots.append((canvas, title))
+    def add_plot(self, spec):
+        # Store the spec; nothing is drawn until the plot is shown
+        self.plots.append(spec)
         
         # Update navigation controls
         if len(self.plots) == 1:
@@ -133,6 +136,25 @@ class PlotTabWidget(QWidget):
         
         self.update_counter()
 
+    def _canvas(self, index):
+        # Least recently shown canvases are closed once over max_rendered
+        if index in self._rendered:
+            self._rendered.move_to_end(index)
+            return self._rendered[index]
+
+        canvas = FigureCanvas(self.plots[index].render())
+        self._rendered[index] = canvas
+        while len(self._rendered) > self.max_rendered:
+            _, evicted = self._rendered.popitem(last=False)
+            self._close_canvas(evicted)
+        return canvas
+
+    def _close_canvas(self, canvas):
+        canvas.setParent(None)
+        plt.close(canvas.figure)
+        canvas.figure.clear()
+        canvas.deleteLater()
+
     def show_plot(self, index):
         if not self.plots:
             return
@@ -141,8 +163,8 @@ class PlotTabWidget(QWidget):
         for i in reversed(range(self.plot_layout.count())): 
             self.plot_layout.itemAt(i).widget().setParent(None)
         
-        # Show new plot
-        canvas, title = self.plots[index]
+        # Render the plot on first view, or reuse its cached canvas
+        canvas = self._canvas(index)
         self.plot_layout.addWidget(canvas)
         self.current_plot = index
         
@@ -186,6 +208,11 @@ class PlotTabWidget(QWidget):
         # Clear layout
         for i in reversed(range(self.plot_layout.count())): 
             self.plot_layout.itemAt(i).widget().setParent(None)
+
+        # Close every rendered figure
+        while self._rendered:
+            _, canvas = self._rendered.popitem()
+            self._close_canvas(canvas)
         
         # Reset navigation
         self.prev_button.setEnabled(False)
@@ -193,7 +220,9 @@ class PlotTabWidget(QWidget):
         self.update_counter()
 
 class AnalysisThread(QThread):
-    finished = pyqtSignal(str, list)
+    # Emits the engine's QueryResult; nothing is read back from stdout, so
+    # several analyses can run at once
+    finished = pyqtSignal(object)
     error = pyqtSignal(str)
 
     def __init__(self, trader, api_key, query):
@@ -201,37 +230,13 @@ class AnalysisThread(QThread):
         self.trader = trader
         self.api_key = api_key
         self.query = query
-        self.output = StringIO()
-        self.figures = []
 
     def run(self):
         try:
-            old_stdout = sys.stdout
-            sys.stdout = self.output
-
-            # Store the current figure count
-            initial_figures = plt.get_fignums()
-
             # Execute analysis
-            self.trader.set_api_key(self.api_key)
-            self.trader.query(self.query)
-
-            # Get all new figures created during analysis
-            final_figures = plt.get_fignums()
-            new_figures = [plt.figure(num) for num in final_figures if num not in initial_figures]
-            
-            # Store figures and close them to prevent memory leaks
-            self.figures = new_figures
-            
-            output = self.output.getvalue()
-            self.finished.emit(output, self.figures)
-
-            sys.stdout = old_stdout
-
+            self.finished.emit(self.trader.query(self.query, api_key=self.api_key))
         except Exception as e:
             self.error.emit(str(e))
-        finally:
-            sys.stdout = old_stdout
 
 class LoadingSpinner(QWidget):
     def __init__(self, parent=None):
@@ -320,18 +325,12 @@ class MetricsTable(QTableWidget):
             }
         ''')
 
-    def update_metrics(self, text):
-        metrics = {}
-        for line in text.split('\n'):
-            if ':' in line:
-                key, value = line.split(':', 1)
-                metrics[key.strip()] = value.strip()
-
+    def update_metrics(self, metrics):
         self.setRowCount(len(metrics))
 
         for i, (key, value) in enumerate(metrics.items()):
             metric_item = QTableWidgetItem(key)
-            value_item = QTableWidgetItem(value)
+            value_item = QTableWidgetItem(str(value))
             
             metric_item.setFont(QFont('Segoe UI', 10))
             value_item.setFont(QFont('Segoe UI', 10))
@@ -418,7 +417,7 @@ class MainTabWidget(QTabWidget):
 class TradingApp(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.trader = TraderEngine()
+        self.trader = TraderEngine(use_sandbox=True)
         self.analysis_thread = None
         self.initUI()
         
@@ -588,15 +587,16 @@ class TradingApp(QMainWindow):
         self.analysis_thread.error.connect(self.handle_analysis_error)
         self.analysis_thread.start()
 
-    def handle_analysis_complete(self, output, figures):
-        self.metrics_table.update_metrics(output)
+    def handle_analysis_complete(self, result):
+        self.metrics_table.update_metrics(result.metrics)
         
-        for i, fig in enumerate(figures):
-            self.plot_tabs.add_plot(fig, f'Plot {i+1}')
+        for spec in result.plots:
+            self.plot_tabs.add_plot(spec)
             
         self.main_tabs.setCurrentIndex(1)
         
-        self.status_label.setText('Analysis completed successfully')
+        total = result.stage_timings.get('total', 0.0)
+        self.status_label.setText(f'Analysis completed successfully in {total:.1f}s')
         self.status_label.setStyleSheet('color: #22c55e;')
         self.execute_button.setEnabled(True)
         self.spinner.stop()
@@ -608,6 +608,7 @@ class TradingApp(QMainWindow):
         self.spinner.stop()
 
 def main():
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     app.setFont(QFont('Segoe UI', 10))
     window = TradingApp()
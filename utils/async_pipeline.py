@@ -0,0 +1,82 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Dict
+
+from utils.llm_cache import CompletionCache
+
+
+class AsyncPipeline:
+    def __init__(self, helper: "LLMHelper", client: Any) -> None:
+        self._helper = helper
+        self._client = client
+
+    def __str__(self):
+        return "Concurrent multi-call LLM pipeline."
+
+    async def run(self) -> Dict[str, float]:
+        helper = self._helper
+
+        # Strategy identification only needs the prompt, so it runs alongside
+        # the universe filter
+        pandas_code, identifier = await asyncio.gather(
+            self._stage(
+                "pandas_code_generate",
+                self._complete("pandas_code_generate", **helper._pandas_code_request()),
+            ),
+            self._stage(
+                "strategy_identify",
+                self._complete("strategy_identifier", **helper._identify_strategy_request()),
+            ),
+        )
+        helper._pandas_code = pandas_code
+        helper._strategy_identifier = identifier
+        helper._check_strategy_identifier()
+
+        await self._stage(
+            "pandas_code_execute", asyncio.to_thread(helper._pandas_code_execute)
+        )
+
+        # Prices download while the strategy arguments are still being generated
+        _, strategy_call = await asyncio.gather(
+            self._load_prices(),
+            self._stage(
+                "strategy_call_generate",
+                self._complete("strategy_call", **helper._call_strategy_request()),
+            ),
+        )
+        helper._strategy_function_call = strategy_call
+        helper._compile_strategy_call()
+
+        with helper._timed("strategy_execute"):
+            helper._gpt_call_strategy_execute()
+        return helper.stage_timings
+
+    async def _load_prices(self) -> None:
+        helper = self._helper
+        helper._gpt_code = await self._stage(
+            "gpt_code_generate",
+            self._complete("gpt_code_generate", **helper._gpt_code_request()),
+        )
+        await self._stage("gpt_code_execute", asyncio.to_thread(helper._gpt_code_execute))
+
+    async def _complete(self, prompt_key: str, **kwargs) -> str:
+        helper = self._helper
+        messages, cache_key = helper._prepare_request(prompt_key, **kwargs)
+        cache = CompletionCache.instance()
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        response = await self._client.chat.completions.create(
+            model=helper.llm_model, messages=messages
+        )
+        content = response.choices[0].message.content
+        cache.put(cache_key, content, helper.llm_model, prompt_key)
+        return content
+
+    async def _stage(self, name: str, awaitable: Awaitable[Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self._helper._stage_timings[name] = round(time.perf_counter() - started, 4)
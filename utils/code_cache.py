@@ -0,0 +1,303 @@
+import ast
+import builtins
+import hashlib
+import threading
+from collections import OrderedDict
+from types import CodeType
+from typing import Iterable, Optional, Set
+
+SAFE_BUILTINS = {
+    "abs", "all", "any", "bool", "dict", "enumerate", "filter", "float", "int",
+    "isinstance", "len", "list", "map", "max", "min", "print", "range", "round",
+    "set", "sorted", "str", "sum", "tuple", "zip",
+}
+
+SAFE_MODULES = {"datetime", "numpy", "pandas", "math"}
+
+# Every attribute a snippet touches, and so every method it calls, must be one
+# of these pandas, numpy and datetime members (or one the caller adds, such as
+# the strategy names). File I/O, eval/query and submodules are left out.
+SAFE_ATTRIBUTES = {
+    # pandas and numpy functions and types
+    "DataFrame", "Series", "Timestamp", "Timedelta", "DateOffset", "NaT", "NA",
+    "bdate_range", "concat", "date_range", "isna", "isnull", "merge", "notna",
+    "notnull", "to_datetime", "to_numeric", "to_timedelta",
+    "arange", "array", "clip", "exp", "float64", "inf", "int64", "isnan", "log",
+    "maximum", "mean", "median", "minimum", "nan", "percentile", "sign", "sqrt",
+    "where",
+    # datetime
+    "date", "datetime", "days", "day", "month", "now", "strftime", "timedelta",
+    "today", "weekday", "year",
+    # DataFrame and Series members
+    "T", "abs", "agg", "aggregate", "all", "any", "apply", "assign", "astype",
+    "at", "bfill", "between", "columns", "copy", "corr", "count", "cov",
+    "cummax", "cummin", "cumprod", "cumsum", "describe", "diff", "drop",
+    "drop_duplicates", "dropna", "dt", "dtype", "dtypes", "duplicated", "empty",
+    "ewm", "expanding", "ffill", "fillna", "first", "groupby", "head", "iat",
+    "idxmax", "idxmin", "iloc", "index", "isin", "items", "join", "keys", "last",
+    "loc", "map", "mask", "max", "min", "name", "nlargest", "nsmallest",
+    "nunique", "pct_change", "quantile", "rank", "reindex", "rename", "rolling",
+    "round", "set_index", "shape", "shift", "size", "sort_index", "sort_values",
+    "std", "str", "sum", "tail", "tolist", "to_list", "unique", "value_counts",
+    "values", "var",
+    # .str accessor
+    "contains", "endswith", "fullmatch", "len", "lower", "match", "split",
+    "startswith", "strip", "upper",
+}
+
+# Submodules reachable from pandas and numpy (pd.io.common.os, np.lib, ...)
+MODULE_ATTRIBUTES = {
+    "api", "builtins", "common", "compat", "core", "ctypeslib", "f2py", "io",
+    "lib", "os", "plotting", "subprocess", "sys", "testing", "util",
+}
+
+# Type conversions that share the to_ prefix with the writers (to_csv, to_pickle)
+SAFE_CONVERSIONS = {"to_datetime", "to_list", "to_numeric", "to_timedelta"}
+
+# Methods that look up a method by name when given a string (df.agg("sum"),
+# df.apply("to_csv", path=...)), so their string arguments are member names
+DISPATCH_METHODS = {"agg", "aggregate", "apply", "applymap", "map", "pipe", "transform"}
+
+# Largest literal range() a snippet may iterate over
+MAX_RANGE = 10**6
+
+FORBIDDEN_NODES = (
+    ast.While,
+    ast.AsyncFunctionDef,
+    ast.AsyncFor,
+    ast.AsyncWith,
+    ast.Await,
+    ast.ClassDef,
+    ast.Global,
+    ast.Nonlocal,
+    ast.Try,
+    ast.With,
+    ast.Yield,
+    ast.YieldFrom,
+)
+
+
+class CodeValidationError(ValueError):
+    pass
+
+
+def _import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name.split(".")[0] not in SAFE_MODULES:
+        raise ImportError(f"import of '{name}' is not allowed")
+    return builtins.__import__(name, globals, locals, fromlist, level)
+
+
+# The __builtins__ snippets execute with: the validated names and nothing
+# else, so a name the validator missed still cannot reach open() or eval()
+SNIPPET_BUILTINS = {name: getattr(builtins, name) for name in SAFE_BUILTINS}
+SNIPPET_BUILTINS["__import__"] = _import
+
+
+def _literal_int(node: ast.AST) -> Optional[int]:
+    # Value of an integer literal or constant arithmetic on literals (10**12),
+    # None for anything computed at run time
+    if isinstance(node, ast.Constant) and type(node.value) is int:
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        value = _literal_int(node.operand)
+        return None if value is None else -value
+    if isinstance(node, ast.BinOp):
+        left, right = _literal_int(node.left), _literal_int(node.right)
+        if left is None or right is None:
+            return None
+        if isinstance(node.op, ast.Pow):
+            # Capped so validating 10**10**10 does not compute it
+            return abs(left) ** min(right, 64) if right >= 0 else 0
+        if isinstance(node.op, ast.LShift):
+            return left << min(right, 64) if right >= 0 else 0
+        operations = {ast.Add: int.__add__, ast.Sub: int.__sub__, ast.Mult: int.__mul__}
+        operation = operations.get(type(node.op))
+        return None if operation is None else operation(left, right)
+    return None
+
+
+class _SnippetValidator(ast.NodeVisitor):
+    def __init__(self, allowed_names: Set[str], allowed_attributes: Set[str]) -> None:
+        self._allowed = set(allowed_names) | SAFE_BUILTINS
+        self._attributes = set(allowed_attributes) | SAFE_ATTRIBUTES
+        self._assigned: Set[str] = set()
+        self._loaded = []
+
+    def check(self, tree: ast.AST) -> None:
+        self.visit(tree)
+        # Names are checked after the walk so later assignments count
+        for node in self._loaded:
+            if node.id not in self._allowed and node.id not in self._assigned:
+                raise CodeValidationError(f"name '{node.id}' is not allowed")
+
+    def generic_visit(self, node: ast.AST) -> None:
+        if isinstance(node, FORBIDDEN_NODES):
+            raise CodeValidationError(f"{type(node).__name__} statements are not allowed")
+        super().generic_visit(node)
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self._check_module(alias.name)
+            self._assigned.add((alias.asname or alias.name).split(".")[0])
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        self._check_module(node.module or "")
+        for alias in node.names:
+            self._assigned.add(alias.asname or alias.name)
+
+    def _check_member(self, name: str) -> None:
+        if name.startswith("__"):
+            raise CodeValidationError(f"attribute '{name}' is not allowed")
+        if name in MODULE_ATTRIBUTES:
+            raise CodeValidationError(f"module attribute '{name}' is not allowed")
+        if name.startswith("read_") or (name.startswith("to_") and name not in SAFE_CONVERSIONS):
+            raise CodeValidationError(f"I/O method '{name}' is not allowed")
+        if name not in self._attributes:
+            raise CodeValidationError(f"attribute '{name}' is not allowed")
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        self._check_member(node.attr)
+        self.generic_visit(node)
+
+    def _check_dispatch(self, node: ast.Call) -> None:
+        # String arguments of agg/apply/... name the methods pandas will call,
+        # directly or inside a list ("sum", ["min", "max"]) or dict of columns.
+        # map's dicts are value mappings, not method names.
+        method = node.func.attr
+        functions = [keyword.value for keyword in node.keywords if keyword.arg in ("func", "arg")]
+        for argument in node.args + functions:
+            values = [argument]
+            if isinstance(argument, (ast.List, ast.Tuple, ast.Set)):
+                values = argument.elts
+            elif isinstance(argument, ast.Dict) and method != "map":
+                values = []
+                for value in argument.values:
+                    values.extend(value.elts if isinstance(value, (ast.List, ast.Tuple)) else [value])
+            for value in values:
+                if isinstance(value, ast.Constant) and isinstance(value.value, str):
+                    self._check_member(value.value)
+
+    def visit_Call(self, node: ast.Call) -> None:
+        # Only named functions and methods, whose names are checked above
+        if not isinstance(node.func, (ast.Name, ast.Attribute)):
+            raise CodeValidationError("calls must name a function or method")
+        if isinstance(node.func, ast.Attribute) and node.func.attr in DISPATCH_METHODS:
+            self._check_dispatch(node)
+        if isinstance(node.func, ast.Name) and node.func.id == "range":
+            for argument in node.args:
+                value = _literal_int(argument)
+                if value is not None and abs(value) > MAX_RANGE:
+                    raise CodeValidationError(f"range over {value} items is too large")
+        self.generic_visit(node)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if node.id.startswith("__"):
+            raise CodeValidationError(f"name '{node.id}' is not allowed")
+        if isinstance(node.ctx, ast.Load):
+            self._loaded.append(node)
+        else:
+            self._assigned.add(node.id)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        self._assigned.add(node.name)
+        self._add_arguments(node.args)
+        self.generic_visit(node)
+
+    def visit_Lambda(self, node: ast.Lambda) -> None:
+        self._add_arguments(node.args)
+        self.generic_visit(node)
+
+    def _add_arguments(self, args: ast.arguments) -> None:
+        for arg in args.posonlyargs + args.args + args.kwonlyargs:
+            self._assigned.add(arg.arg)
+        for arg in (args.vararg, args.kwarg):
+            if arg is not None:
+                self._assigned.add(arg.arg)
+
+    @staticmethod
+    def _check_module(name: str) -> None:
+        if name.split(".")[0] not in SAFE_MODULES:
+            raise CodeValidationError(f"import of '{name}' is not allowed")
+
+
+class CodeCache:
+    # Compiled snippets kept in memory, keyed by content hash
+    max_entries = 512
+    # Generated snippets are one-liners to a few dozen lines
+    max_nodes = 5000
+
+    _instance: Optional["CodeCache"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_entries: Optional[int] = None) -> None:
+        if max_entries is not None:
+            self.max_entries = max_entries
+        self._codes: "OrderedDict[str, CodeType]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __str__(self):
+        return f"Compiled snippet cache ({len(self._codes)} entries)."
+
+    @classmethod
+    def instance(cls) -> "CodeCache":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def compile(
+        self,
+        source: str,
+        allowed_names: Iterable[str],
+        label: str = "snippet",
+        allowed_attributes: Iterable[str] = (),
+    ) -> CodeType:
+        allowed = sorted(set(allowed_names))
+        attributes = sorted(set(allowed_attributes))
+        payload = "\0".join([label, source] + allowed + ["\1"] + attributes)
+        key = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+        with self._lock:
+            code = self._codes.get(key)
+            if code is not None:
+                self._codes.move_to_end(key)
+                self.hits += 1
+                return code
+
+        code = self._validate_and_compile(source, set(allowed), set(attributes), label)
+
+        with self._lock:
+            self.misses += 1
+            self._codes[key] = code
+            while len(self._codes) > self.max_entries:
+                self._codes.popitem(last=False)
+        return code
+
+    def _validate_and_compile(
+        self, source: str, allowed: Set[str], attributes: Set[str], label: str
+    ) -> CodeType:
+        try:
+            tree = ast.parse(source, filename=f"<{label}>", mode="exec")
+        except SyntaxError as e:
+            raise CodeValidationError(f"Rejected {label}: invalid syntax ({e.msg})")
+
+        if sum(1 for _ in ast.walk(tree)) > self.max_nodes:
+            raise CodeValidationError(f"Rejected {label}: snippet is too large")
+        try:
+            _SnippetValidator(allowed, attributes).check(tree)
+        except CodeValidationError as e:
+            raise CodeValidationError(f"Rejected {label}: {str(e)}")
+
+        return compile(tree, filename=f"<{label}>", mode="exec")
+
+
+def compile_snippet(
+    source: str,
+    allowed_names: Iterable[str],
+    label: str = "snippet",
+    allowed_attributes: Iterable[str] = (),
+) -> CodeType:
+    return CodeCache.instance().compile(source, allowed_names, label, allowed_attributes)
@@ -0,0 +1,5 @@
+import os
+from pathlib import Path
+
+# Root directory for every on-disk cache (ticker universe, prices, LLM responses)
+CACHE_DIR = Path(os.environ.get("LOOKBACK_CACHE_DIR", Path.home() / ".lookback"))
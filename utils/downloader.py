@@ -0,0 +1,239 @@
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import yfinance as yf
+from pandas import DataFrame, Timestamp
+from yfinance.exceptions import (
+    YFPricesMissingError,
+    YFTickerMissingError,
+    YFTzMissingError,
+)
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Raised by yfinance when a ticker simply has no bars in the range
+NO_DATA_ERRORS = (YFPricesMissingError, YFTickerMissingError, YFTzMissingError)
+
+# (tickers, start, end, interval, throttle): throttle() must be called before
+# every upstream request so the rate limit counts actual HTTP calls
+DownloadFn = Callable[
+    [List[str], Timestamp, Timestamp, str, Callable[[], float]], Dict[str, DataFrame]
+]
+
+
+class PartialDownloadError(Exception):
+    def __init__(self, frames: Dict[str, DataFrame], errors: Dict[str, str]) -> None:
+        super().__init__(f"Failed to download {', '.join(errors)}")
+        self.frames = frames
+        self.errors = errors
+
+
+def yfinance_download(
+    tickers: List[str],
+    start: Timestamp,
+    end: Timestamp,
+    interval: str,
+    throttle: Optional[Callable[[], float]] = None,
+) -> Dict[str, DataFrame]:
+    # yfinance fetches every ticker with its own request (yf.download does the
+    # same internally), so a chunk costs one request per ticker
+    frames = {}
+    errors = {}
+    for ticker in tickers:
+        if throttle is not None:
+            throttle()
+        try:
+            history = yf.Ticker(ticker).history(
+                start=start.strftime("%Y-%m-%d"),
+                end=end.strftime("%Y-%m-%d"),
+                interval=interval,
+                auto_adjust=True,
+                raise_errors=True,
+            )
+        except NO_DATA_ERRORS:
+            continue
+        except Exception as e:
+            errors[ticker] = str(e)
+            continue
+
+        history = history[[col for col in PRICE_COLUMNS if col in history.columns]]
+        history = history.dropna(how="all")
+        if not history.empty:
+            frames[ticker] = history
+
+    if errors:
+        raise PartialDownloadError(frames, errors)
+    return frames
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        # Reserve first and wait outside the lock, so large requests go into debt
+        # instead of starving behind smaller ones
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= tokens
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if delay > 0:
+            self._sleep(delay)
+        return delay
+
+
+@dataclass
+class DownloadReport:
+    frames: Dict[str, DataFrame] = field(default_factory=dict)
+    failed: Dict[str, str] = field(default_factory=dict)
+    empty: List[str] = field(default_factory=list)
+    requests: int = 0
+    retries: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def succeeded(self) -> List[str]:
+        return list(self.frames)
+
+    def prices(self, tickers: Sequence[str], field: str = "Close") -> DataFrame:
+        columns = {
+            ticker: self.frames[ticker][field]
+            for ticker in tickers
+            if ticker in self.frames and field in self.frames[ticker].columns
+        }
+        df = pd.DataFrame(columns).sort_index()
+        df.index.name = "Date"
+        return df
+
+    def summary(self) -> str:
+        return (
+            f"Downloaded {len(self.frames)} tickers, {len(self.empty)} without data, "
+            f"{len(self.failed)} failed in {self.elapsed:.2f}s "
+            f"({self.requests} requests, {self.retries} retries)"
+        )
+
+
+class BulkDownloader:
+    def __init__(
+        self,
+        download_fn: DownloadFn = yfinance_download,
+        chunk_size: int = 20,
+        max_workers: int = 4,
+        rate: float = 5.0,
+        burst: Optional[float] = None,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._download_fn = download_fn
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._sleep = sleep
+        # Rate is in upstream requests per second; download_fn charges the
+        # bucket before each one, chunks only group tickers for retries
+        self._limiter = TokenBucket(rate, burst, sleep=sleep)
+
+    def __str__(self):
+        return f"Bulk price downloader ({self.max_workers} workers, {self.chunk_size} tickers per chunk)."
+
+    def __call__(
+        self, tickers: List[str], start: Timestamp, end: Timestamp, interval: str
+    ) -> DownloadReport:
+        return self.fetch(tickers, start, end, interval)
+
+    def download(
+        self,
+        tickers: Sequence[str],
+        start: Timestamp,
+        end: Timestamp,
+        interval: str = "1d",
+        field: str = "Close",
+    ) -> Tuple[DataFrame, DownloadReport]:
+        tickers = list(dict.fromkeys(tickers))
+        report = self.fetch(tickers, pd.Timestamp(start), pd.Timestamp(end), interval)
+        return report.prices(tickers, field), report
+
+    def fetch(
+        self, tickers: Sequence[str], start: Timestamp, end: Timestamp, interval: str
+    ) -> DownloadReport:
+        report = DownloadReport()
+        began = time.monotonic()
+        tickers = list(dict.fromkeys(tickers))
+        chunks = [
+            tickers[i : i + self.chunk_size]
+            for i in range(0, len(tickers), self.chunk_size)
+        ]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending: Dict[Future, Tuple[List[str], int]] = {
+                executor.submit(self._fetch_chunk, chunk, start, end, interval, 0): (chunk, 0)
+                for chunk in chunks
+            }
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk, attempt = pending.pop(future)
+                    report.requests += len(chunk)
+                    frames, errors = future.result()
+                    report.frames.update(frames)
+
+                    # Only the tickers that failed go back into the queue
+                    retry = [ticker for ticker in chunk if ticker in errors]
+                    if retry and attempt < self.max_retries:
+                        report.retries += 1
+                        future = executor.submit(
+                            self._fetch_chunk, retry, start, end, interval, attempt + 1
+                        )
+                        pending[future] = (retry, attempt + 1)
+                    else:
+                        report.failed.update(errors)
+
+        report.empty = [
+            ticker
+            for ticker in tickers
+            if ticker not in report.frames and ticker not in report.failed
+        ]
+        report.elapsed = time.monotonic() - began
+        return report
+
+    def _fetch_chunk(
+        self,
+        chunk: List[str],
+        start: Timestamp,
+        end: Timestamp,
+        interval: str,
+        attempt: int,
+    ) -> Tuple[Dict[str, DataFrame], Dict[str, str]]:
+        if attempt > 0:
+            delay = self.backoff * 2 ** (attempt - 1)
+            self._sleep(delay + random.uniform(0, delay))
+        try:
+            return self._download_fn(chunk, start, end, interval, self._limiter.acquire), {}
+        except PartialDownloadError as e:
+            return e.frames, e.errors
+        except Exception as e:
+            return {}, {ticker: str(e) for ticker in chunk}
@@ -0,0 +1,191 @@
+import re
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from pandas import DataFrame, Timestamp
+
+from strategies.registry import REGISTRY, StrategyRegistry
+from utils.query_plan import FilterPredicate, PlanError, QueryPlan
+
+# Words that decide the strategy on their own
+STRATEGY_KEYWORDS = {
+    "long": "long",
+    "short": "short",
+    "momentum": "momentum",
+    "macd": "macd_trend_following",
+    "bollinger": "mean_reversion_bollinger_bands",
+    "reversion": "mean_reversion_moving_average",
+    "pair": "pairs_trading",
+    "pairs": "pairs_trading",
+}
+
+# Words that may appear around a recognized query without changing its meaning
+FILLER_WORDS = {
+    "a", "an", "and", "the", "for", "on", "of", "in", "with", "using", "use", "over",
+    "run", "test", "backtest", "go", "position", "positions", "stock", "stocks",
+    "share", "shares", "strategy", "trade", "trading", "trend", "following", "band",
+    "bands", "mean", "moving", "average", "between", "from", "to", "since", ",", "&", "-",
+}
+
+UNITS = {
+    "day": "days",
+    "days": "days",
+    "week": "weeks",
+    "weeks": "weeks",
+    "month": "months",
+    "months": "months",
+    "year": "years",
+    "years": "years",
+}
+
+DATE = r"(\d{4}(?:-\d{2}-\d{2})?)"
+PAST_RE = re.compile(r"\b(?:past|last|previous)\s+(\d+\s+)?(days?|weeks?|months?|years?)\b")
+SINCE_RE = re.compile(rf"\bsince\s+{DATE}\b")
+RANGE_RE = re.compile(rf"\b(?:from|between)\s+{DATE}\s+(?:to|and|until|through|-)\s+{DATE}\b")
+IN_YEAR_RE = re.compile(r"\bin\s+(\d{4})\b")
+YTD_RE = re.compile(r"\b(?:ytd|year\s+to\s+date)\b")
+TOKEN_RE = re.compile(r"\$?[A-Za-z][A-Za-z0-9.\-]*|\S")
+
+
+def _start_of(value: str) -> Timestamp:
+    if len(value) == 4:
+        return pd.Timestamp(year=int(value), month=1, day=1)
+    return pd.Timestamp(value)
+
+
+def _end_of(value: str) -> Timestamp:
+    # Plan end dates are exclusive, so a bare year covers all of it
+    if len(value) == 4:
+        return pd.Timestamp(year=int(value) + 1, month=1, day=1)
+    return pd.Timestamp(value) + pd.Timedelta(days=1)
+
+
+class IntentParser:
+    def __init__(
+        self,
+        ticker_data: DataFrame,
+        registry: StrategyRegistry = REGISTRY,
+        today: Optional[date] = None,
+    ) -> None:
+        self._ticker_data = ticker_data
+        self._tickers = set(ticker_data["ticker"].astype(str))
+        self._registry = registry
+        self._today = pd.Timestamp(today or date.today())
+
+    def __str__(self):
+        return f"Local intent parser over {len(self._tickers)} tickers."
+
+    def parse(self, query: str) -> Optional[QueryPlan]:
+        text = query.strip().rstrip(".!?")
+
+        dates = self._parse_dates(text)
+        if dates is None:
+            return None
+        (start, end), text = dates
+
+        strategy = self._parse_strategy(text)
+        if strategy is None or strategy not in self._registry:
+            return None
+        arguments, text = self._parse_arguments(strategy, text)
+
+        # Every remaining token must be a keyword, a known ticker or filler,
+        # anything else means the query needs the LLM
+        long_tickers: List[str] = []
+        short_tickers: List[str] = []
+        side = long_tickers
+        for token in TOKEN_RE.findall(text):
+            word = token.lower()
+            if word == "long":
+                side = long_tickers
+            elif word == "short":
+                side = short_tickers
+            elif word in STRATEGY_KEYWORDS or word in FILLER_WORDS:
+                continue
+            elif self._is_ticker(token):
+                side.append(token.lstrip("$").upper())
+            else:
+                return None
+
+        tickers = list(dict.fromkeys(long_tickers + short_tickers))
+        if not tickers:
+            return None
+        if strategy == "long_short":
+            if not long_tickers or not short_tickers:
+                return None
+            arguments["long_tickers"] = long_tickers
+            arguments["short_tickers"] = short_tickers
+
+        plan = QueryPlan(
+            strategy=strategy,
+            start_date=start.strftime("%Y-%m-%d"),
+            end_date=end.strftime("%Y-%m-%d"),
+            filters=[FilterPredicate("ticker", "in", tickers)],
+            arguments=arguments,
+        )
+        try:
+            plan.validate(self._ticker_data, self._registry)
+        except PlanError:
+            return None
+        return plan
+
+    def _is_ticker(self, token: str) -> bool:
+        symbol = token.lstrip("$")
+        explicit = token.startswith("$") or (symbol.isupper() and len(symbol) > 1)
+        return explicit and symbol.upper() in self._tickers
+
+    def _parse_dates(self, text: str) -> Optional[Tuple[Tuple[Timestamp, Timestamp], str]]:
+        lowered = text.lower()
+        end = self._today
+
+        match = RANGE_RE.search(lowered)
+        if match:
+            start, end = _start_of(match.group(1)), _end_of(match.group(2))
+        elif SINCE_RE.search(lowered):
+            match = SINCE_RE.search(lowered)
+            start = _start_of(match.group(1))
+        elif PAST_RE.search(lowered):
+            match = PAST_RE.search(lowered)
+            amount = int(match.group(1) or 1)
+            start = self._today - pd.DateOffset(**{UNITS[match.group(2)]: amount})
+        elif YTD_RE.search(lowered):
+            match = YTD_RE.search(lowered)
+            start = pd.Timestamp(year=self._today.year, month=1, day=1)
+        elif IN_YEAR_RE.search(lowered):
+            match = IN_YEAR_RE.search(lowered)
+            start, end = _start_of(match.group(1)), _end_of(match.group(1))
+        else:
+            return None
+
+        end = min(end, self._today)
+        if end <= start:
+            return None
+        return (start, end), text[: match.start()] + " " + text[match.end() :]
+
+    def _parse_strategy(self, text: str) -> Optional[str]:
+        words = {token.lower() for token in TOKEN_RE.findall(text)}
+        found = {STRATEGY_KEYWORDS[word] for word in words if word in STRATEGY_KEYWORDS}
+
+        if {"long", "short"} <= found:
+            found = (found - {"long", "short"}) | {"long_short"}
+        if "mean_reversion_bollinger_bands" in found:
+            found.discard("mean_reversion_moving_average")
+        if len(found) != 1:
+            return None
+        return found.pop()
+
+    def _parse_arguments(self, strategy: str, text: str) -> Tuple[Dict[str, float], str]:
+        arguments = {}
+        for parameter in self._registry.get(strategy).parameters:
+            if parameter.annotation not in (int, float):
+                continue
+            name = parameter.name
+            words = r"[\s_]+".join(name.split("_"))
+            pattern = rf"\b{words}\s*(?:=|:|of|at)?\s*(\d+(?:\.\d+)?)\b"
+            match = re.search(pattern, text, flags=re.IGNORECASE)
+            if match is None and name == "window":
+                match = re.search(r"\b(\d+)[\s-]*days?\b", text, flags=re.IGNORECASE)
+            if match:
+                arguments[name] = float(match.group(1))
+                text = text[: match.start()] + " " + text[match.end() :]
+        return arguments, text
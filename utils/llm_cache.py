@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from utils.config import CACHE_DIR
+
+
+class CompletionCache:
+    # Upper bound on the summed size of cached responses before LRU eviction
+    max_bytes = 50 * 1024 * 1024
+
+    _instance: Optional["CompletionCache"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        path: Path = CACHE_DIR / "llm_cache.sqlite",
+        max_bytes: Optional[int] = None,
+        enabled: Optional[bool] = None,
+    ) -> None:
+        self._path = Path(path)
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        if enabled is None:
+            enabled = os.environ.get("LOOKBACK_LLM_CACHE", "1") != "0"
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def __str__(self):
+        return f"LLM completion cache in {self._path}."
+
+    @classmethod
+    def instance(cls) -> "CompletionCache":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @staticmethod
+    def make_key(
+        model: str, prompt_key: str, messages: List[Dict[str, str]], prompt_version: str
+    ) -> str:
+        payload = json.dumps(
+            {
+                "model": model,
+                "prompt_key": prompt_key,
+                "messages": messages,
+                "prompt_version": prompt_version,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT response FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE completions SET last_access = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str, model: str = "", prompt_key: str = "") -> None:
+        if not self.enabled:
+            return
+
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO completions "
+                "(key, model, prompt_key, response, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, prompt_key, response, size, time.time()),
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM completions")
+            conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._connect()
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self._path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                "key TEXT PRIMARY KEY, model TEXT, prompt_key TEXT, response TEXT, "
+                "size INTEGER, last_access REAL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS completions_last_access "
+                "ON completions (last_access)"
+            )
+        return self._conn
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM completions ORDER BY last_access ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM completions WHERE key = ?", evicted)
+        self.evictions += len(evicted)
@@ -1,69 +1,164 @@
+import asyncio
+import hashlib
+import time
+from contextlib import contextmanager
 from datetime import date
 from pathlib import Path
-from typing import Any, Dict
+from types import CodeType, SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from groq import Groq
+import numpy as np
 import openai
 import pandas as pd
 import yaml
-import yfinance as yf
 from pandas import DataFrame
 
+from strategies.registry import REGISTRY
+from utils.async_pipeline import AsyncPipeline
+from utils.code_cache import SNIPPET_BUILTINS, compile_snippet
+from utils.intent_parser import IntentParser
+from utils.llm_cache import CompletionCache
+from utils.price_store import PriceStore
+from utils.query_plan import PlanError, QueryPlan
+from utils.sandbox import SandboxPool
+
 class LLMHelper:
     llm_model = "gpt-4o-mini"
+    # Plain queries are parsed locally and never reach the LLM
+    use_intent_parser = True
+    # Single structured-plan call, falling back to the multi-call pipeline
+    use_planner = True
+    # Run independent stages of the multi-call pipeline concurrently
+    use_async_pipeline = True
+    # OpenAI-compatible clients, created from the helper's API key when unset
+    client = None
+    async_client = None
 
-    def __init__(self, data_prompt: str, ticker_data: DataFrame) -> None:
+    def __init__(
+        self,
+        data_prompt: str,
+        ticker_data: DataFrame,
+        sandbox: Optional[SandboxPool] = None,
+        api_key: Optional[str] = None,
+    ) -> None:
+        # Each helper carries its own key, so concurrent queries never share
+        # one through the openai module; OPENAI_API_KEY is the default
+        self._api_key = api_key or openai.api_key
         self._data_prompt = data_prompt
         self._ticker_data = ticker_data
+        # Generated data snippets run in worker processes when a pool is given
+        self._sandbox = sandbox
+        self._stage_timings: Dict[str, float] = {}
+        # Whatever the strategy call returned (a StrategyResult for registered ones)
+        self._strategy_result: Any = None
         self._load_prompts()
 
     @staticmethod
     def _api_key_validation(func) -> None:
         def wrapper(self, *args, **kwargs):
-            if not openai.api_key:
-                raise ValueError("OpenAI API key environment variable is not set")
+            if not self._api_key:
+                raise ValueError("OpenAI API key is not set")
             return func(self, *args, **kwargs)
 
         return wrapper
 
     def _load_prompts(self) -> None:
         prompts_path = Path(__file__).parent / "prompts.yaml"
-        with open(prompts_path, "r") as f:
-            self._prompts = yaml.safe_load(f)
+        with open(prompts_path, "rb") as f:
+            raw = f.read()
+        self._prompts = yaml.safe_load(raw)
+        # Editing prompts.yaml invalidates every cached completion
+        self._prompts_version = hashlib.sha256(raw).hexdigest()[:16]
+
+    @contextmanager
+    def _timed(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._stage_timings[stage] = round(time.perf_counter() - started, 4)
+
+    def _prepare_request(
+        self, prompt_key: str, **kwargs
+    ) -> Tuple[List[Dict[str, str]], str]:
+        messages = [
+            {"role": "system", "content": self._prompts[prompt_key]["system"]},
+            {
+                "role": "user",
+                "content": self._prompts[prompt_key]["user"].format(**kwargs),
+            },
+        ]
+        cache_key = CompletionCache.make_key(
+            self.llm_model, prompt_key, messages, self._prompts_version
+        )
+        return messages, cache_key
+
+    def _generate_openai_response(
+        self, prompt_key: str, response_format: Optional[Dict[str, str]] = None, **kwargs
+    ) -> str:
+        messages, cache_key = self._prepare_request(prompt_key, **kwargs)
+        cache = CompletionCache.instance()
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
 
-    def _generate_openai_response(self, prompt_key: str, **kwargs) -> str:
-        response = openai.chat.completions.create(
+        options = {"response_format": response_format} if response_format else {}
+        if self.client is None:
+            self.client = openai.OpenAI(api_key=self._api_key)
+        response = self.client.chat.completions.create(
             model=self.llm_model,
-            messages=[
-                {"role": "system", "content": self._prompts[prompt_key]["system"]},
-                {
-                    "role": "user",
-                    "content": self._prompts[prompt_key]["user"].format(**kwargs),
-                },
-            ],
+            messages=messages,
+            **options,
         )
-        return response.choices[0].message.content
+        content = response.choices[0].message.content
+        cache.put(cache_key, content, self.llm_model, prompt_key)
+        return content
+
+    def _gpt_code_request(self) -> Dict[str, Any]:
+        return {
+            "tickers": self._filtered_data["ticker"].tolist(),
+            "data_prompt": self._data_prompt,
+            "today": date.today().strftime("%Y-%m-%d"),
+        }
 
     @_api_key_validation
     def _gpt_code_generate(self) -> None:
         self._gpt_code = self._generate_openai_response(
-            "gpt_code_generate",
-            tickers=self._filtered_data["ticker"].tolist(),
-            data_prompt=self._data_prompt,
-            today=date.today().strftime("%Y-%m-%d"),
+            "gpt_code_generate", **self._gpt_code_request()
         )
 
-    def _gpt_code_execute(self) -> Dict[str, Any]:
-        namespace: Dict[str, Any] = {
-            "yf": yf,
+    @staticmethod
+    def _snippet_namespace(names: Dict[str, Any]) -> Dict[str, Any]:
+        # The names a sandbox worker adds itself (WORKER_NAMES), so a snippet is
+        # validated against the same namespace whether it runs here or there
+        return {
+            **names,
+            "pd": pd,
+            "np": np,
             "DataFrame": DataFrame,
             "date": date,
-            "self": self,
+            "load_prices": PriceStore.instance().get,
+            "__builtins__": SNIPPET_BUILTINS,
         }
 
+    def _gpt_code_execute(self) -> Dict[str, Any]:
+        # Prices come from the local store, generated code never calls yfinance itself
+        tickers = self._filtered_data["ticker"].tolist()
+        namespace = self._snippet_namespace({"tickers": tickers})
+
+        code = compile_snippet(self._gpt_code, namespace, "data loading code")
         try:
             print("Loading data...")
-            exec(self._gpt_code, namespace)
-            self._strategy_data = namespace.get("_strategy_data")
+            if self._sandbox is not None:
+                self._strategy_data = self._sandbox.run(
+                    self._gpt_code,
+                    {"tickers": tickers},
+                    "_strategy_data",
+                    "data loading code",
+                )
+            else:
+                exec(code, namespace)
+                self._strategy_data = namespace.get("_strategy_data")
 
             # Check if 'Date' is in the index, if not set it as the index
             if isinstance(self._strategy_data, DataFrame):
@@ -79,142 +174,230 @@ class LLMHelper:
 
         return self._strategy_data
 
+    def _pandas_code_request(self) -> Dict[str, Any]:
+        return {
+            "columns": ", ".join(self._ticker_data.columns),
+            "data_prompt": self._data_prompt,
+        }
+
     @_api_key_validation
     def _pandas_code_generate(self, data_prompt: str) -> str:
         self._pandas_code = self._generate_openai_response(
-            "pandas_code_generate",
-            columns=", ".join(self._ticker_data.columns),
-            data_prompt=self._data_prompt,
+            "pandas_code_generate", **self._pandas_code_request()
         )
         return self._pandas_code
 
     def _pandas_code_execute(self) -> None:
-        namespace: Dict[str, Any] = {"pd": pd, "self": self}
+        namespace = self._snippet_namespace({"self": self})
 
+        source = f"result = {self._pandas_code}"
+        # Columns of the universe may be read as attributes (df.sector)
+        attributes = {"_ticker_data", *map(str, self._ticker_data.columns)}
+        code = compile_snippet(source, namespace, "pandas code", attributes)
         try:
-            exec(f"result = {self._pandas_code}", namespace)
-            self._filtered_data = namespace["result"]
+            if self._sandbox is not None:
+                # Workers only see the universe, never the helper itself
+                proxy = SimpleNamespace(_ticker_data=self._ticker_data)
+                self._filtered_data = self._sandbox.run(
+                    source, {"self": proxy}, "result", "pandas code", attributes=attributes
+                )
+            else:
+                exec(code, namespace)
+                self._filtered_data = namespace["result"]
         except Exception as e:
             raise RuntimeError(f"Error executing pandas code: {str(e)}")
 
-    @_api_key_validation
-    def _gpt_identify_strategy(self) -> str:
-        from strategies.traditional import Traditional
-        from strategies.technical import TechnicalAnalysis
-
-        strategy_classes = [
-            Traditional,
-            TechnicalAnalysis,
-        ]
-        self._trading_methods = []
-
-        for cls in strategy_classes:
-            self._trading_methods.extend(
-                [
-                    method
-                    for method in dir(cls)
-                    if callable(getattr(cls, method)) and not method.startswith("__")
-                ]
-            )
-        self._trading_methods.append("other")
-
-        messages = [
-            {
-                "role": "system",
-                "content": self._prompts["strategy_identifier"]["system"],
-            },
-            {
-                "role": "user",
-                "content": self._prompts["strategy_identifier"]["user"].format(
-                    data_prompt=self._data_prompt, trading_methods=self._trading_methods
-                ),
-            },
-        ]
-
-        response = openai.chat.completions.create(
-            model=self.llm_model, messages=messages
-        )
+    def _identify_strategy_request(self) -> Dict[str, Any]:
+        self._trading_methods = REGISTRY.names() + ["other"]
+        return {
+            "data_prompt": self._data_prompt,
+            "trading_methods": self._trading_methods,
+        }
 
-        self._strategy_identifier = response.choices[0].message.content
+    def _check_strategy_identifier(self) -> None:
         if self._strategy_identifier == "other":
             raise ValueError(
                 "Strategy not found. Please reference the list of strategies and try again."
             )
 
+    @_api_key_validation
+    def _gpt_identify_strategy(self) -> str:
+        self._strategy_identifier = self._generate_openai_response(
+            "strategy_identifier", **self._identify_strategy_request()
+        )
+        self._check_strategy_identifier()
         return self._strategy_identifier
 
+    def _call_strategy_request(self) -> Dict[str, Any]:
+        spec = REGISTRY.get(self._strategy_identifier)
+        return {
+            "data_prompt": self._data_prompt,
+            "strategy_definition": spec.qualname,
+            "args": spec.signature,
+        }
+
     @_api_key_validation
     def _gpt_call_strategy(self) -> str:
-        import inspect
-        from strategies.traditional import Traditional
-        from strategies.technical import TechnicalAnalysis
-
-        # Get attributes from multiple classes
-        classes_to_inspect = [
-            Traditional,
-            TechnicalAnalysis,
-        ]
-        all_methods = {}
-
-        for cls in classes_to_inspect:
-            methods = {
-                method: getattr(cls, method)
-                for method in dir(cls)
-                if callable(getattr(cls, method)) and not method.startswith("__")
-            }
-            all_methods.update(methods)
-        strategy_method = all_methods.get(self._strategy_identifier)
-
-        if not strategy_method:
-            raise ValueError(
-                f"Strategy '{self._strategy_identifier}' not found in any of the classes."
-            )
-        signature = inspect.signature(strategy_method)
-        args = signature.parameters
-        messages = [
-            {"role": "system", "content": self._prompts["strategy_call"]["system"]},
-            {
-                "role": "user",
-                "content": self._prompts["strategy_call"]["user"].format(
-                    data_prompt=self._data_prompt,
-                    strategy_definition=strategy_method,
-                    args=args,
-                ),
-            },
-        ]
-        response = openai.chat.completions.create(
-            model=self.llm_model, messages=messages
+        self._strategy_function_call = self._generate_openai_response(
+            "strategy_call", **self._call_strategy_request()
         )
-        self._strategy_function_call = response.choices[0].message.content
-
-    def _gpt_call_strategy_execute(self) -> None:
-        from strategies.traditional import Traditional
-        from strategies.technical import TechnicalAnalysis
+        self._compile_strategy_call()
+        return self._strategy_function_call
 
-        # Call the strategy
-        namespace: Dict[str, Any] = {
+    def _strategy_namespace(self) -> Dict[str, Any]:
+        return {
             "pd": pd,
             "self": self,
-            "Traditional": Traditional,
-            "TechnicalAnalysis": TechnicalAnalysis,
-            "yf": yf,
+            **REGISTRY.namespace(),
             "DataFrame": DataFrame,
             "date": date,
+            "__builtins__": SNIPPET_BUILTINS,
         }
+
+    def _compile_strategy_call(self) -> CodeType:
+        # Validated as soon as it is generated, so a bad call fails before prices load
+        return compile_snippet(
+            f"result = {self._strategy_function_call}",
+            self._strategy_namespace(),
+            "strategy code",
+            {"_strategy_data", *REGISTRY.names()},
+        )
+
+    def _gpt_call_strategy_execute(self) -> None:
+        # Call the strategy
+        namespace = self._strategy_namespace()
+        code = self._compile_strategy_call()
         try:
-            exec(f"result = {self._strategy_function_call}", namespace)
-            result = namespace["result"]
+            exec(code, namespace)
+            self._strategy_result = namespace["result"]
         except Exception as e:
             raise RuntimeError(f"Error executing strategy code: {str(e)}")
 
+    @_api_key_validation
+    def _gpt_plan_generate(self) -> QueryPlan:
+        strategies = [f"{spec.signature}: {spec.description}" for spec in REGISTRY]
+
+        self._plan_response = self._generate_openai_response(
+            "query_plan",
+            response_format={"type": "json_object"},
+            columns=", ".join(self._ticker_data.columns),
+            strategies="; ".join(strategies),
+            data_prompt=self._data_prompt,
+            today=date.today().strftime("%Y-%m-%d"),
+        )
+        plan = QueryPlan.from_json(self._plan_response)
+        if plan.strategy == "other":
+            raise PlanError("Planner found no matching strategy.")
+        plan.validate(self._ticker_data)
+        self._plan = plan
+        return plan
+
+    def _plan_load(self) -> None:
+        # Everything the plan decides before the strategy runs. A failure here
+        # is a planner mistake, so it raises PlanError and the caller falls back.
+        plan = self._plan
+        try:
+            self._filtered_data = plan.select(self._ticker_data)
+        except (TypeError, ValueError, KeyError) as e:
+            raise PlanError(f"Plan filters cannot be applied: {str(e)}")
+        tickers = self._filtered_data["ticker"].tolist()
+        if not tickers:
+            raise PlanError("No tickers match the query filters.")
+
+        print("Loading data...")
+        with self._timed("load_prices"):
+            strategy_data = PriceStore.instance().get(
+                tickers, start=plan.start_date, end=plan.end_date
+            )
+        if strategy_data.empty:
+            raise PlanError("No price data for the planned tickers and dates.")
+        try:
+            REGISTRY.get(plan.strategy).check_columns(strategy_data)
+        except ValueError as e:
+            raise PlanError(str(e))
+        self._strategy_data = strategy_data
+
+    def _plan_execute(self) -> None:
+        plan = self._plan
+        self._strategy_identifier = plan.strategy
+        spec = REGISTRY.get(plan.strategy)
+        with self._timed("strategy_execute"):
+            self._strategy_result = spec.func(df=self._strategy_data, **plan.arguments)
+
     def execute_code(self) -> None:
-        self._pandas_code_generate(self._data_prompt)
-        self._pandas_code_execute()
-        self._gpt_code_generate()
-        self._gpt_code_execute()
-        self._gpt_identify_strategy()
-        self._gpt_call_strategy()
-        self._gpt_call_strategy_execute()
+        self._stage_timings = {}
+        self._strategy_result = None
+        started = time.perf_counter()
+        try:
+            self._execute_stages()
+        finally:
+            self._stage_timings["total"] = round(time.perf_counter() - started, 4)
+
+    def _execute_stages(self) -> None:
+        if self.use_intent_parser:
+            with self._timed("intent_parse"):
+                plan = IntentParser(self._ticker_data).parse(self._data_prompt)
+            if plan is not None:
+                self._plan = plan
+                try:
+                    self._plan_load()
+                except PlanError as e:
+                    print(f"Warning: parsed query could not be loaded, asking the planner: {str(e)}")
+                else:
+                    self._plan_execute()
+                    return
+
+        if self.use_planner:
+            try:
+                with self._timed("plan_generate"):
+                    self._gpt_plan_generate()
+                self._plan_load()
+            except PlanError as e:
+                print(f"Warning: query planner failed, using step-by-step pipeline: {str(e)}")
+            else:
+                self._plan_execute()
+                return
+
+        if self.use_async_pipeline and not self._in_event_loop():
+            asyncio.run(self._execute_async())
+            return
+
+        with self._timed("pandas_code_generate"):
+            self._pandas_code_generate(self._data_prompt)
+        with self._timed("pandas_code_execute"):
+            self._pandas_code_execute()
+        with self._timed("strategy_identify"):
+            self._gpt_identify_strategy()
+        with self._timed("strategy_call_generate"):
+            self._gpt_call_strategy()
+        with self._timed("gpt_code_generate"):
+            self._gpt_code_generate()
+        with self._timed("gpt_code_execute"):
+            self._gpt_code_execute()
+        with self._timed("strategy_execute"):
+            self._gpt_call_strategy_execute()
+
+    @_api_key_validation
+    async def _execute_async(self) -> None:
+        if self.async_client is None:
+            self.async_client = openai.AsyncOpenAI(api_key=self._api_key)
+        await AsyncPipeline(self, client=self.async_client).run()
+
+    @staticmethod
+    def _in_event_loop() -> bool:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return True
+
+    @property
+    def stage_timings(self) -> Dict[str, float]:
+        return dict(self._stage_timings)
+
+    @property
+    def strategy_result(self) -> Any:
+        return self._strategy_result
 
     @property
     def strategy_data(self) -> DataFrame:
@@ -1,23 +1,28 @@
 import pandas as pd
-from utils.type_convert import convert_data
+from typing import Any, Dict, Optional
 from utils.llm_helper import LLMHelper
+from utils.sandbox import SandboxPool
+from utils.ticker_universe import TickerUniverse
 
 class LoadData:
-    def __init__(self, prompt: str):
-        self._tickers = pd.read_csv(
-            "https://raw.githubusercontent.com/nathang15/lookback/main/data/all_ticker_data.csv",
-            header=0,
-        ).transpose()
-        self._tickers.columns = self._tickers.iloc[0]
-        self._tickers = self._tickers.iloc[1:]
-        self._tickers.reset_index(inplace=True)
-        self._tickers.rename(columns={"index": "ticker"}, inplace=True)
-        self._tickers = convert_data(self._tickers)
-        self._llm_helper = LLMHelper(prompt, self._tickers)
+    def __init__(
+        self, prompt: str, sandbox: Optional[SandboxPool] = None, api_key: Optional[str] = None
+    ):
+        # Shallow copy so generated filter code cannot add columns to the shared universe
+        self._tickers = TickerUniverse.instance().data.copy(deep=False)
+        self._llm_helper = LLMHelper(prompt, self._tickers, sandbox=sandbox, api_key=api_key)
 
     @property
     def strategy_data(self):
         return self._strategy_data
+
+    @property
+    def strategy_result(self) -> Any:
+        return self._llm_helper.strategy_result
+
+    @property
+    def stage_timings(self) -> Dict[str, float]:
+        return self._llm_helper.stage_timings
     
     def execute(self) -> None:
         self._llm_helper.execute_code()
@@ -1,81 +1,405 @@
-from typing import Any, Dict
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
 
+from .trades import TradeLog
 
-def get_metrics(df: pd.DataFrame, strategy: str) -> Dict[str, any]:
-    metrics = {}
+_capture = threading.local()
 
-    # Time period
-    metrics["Start"] = df.index.min()
-    metrics["End"] = df.index.max()
-    metrics["Duration"] = metrics["End"] - metrics["Start"]
 
-    # Calculate metrics
-    metrics["Exposure Time [%]"] = round(
-        (df["Total_Return"].count() / len(df)) * 100, 2
-    )
+class MetricsCapture(list):
+    # get_metrics results in call order, plus the frames they came from when kept
+    def __init__(self, keep_frames: bool = False) -> None:
+        super().__init__()
+        self.keep_frames = keep_frames
+        self.frames: List[pd.DataFrame] = []
 
-    # Assuming $10,000 investment
-    metrics["Equity Initial [$]"] = 10000
-    metrics["Equity Final [$]"] = round(
-        df["Cumulative_Return"].iloc[-1] * 10000, 2
+
+@contextmanager
+def capture_metrics(keep_frames: bool = False) -> Iterator[MetricsCapture]:
+    # Batch runs (sweeps, walk-forward) collect metrics silently and skip plotting
+    previous = getattr(_capture, "results", None)
+    _capture.results = MetricsCapture(keep_frames)
+    try:
+        yield _capture.results
+    finally:
+        _capture.results = previous
+
+
+def is_capturing() -> bool:
+    return getattr(_capture, "results", None) is not None
+
+
+def _series_major(values: np.ndarray, dates: int) -> np.ndarray:
+    # (series x dates) and contiguous, so each row reduction sums one block the
+    # way pandas sums a single column
+    return np.ascontiguousarray(np.asarray(values, dtype=float).reshape(dates, -1).T)
+
+
+def _episodes(drawdown: np.ndarray, detail: bool = True) -> Dict[str, np.ndarray]:
+    # Run-length encodes the under-water bars of a (series x dates) drawdown
+    # matrix. An episode starts on the first bar below its peak, bottoms at
+    # the trough and recovers on the first bar back at a peak; one still under
+    # water at the end has no recovery and is measured to the last bar.
+    series, dates = drawdown.shape
+    # Padding with a dry bar on each side closes episodes still open at the end
+    padded = np.zeros((series, dates + 2), dtype=bool)
+    padded[:, 1:-1] = drawdown < 0
+    rows, columns = np.nonzero(padded[:, 1:] != padded[:, :-1])
+    # Within a series the run edges alternate start, stop in date order
+    start = columns[0::2]
+    stop = columns[1::2]
+    episodes = {
+        "series": rows[0::2],
+        "start": start,
+        "recovery": np.where(stop < dates, stop, -1),
+        "end": np.minimum(stop, dates - 1),
+        "bars": stop - start,
+        "recovered": stop < dates,
+    }
+    if not detail:
+        return episodes
+
+    # Depth and trough need the bars inside each run, gathered without a loop
+    flat = drawdown.ravel()
+    offsets = episodes["series"] * dates + start
+    bars = episodes["bars"]
+    first = np.cumsum(bars) - bars
+    positions = np.arange(bars.sum()) + np.repeat(offsets - first, bars)
+    values = flat[positions]
+    depth = np.minimum.reduceat(values, first) if len(first) else values[:0]
+    # The trough is the first bar of a run at the run's minimum
+    episode = np.repeat(np.arange(len(bars)), bars)
+    lows = np.flatnonzero(values == depth[episode])
+    first_low = np.ones(len(lows), dtype=bool)
+    first_low[1:] = episode[lows[1:]] != episode[lows[:-1]]
+    episodes["trough"] = start + lows[first_low] - first
+    episodes["depth"] = depth
+    return episodes
+
+
+def _times(index: pd.Index) -> np.ndarray:
+    times = np.asarray(index)
+    if times.dtype.kind == "M":
+        return times.astype("datetime64[ns]")
+    return times
+
+
+def drawdown_episodes(
+    equity: np.ndarray, index: pd.Index, names: Optional[Sequence[Any]] = None
+) -> pd.DataFrame:
+    # One row per drawdown episode of one or many (dates x series) equity
+    # curves, with start, trough and recovery dates, depth (as a fraction of
+    # the peak), length to recovery and the time from trough to recovery
+    curves = _series_major(equity, len(index))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawdown = curves / np.fmax.accumulate(curves, axis=1) - 1
+    episodes = _episodes(drawdown)
+    times = _times(index)
+    recovered = episodes["recovered"]
+    missing = np.datetime64("NaT") if times.dtype.kind == "M" else np.nan
+    recovery = np.where(recovered, times[episodes["recovery"]], missing)
+    names = list(range(curves.shape[0])) if names is None else list(names)
+    return pd.DataFrame(
+        {
+            "series": np.asarray(names, dtype=object)[episodes["series"]],
+            "start": times[episodes["start"]],
+            "trough": times[episodes["trough"]],
+            "recovery": recovery,
+            "depth": episodes["depth"],
+            "bars": episodes["bars"],
+            "length": times[episodes["end"]] - times[episodes["start"]],
+            "time_to_recover": recovery - times[episodes["trough"]],
+        }
     )
-    metrics["Equity Peak [$]"] = round(df["Cumulative_Return"].max() * 10000, 2)
-    metrics["Return [%]"] = round((df["Cumulative_Return"].iloc[-1] - 1) * 100, 2)
-    metrics["Return (Ann.) [%]"] = round(
-        ((1 + metrics["Return [%]"] / 100) ** (252 / len(df)) - 1) * 100, 2
+
+
+def _drawdown_durations(
+    episodes: Dict[str, np.ndarray], index: pd.Index, series: int
+) -> Tuple[Any, Any]:
+    # Longest and average episode length per series
+    times = _times(index)
+    is_time = times.dtype.kind == "M"
+    if is_time:
+        times = times.view("int64")
+    lengths = (times[episodes["end"]] - times[episodes["start"]]).astype(float)
+
+    counts = np.bincount(episodes["series"], minlength=series)
+    longest = np.full(series, -np.inf)
+    np.maximum.at(longest, episodes["series"], lengths)
+    totals = np.bincount(episodes["series"], weights=lengths, minlength=series)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        average = totals / counts
+    longest = np.where(counts > 0, longest, np.nan)
+
+    if is_time:
+        return pd.to_timedelta(longest, unit="ns"), pd.to_timedelta(average, unit="ns")
+    return longest, average
+
+
+def batch_metrics(
+    returns: np.ndarray,
+    index: pd.Index,
+    names: Optional[Sequence[Any]] = None,
+    cumulative: Optional[np.ndarray] = None,
+    drawdown: Optional[np.ndarray] = None,
+    trades: Optional[Sequence[int]] = None,
+    strategy: Any = None,
+    log_returns: bool = False,
+) -> pd.DataFrame:
+    # Every get_metrics figure for a (dates x series) return matrix in a few
+    # array passes, one row per series. Equity compounds the returns (or sums
+    # them when they are log returns) unless cumulative/drawdown are given.
+    dates = len(index)
+    values = _series_major(returns, dates)
+    series = values.shape[0]
+    missing = np.isnan(values)
+    complete = not missing.any()
+    # Skipna reductions sum a zero-filled copy, as pandas does
+    filled = values if complete else np.where(missing, 0.0, values)
+    count = np.full(series, dates) if complete else dates - missing.sum(axis=1)
+
+    metrics: Dict[str, Any] = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if cumulative is None and log_returns:
+            cumulative = np.exp(np.cumsum(filled, axis=1))
+            if not complete:
+                cumulative[missing] = np.nan
+        elif cumulative is None:
+            cumulative = 1 + filled
+            np.cumprod(cumulative, axis=1, out=cumulative)
+            if not complete:
+                cumulative[missing] = np.nan
+        else:
+            cumulative = _series_major(cumulative, dates)
+        peak = np.fmax.accumulate(cumulative, axis=1)
+        if drawdown is None:
+            drawdown = cumulative / peak
+            drawdown -= 1
+        else:
+            drawdown = _series_major(drawdown, dates)
+
+        mean = filled.sum(axis=1) / np.where(count > 0, count, np.nan)
+        deviation = filled - mean[:, None]
+        if not complete:
+            deviation[missing] = 0.0
+        np.square(deviation, out=deviation)
+        std = np.sqrt(deviation.sum(axis=1) / np.where(count > 1, count - 1, np.nan))
+
+        negative = np.minimum(filled, 0.0)
+        negative_count = np.count_nonzero(negative, axis=1)
+        np.square(negative, out=negative)
+        downside_deviation = np.sqrt(negative.sum(axis=1) / negative_count) * np.sqrt(252)
+
+        under_count = np.count_nonzero(drawdown < 0, axis=1)
+        average_drawdown = np.fmin(drawdown, 0.0).sum(axis=1) / under_count
+
+        # Time period
+        metrics["Start"] = [index.min()] * series
+        metrics["End"] = [index.max()] * series
+        metrics["Duration"] = [index.max() - index.min()] * series
+
+        # Calculate metrics
+        metrics["Exposure Time [%]"] = np.round(count / dates * 100, 2)
+
+        # Assuming $10,000 investment
+        final = cumulative[:, -1]
+        metrics["Equity Initial [$]"] = np.full(series, 10000)
+        metrics["Equity Final [$]"] = np.round(final * 10000, 2)
+        metrics["Equity Peak [$]"] = np.round(peak[:, -1] * 10000, 2)
+        total = np.round((final - 1) * 100, 2)
+        metrics["Return [%]"] = total
+        annual = np.round(((1 + total / 100) ** (252 / dates) - 1) * 100, 2)
+        metrics["Return (Ann.) [%]"] = annual
+        volatility = np.round(std * np.sqrt(252) * 100, 2)
+        metrics["Volatility (Ann.) [%]"] = volatility
+        metrics["Sharpe Ratio"] = np.round(annual / volatility, 2)
+
+        # Sortino and Calmar Ratio calculations
+        metrics["Sortino Ratio"] = np.round(annual / (downside_deviation * 100), 2)
+
+        # Max Drawdown
+        max_drawdown = np.round(np.fmin.reduce(drawdown, axis=1) * 100, 2)
+        metrics["Max. Drawdown [%]"] = max_drawdown
+        metrics["Calmar Ratio"] = np.round(annual / np.abs(max_drawdown), 2)
+
+        # Average Drawdown
+        metrics["Avg. Drawdown [%]"] = np.round(average_drawdown * 100, 2)
+
+        # Drawdown Duration
+        longest, average = _drawdown_durations(
+            _episodes(drawdown, detail=False), index, series
+        )
+        metrics["Max. Drawdown Duration"] = longest
+        metrics["Avg. Drawdown Duration"] = average
+
+        # Trade metrics
+        metrics["# Trades"] = (
+            np.zeros(series, dtype=int) if trades is None else np.asarray(trades, dtype=int)
+        )
+        metrics["Best Day [%]"] = np.round(np.fmax.reduce(values, axis=1) * 100, 2)
+        metrics["Worst Day [%]"] = np.round(np.fmin.reduce(values, axis=1) * 100, 2)
+        metrics["Avg. Trade [%]"] = np.round(mean * 100, 2)
+        metrics["Max. Trade Duration"] = np.repeat((index[-1] - index[0]).days, series)
+        metrics["strategy"] = (
+            [strategy] * series if isinstance(strategy, (str, type(None))) else list(strategy)
+        )
+
+    return pd.DataFrame(metrics, index=list(names) if names is not None else None)
+
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    # Trailing sums along the dates of a (series x dates) matrix in O(n): each
+    # bar adds the newest value to a running sum and drops the one leaving
+    # the window. Bars before the first full window hold partial sums.
+    sums = np.cumsum(values, axis=1)
+    sums[:, window:] = sums[:, window:] - sums[:, :-window]
+    return sums
+
+
+def _window_max_drawdown(log_equity: np.ndarray, window: int) -> np.ndarray:
+    # Deepest peak-to-trough fall (in log equity) inside each trailing window,
+    # in O(n) per series. Dates are cut into blocks of one window, so every
+    # window is the tail of one block plus the head of the next: its drawdown
+    # is the worse of the one inside the tail, the one inside the head, and the
+    # lowest point of the head against the highest of the tail.
+    series, dates = log_equity.shape
+    blocks = -(-dates // window)
+    padded = np.pad(log_equity, ((0, 0), (0, blocks * window - dates)), mode="edge")
+    values = padded.reshape(series, blocks, window)
+    reverse = values[..., ::-1]
+
+    head_min = np.minimum.accumulate(values, axis=2)
+    head_drawdown = np.minimum.accumulate(values - np.maximum.accumulate(values, axis=2), axis=2)
+    tail_max = np.maximum.accumulate(reverse, axis=2)[..., ::-1]
+    # From each bar on, the lowest point minus the bar is the worst fall from it
+    tail_drawdown = np.minimum.accumulate(
+        np.minimum.accumulate(reverse, axis=2) - reverse, axis=2
+    )[..., ::-1]
+
+    head_min, head_drawdown, tail_max, tail_drawdown = (
+        block.reshape(series, -1) for block in (head_min, head_drawdown, tail_max, tail_drawdown)
     )
-    metrics["Volatility (Ann.) [%]"] = round(
-        df["Total_Return"].std() * np.sqrt(252) * 100, 2
+    result = np.full((series, dates), np.nan)
+    # Bars before the first full window see everything from the first bar on
+    prefix = min(window - 1, dates)
+    result[:, :prefix] = np.minimum.accumulate(
+        log_equity[:, :prefix] - np.maximum.accumulate(log_equity[:, :prefix], axis=1), axis=1
     )
-    metrics["Sharpe Ratio"] = round(
-        metrics["Return (Ann.) [%]"] / metrics["Volatility (Ann.) [%]"], 2
+    if dates < window:
+        return result
+    first = np.arange(dates - window + 1)
+    last = first + window - 1
+    spanning = np.minimum(
+        np.minimum(tail_drawdown[:, first], head_drawdown[:, last]),
+        head_min[:, last] - tail_max[:, first],
     )
+    # A window that starts a block lies entirely inside it
+    result[:, last] = np.where(first % window == 0, head_drawdown[:, last], spanning)
+    return result
 
-    # Sortino and Calmar Ratio calculations
-    negative_returns = df["Total_Return"][df["Total_Return"] < 0]
-    downside_deviation = np.sqrt(np.mean(negative_returns**2)) * np.sqrt(252)
-    metrics["Sortino Ratio"] = round(
-        metrics["Return (Ann.) [%]"] / (downside_deviation * 100), 2
-    )
 
-    # Max Drawdown
-    max_drawdown = df["Drawdown"].min()
-    metrics["Max. Drawdown [%]"] = round(max_drawdown * 100, 2)
-    metrics["Calmar Ratio"] = round(
-        metrics["Return (Ann.) [%]"] / abs(metrics["Max. Drawdown [%]"]), 2
+def rolling_metrics(
+    returns: np.ndarray,
+    index: pd.Index,
+    window: int = 63,
+    benchmark: Optional[np.ndarray] = None,
+    names: Optional[Sequence[Any]] = None,
+    min_periods: Optional[int] = None,
+    log_returns: bool = False,
+) -> pd.DataFrame:
+    # Trailing-window Sharpe, Sortino, volatility, max drawdown and (given a
+    # benchmark return series) beta for a (dates x series) return matrix. One
+    # row per date and a (metric, series) column for each figure; windows with
+    # fewer than min_periods returns (default: the whole window) are NaN.
+    if window < 2:
+        raise ValueError("window must be at least 2.")
+    min_periods = window if min_periods is None else max(min_periods, 2)
+    dates = len(index)
+    values = _series_major(returns, dates)
+    series = values.shape[0]
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    count = _window_sums(valid.astype(float), window)
+    ready = count >= min_periods
+
+    metrics: Dict[str, np.ndarray] = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Centring each series first keeps the running sums small, so dropping
+        # old values does not cancel away the variance
+        center = filled.sum(axis=1, keepdims=True) / np.maximum(valid.sum(axis=1, keepdims=True), 1)
+        centered = np.where(valid, filled - center, 0.0)
+        first = _window_sums(centered, window)
+        second = _window_sums(centered * centered, window)
+        mean = first / count
+        var = np.maximum(second - first * mean, 0.0) / (count - 1)
+        std = np.sqrt(var)
+        mean += center
+
+        # Same definitions as the full-period figures in batch_metrics: the
+        # window's compounded return annualised over its bars, divided by the
+        # annualised (downside) deviation
+        growth = filled if log_returns else np.log1p(filled)
+        bars = np.minimum(np.arange(1, dates + 1), window)
+        annual = np.expm1(_window_sums(growth, window) * (252 / bars)) * 100
+        volatility = std * np.sqrt(252) * 100
+        negative = np.minimum(filled, 0.0)
+        negative_count = _window_sums((negative < 0).astype(float), window)
+        downside = np.sqrt(_window_sums(negative * negative, window) / negative_count)
+        metrics["Sharpe Ratio"] = annual / volatility
+        metrics["Sortino Ratio"] = annual / (downside * np.sqrt(252) * 100)
+        metrics["Volatility (Ann.) [%]"] = volatility
+
+        # Equity starts at 0 in log terms before the first return, so each
+        # window also sees the level it started from (window + 1 points)
+        log_equity = np.zeros((series, dates + 1))
+        np.cumsum(growth, axis=1, out=log_equity[:, 1:])
+        drawdown = _window_max_drawdown(log_equity, window + 1)[:, 1:]
+        metrics["Max. Drawdown [%]"] = np.expm1(drawdown) * 100
+        for name in metrics:
+            metrics[name] = np.where(ready, metrics[name], np.nan)
+
+        if benchmark is not None:
+            market = np.asarray(benchmark, dtype=float).reshape(1, dates)
+            paired = valid & ~np.isnan(market)
+            market = np.where(paired, market - np.nanmean(market), 0.0)
+            own = np.where(paired, centered, 0.0)
+            pairs = _window_sums(paired.astype(float), window)
+            market_sum = _window_sums(market, window)
+            covariance = _window_sums(own * market, window) - _window_sums(own, window) * market_sum / pairs
+            variance = _window_sums(market * market, window) - market_sum * market_sum / pairs
+            metrics["Beta"] = np.where(pairs >= min_periods, covariance / variance, np.nan)
+
+    names = list(range(series)) if names is None else list(names)
+    columns = pd.MultiIndex.from_product([list(metrics), names], names=["metric", "series"])
+    return pd.DataFrame(np.concatenate(list(metrics.values())).T, index=index, columns=columns)
+
+
+def get_metrics(
+    df: pd.DataFrame, strategy: str, trades: Optional[TradeLog] = None
+) -> Dict[str, any]:
+    # Get number of trade-metrics, falling back to any "_signal" columns
+    if trades is None:
+        trades = TradeLog.from_signals(df)
+    trades = trades.aligned(df.index)
+
+    table = batch_metrics(
+        df["Total_Return"].to_numpy(dtype=float),
+        df.index,
+        cumulative=df["Cumulative_Return"].to_numpy(dtype=float),
+        drawdown=df["Drawdown"].to_numpy(dtype=float),
+        trades=[len(trades)],
+        strategy=strategy,
     )
+    metrics = {name: table[name].iloc[0] for name in table.columns}
+    metrics["Equity Initial [$]"] = 10000
+    metrics["# Trades"] = len(trades)
 
-    # Average Drawdown
-    drawdowns = df["Drawdown"][df["Drawdown"] < 0]
-    metrics["Avg. Drawdown [%]"] = round(drawdowns.mean() * 100, 2)
-
-    # Drawdown Duration
-    drawdown_periods = (df["Drawdown"] < 0).astype(int).diff().fillna(0)
-    drawdown_starts = df.index[drawdown_periods == 1]
-    drawdown_ends = df.index[drawdown_periods == -1]
-    if len(drawdown_ends) < len(drawdown_starts):
-        drawdown_ends = drawdown_ends.append(df.index[-1:])
-    drawdown_durations = drawdown_ends - drawdown_starts
-    metrics["Max. Drawdown Duration"] = drawdown_durations.max()
-    metrics["Avg. Drawdown Duration"] = drawdown_durations.mean()
-
-    # Get number of trade-metrics
-    action_columns = [col for col in df.columns if col.endswith("_signal")]
-    buy_count = (df[action_columns] == "Buy").sum().sum()
-    sell_count = (df[action_columns] == "Sell").sum().sum()
-
-    # Trade metrics
-    metrics["# Trades"] = buy_count + sell_count
-    metrics["Best Day [%]"] = round(df["Total_Return"].max() * 100, 2)
-    metrics["Worst Day [%]"] = round(df["Total_Return"].min() * 100, 2)
-    metrics["Avg. Trade [%]"] = round(df["Total_Return"].mean() * 100, 2)
-    metrics["Max. Trade Duration"] = (df.index[-1] - df.index[0]).days
-    metrics["strategy"] = strategy
-
-    for metric in metrics:
-        print(f"{metric}: {metrics[metric]}")
-
-    return metrics
\ No newline at end of file
+    if is_capturing():
+        _capture.results.append(metrics)
+        if _capture.results.keep_frames:
+            _capture.results.frames.append(df)
+    return metrics
@@ -1,95 +1,161 @@
-from typing import List
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional, Tuple
 from matplotlib.figure import Figure
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import seaborn as sns
 
-from .metrics import get_metrics
-
-def plot_results(df: pd.DataFrame, stats: dict) -> List[Figure]:
-    # Ensure 'Date' column exists
-    if "Date" not in df.columns:
-        df["Date"] = pd.to_datetime(df.index)
-
-    figures = []  # List to store individual figures
-    plt.style.use("seaborn-v0_8-whitegrid")
-
-    # Create main strategy figure
-    fig_strategy = plt.figure(figsize=(16, 6))
-    ax = fig_strategy.add_subplot(111)
-    
-    ax.fill_between(
-        df["Date"],
-        df["Cumulative_Return"] - 1,
-        0,
-        alpha=0.3,
-        color="#1e90ff",
-        label="Cumulative Return",
-    )
-    ax.plot(df["Date"], df["Cumulative_Return"] - 1, color="#1e90ff", linewidth=2)
-    ax.set_title("Strategy Cumulative Return", fontsize=14)
-    ax.set_ylabel("Return", fontsize=12)
-    ax.set_xlabel("Date", fontsize=12)
-    ax.legend(loc="upper left")
-
-    # Add stats text box to strategy figure
-    stats_text = f"""
+from .metrics import get_metrics, is_capturing
+from .trades import BUY, SELL, TradeLog
+
+STYLE = "seaborn-v0_8-whitegrid"
+
+_deferred = threading.local()
+
+
+@contextmanager
+def defer_plots() -> Iterator[None]:
+    # Strategies return plot specs without rendering them, for callers (the
+    # GUI) that draw each figure only when it is shown
+    previous = getattr(_deferred, "active", False)
+    _deferred.active = True
+    try:
+        yield
+    finally:
+        _deferred.active = previous
+
+
+def is_deferring() -> bool:
+    return getattr(_deferred, "active", False)
+
+
+@dataclass(frozen=True)
+class PlotSpec:
+    # A figure's title and the function that draws it; building one costs
+    # nothing, the matplotlib figure only exists once render() is called
+    title: str
+    draw: Callable[[Figure], None]
+    figsize: Tuple[float, float] = (16, 6)
+
+    def __str__(self):
+        return f"Plot spec for {self.title}."
+
+    def render(self, pyplot: bool = False) -> Figure:
+        # A plain Figure for embedding in a canvas, or a pyplot-managed one
+        # that plt.show() and notebooks pick up
+        with plt.style.context(STYLE):
+            figure = plt.figure(figsize=self.figsize) if pyplot else Figure(figsize=self.figsize)
+            self.draw(figure)
+            figure.tight_layout()
+        return figure
+
+
+def render_plots(specs: List[PlotSpec]) -> List[Tuple[Figure, str]]:
+    return [(spec.render(pyplot=True), spec.title) for spec in specs]
+
+
+def _dates(df: pd.DataFrame) -> pd.DatetimeIndex:
+    return pd.to_datetime(df["Date"] if "Date" in df.columns else df.index)
+
+
+def plot_specs(
+    df: pd.DataFrame, stats: dict, trades: Optional[TradeLog] = None
+) -> List[PlotSpec]:
+    if is_capturing():
+        return []
+
+    if trades is None:
+        trades = TradeLog.from_signals(df)
+    trades = trades.aligned(df.index)
+    dates = _dates(df)
+    cumulative = df["Cumulative_Return"].to_numpy(dtype=float) - 1
+
+    def draw_strategy(fig: Figure) -> None:
+        ax = fig.add_subplot(111)
+        ax.fill_between(
+            dates,
+            cumulative,
+            0,
+            alpha=0.3,
+            color="#1e90ff",
+            label="Cumulative Return",
+        )
+        ax.plot(dates, cumulative, color="#1e90ff", linewidth=2)
+        ax.set_title("Strategy Cumulative Return", fontsize=14)
+        ax.set_ylabel("Return", fontsize=12)
+        ax.set_xlabel("Date", fontsize=12)
+        ax.legend(loc="upper left")
+
+        # Add stats text box to strategy figure
+        stats_text = f"""
     Strategy: {stats['strategy']}
     Return: {stats['Return [%]']:.2f}%
     Sharpe Ratio: {stats['Sharpe Ratio']:.2f}
     Max Drawdown: {stats['Max. Drawdown [%]']:.2f}%
     """
-    fig_strategy.text(
-        0.02,
-        0.02,
-        stats_text,
-        fontsize=10,
-        va="bottom",
-        ha="left",
-        bbox={"facecolor": "white", "alpha": 0.8, "pad": 5},
-    )
-
-    plt.tight_layout()
-    figures.append((fig_strategy, "Strategy Overview"))
-
-    # Create individual figures for each stock
+        fig.text(
+            0.02,
+            0.02,
+            stats_text,
+            fontsize=10,
+            va="bottom",
+            ha="left",
+            bbox={"facecolor": "white", "alpha": 0.8, "pad": 5},
+        )
+
+    specs = [PlotSpec("Strategy Overview", draw_strategy)]
+
+    # One spec per stock; its return column is only compounded when drawn
     stock_columns = [
         col for col in df.columns if col.endswith("_return") and col != "Total_Return"
     ]
-
     for column in stock_columns:
         stock_name = column.split("_")[0]
-        fig_stock = plt.figure(figsize=(16, 6))
-        ax = fig_stock.add_subplot(111)
+        specs.append(
+            PlotSpec(
+                f"{stock_name} Performance",
+                _stock_drawer(stock_name, dates, df[column], trades),
+            )
+        )
+    return specs
+
+
+def _stock_drawer(
+    stock_name: str, dates: pd.DatetimeIndex, returns: pd.Series, trades: TradeLog
+) -> Callable[[Figure], None]:
+    def draw(fig: Figure) -> None:
+        ax = fig.add_subplot(111)
 
         # Calculate cumulative return for the stock
-        cumulative_return = (1 + df[column]).cumprod() - 1
+        cumulative_return = (1 + returns).cumprod() - 1
 
         ax.plot(
-            df["Date"],
+            dates,
             cumulative_return,
             label=f"{stock_name} Cumulative",
             linewidth=1.5,
         )
 
         # Plot buy and sell signals
-        signal_column = f"{stock_name}_signal"
-        if signal_column in df.columns:
-            buy_mask = df[signal_column] == "Buy"
-            sell_mask = df[signal_column] == "Sell"
+        signal_dates, sides = trades.for_ticker(stock_name)
+        if len(signal_dates):
+            buy_dates = signal_dates[sides == BUY]
+            sell_dates = signal_dates[sides == SELL]
 
             ax.scatter(
-                df.loc[buy_mask, "Date"],
-                cumulative_return.loc[buy_mask],
+                pd.to_datetime(buy_dates),
+                cumulative_return.loc[buy_dates],
                 marker="^",
                 color="g",
                 s=100,
                 label="Buy",
             )
             ax.scatter(
-                df.loc[sell_mask, "Date"],
-                cumulative_return.loc[sell_mask],
+                pd.to_datetime(sell_dates),
+                cumulative_return.loc[sell_dates],
                 marker="v",
                 color="r",
                 s=100,
@@ -101,7 +167,34 @@ def plot_results(df: pd.DataFrame, stats: dict) -> List[Figure]:
         ax.set_xlabel("Date", fontsize=12)
         ax.legend(loc="upper left")
 
-        plt.tight_layout()
-        figures.append((fig_stock, f"{stock_name} Performance"))
+    return draw
+
+
+def plot_results(
+    df: pd.DataFrame, stats: dict, trades: Optional[TradeLog] = None
+) -> List[Tuple[Figure, str]]:
+    return render_plots(plot_specs(df, stats, trades))
+
+
+def rolling_specs(table: pd.DataFrame, window: int) -> List[PlotSpec]:
+    # One panel per rolling metric from rolling_metrics, one line per series
+    if is_capturing() or table.dropna(how="all").empty:
+        return []
+
+    metrics = list(table.columns.get_level_values("metric").unique())
+
+    def draw(fig: Figure) -> None:
+        axes = fig.subplots(len(metrics), 1, sharex=True, squeeze=False)[:, 0]
+        for ax, metric in zip(axes, metrics):
+            for series, values in table[metric].items():
+                ax.plot(table.index, values, linewidth=1.5, label=str(series))
+            ax.set_title(f"Rolling {metric} ({window} bars)", fontsize=12)
+            ax.set_ylabel(metric, fontsize=10)
+        axes[0].legend(loc="upper left")
+        axes[-1].set_xlabel("Date", fontsize=12)
+
+    return [PlotSpec("Rolling Metrics", draw, figsize=(16, 3 * len(metrics)))]
+
 
-    return figures
\ No newline at end of file
+def plot_rolling(table: pd.DataFrame, window: int) -> List[Tuple[Figure, str]]:
+    return render_plots(rolling_specs(table, window))
@@ -0,0 +1,275 @@
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+from pandas import DataFrame, Timestamp
+
+from utils.config import CACHE_DIR
+from utils.downloader import PRICE_COLUMNS, BulkDownloader, DownloadReport
+
+try:
+    import fcntl
+except ImportError:
+    # Windows locks a byte range instead
+    fcntl = None
+    import msvcrt
+
+DateLike = Union[str, date, datetime, Timestamp]
+Fetcher = Callable[[List[str], Timestamp, Timestamp, str], DownloadReport]
+
+
+def _lock_file(handle) -> None:
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        return
+    handle.seek(0)
+    while True:
+        try:
+            # Gives up after about ten seconds of retries, so keep waiting
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+
+def _unlock_file(handle) -> None:
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class PriceStore:
+    # Part files per ticker before reads fold them back into a single file
+    max_parts = 8
+
+    _instance: Optional["PriceStore"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self, cache_dir: Path = CACHE_DIR / "prices", fetcher: Optional[Fetcher] = None
+    ) -> None:
+        self._cache_dir = Path(cache_dir)
+        self._fetcher = fetcher or BulkDownloader()
+        self._lock = threading.RLock()
+        # Sandbox workers and the app share the directory, so the thread lock
+        # is paired with a lock file held while any thread of this process is inside
+        self._lock_handle = None
+        self._lock_depth = 0
+
+    def __str__(self):
+        return f"OHLCV price store in {self._cache_dir}."
+
+    @classmethod
+    def instance(cls) -> "PriceStore":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @contextmanager
+    def _locked(self):
+        # Reentrant: only the outermost call of the owning thread takes the file lock
+        with self._lock:
+            if self._lock_depth == 0:
+                self._cache_dir.mkdir(parents=True, exist_ok=True)
+                handle = open(self._cache_dir / ".lock", "a+b")
+                try:
+                    _lock_file(handle)
+                except BaseException:
+                    handle.close()
+                    raise
+                self._lock_handle = handle
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    _unlock_file(self._lock_handle)
+                    self._lock_handle.close()
+                    self._lock_handle = None
+
+    def get(
+        self,
+        tickers: Sequence[str],
+        start: DateLike,
+        end: Optional[DateLike] = None,
+        interval: str = "1d",
+        field: str = "Close",
+    ) -> DataFrame:
+        tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+        start, end = self._normalize_range(start, end)
+
+        with self._locked():
+            self.update(tickers, start, end, interval)
+            columns = {}
+            for ticker in tickers:
+                prices = self.load(ticker, interval)
+                prices = prices[(prices.index >= start) & (prices.index < end)]
+                if field in prices.columns and not prices[field].dropna().empty:
+                    columns[ticker] = prices[field]
+
+        missing = [ticker for ticker in tickers if ticker not in columns]
+        if missing:
+            print(f"Warning: no price data for {', '.join(missing)}")
+
+        df = pd.DataFrame(columns)
+        df.index.name = "Date"
+        return df.sort_index()
+
+    def update(
+        self, tickers: Sequence[str], start: DateLike, end: DateLike, interval: str = "1d"
+    ) -> None:
+        start, end = self._normalize_range(start, end)
+
+        with self._locked():
+            # Group tickers with identical gaps so each gap is one bulk request
+            gaps: Dict[Tuple[Timestamp, Timestamp], List[str]] = {}
+            for ticker in tickers:
+                covered = self._read_coverage(ticker, interval)
+                for gap in self._missing_ranges(covered, start, end):
+                    gaps.setdefault(gap, []).append(ticker)
+
+            for (gap_start, gap_end), gap_tickers in gaps.items():
+                report = self._fetcher(gap_tickers, gap_start, gap_end, interval)
+                for ticker, prices in report.frames.items():
+                    self._append(ticker, interval, prices)
+
+                # Failed tickers stay uncovered so the next request retries them
+                for ticker in gap_tickers:
+                    if ticker not in report.failed:
+                        self._add_coverage(ticker, interval, gap_start, gap_end)
+                if report.failed:
+                    print(f"Warning: {report.summary()}")
+
+    def load(self, ticker: str, interval: str = "1d") -> DataFrame:
+        with self._locked():
+            parts = self._parts(ticker, interval)
+            if not parts:
+                return pd.DataFrame(columns=PRICE_COLUMNS, index=pd.DatetimeIndex([]))
+
+            df = pd.concat([pd.read_parquet(part) for part in parts])
+            df = df[~df.index.duplicated(keep="last")].sort_index()
+            if len(parts) > self.max_parts:
+                self._compact(ticker, interval, df, parts)
+            return df
+
+    def clear(self, ticker: Optional[str] = None, interval: str = "1d") -> None:
+        with self._locked():
+            if ticker:
+                paths = self._parts(ticker, interval) + [self._coverage_path(ticker, interval)]
+            else:
+                # The lock file stays, other processes may be waiting on it
+                paths = [
+                    path
+                    for path in self._cache_dir.rglob("*")
+                    if path.is_file() and path.name != ".lock"
+                ]
+            for path in paths:
+                if path.exists():
+                    path.unlink()
+
+    @staticmethod
+    def _normalize_range(
+        start: DateLike, end: Optional[DateLike]
+    ) -> Tuple[Timestamp, Timestamp]:
+        start = pd.Timestamp(start).tz_localize(None).normalize()
+        end = pd.Timestamp(end or date.today()).tz_localize(None).normalize()
+        if end <= start:
+            raise ValueError(f"End date {end.date()} must be after start date {start.date()}")
+        return start, end
+
+    @staticmethod
+    def _missing_ranges(
+        covered: List[Tuple[Timestamp, Timestamp]], start: Timestamp, end: Timestamp
+    ) -> List[Tuple[Timestamp, Timestamp]]:
+        gaps = []
+        cursor = start
+        for covered_start, covered_end in covered:
+            if covered_end <= cursor:
+                continue
+            if covered_start >= end:
+                break
+            if covered_start > cursor:
+                gaps.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def _ticker_dir(self, ticker: str, interval: str) -> Path:
+        return self._cache_dir / interval / ticker
+
+    def _coverage_path(self, ticker: str, interval: str) -> Path:
+        return self._ticker_dir(ticker, interval) / "coverage.json"
+
+    def _parts(self, ticker: str, interval: str) -> List[Path]:
+        ticker_dir = self._ticker_dir(ticker, interval)
+        if not ticker_dir.exists():
+            return []
+        return sorted(ticker_dir.glob("*.parquet"))
+
+    def _read_coverage(
+        self, ticker: str, interval: str
+    ) -> List[Tuple[Timestamp, Timestamp]]:
+        path = self._coverage_path(ticker, interval)
+        if not path.exists():
+            return []
+        ranges = json.loads(path.read_text())
+        return [(pd.Timestamp(start), pd.Timestamp(end)) for start, end in ranges]
+
+    def _add_coverage(
+        self, ticker: str, interval: str, start: Timestamp, end: Timestamp
+    ) -> None:
+        # Today's bar is still forming, so never mark it as complete
+        end = min(end, pd.Timestamp(date.today()))
+        if end <= start:
+            return
+
+        merged: List[Tuple[Timestamp, Timestamp]] = []
+        for range_start, range_end in sorted(
+            self._read_coverage(ticker, interval) + [(start, end)]
+        ):
+            if merged and range_start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], range_end))
+            else:
+                merged.append((range_start, range_end))
+
+        path = self._coverage_path(ticker, interval)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(
+            json.dumps([[s.strftime("%Y-%m-%d"), e.strftime("%Y-%m-%d")] for s, e in merged])
+        )
+        os.replace(tmp_path, path)
+
+    def _append(self, ticker: str, interval: str, prices: DataFrame) -> None:
+        prices = prices[[col for col in PRICE_COLUMNS if col in prices.columns]].copy()
+        prices.index = pd.DatetimeIndex(prices.index).tz_localize(None)
+        prices.index.name = "Date"
+
+        # New rows land in their own part file, existing parts are never rewritten
+        ticker_dir = self._ticker_dir(ticker, interval)
+        ticker_dir.mkdir(parents=True, exist_ok=True)
+        name = f"{time.time_ns()}_{uuid.uuid4().hex[:8]}.parquet"
+        prices.to_parquet(ticker_dir / name)
+
+    def _compact(
+        self, ticker: str, interval: str, df: DataFrame, parts: List[Path]
+    ) -> None:
+        ticker_dir = self._ticker_dir(ticker, interval)
+        tmp_path = ticker_dir / "compact.parquet.tmp"
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, ticker_dir / f"{time.time_ns()}_compact.parquet")
+        for part in parts:
+            part.unlink()
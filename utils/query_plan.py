@@ -0,0 +1,171 @@
+import inspect
+import json
+import typing
+from dataclasses import asdict, dataclass, field
+from datetime import date
+from typing import Any, Dict, List
+
+import pandas as pd
+from pandas import DataFrame
+
+from strategies.registry import REGISTRY, StrategyRegistry
+
+FILTER_OPS = {
+    "==": lambda col, value: col == value,
+    "!=": lambda col, value: col != value,
+    ">": lambda col, value: col > value,
+    ">=": lambda col, value: col >= value,
+    "<": lambda col, value: col < value,
+    "<=": lambda col, value: col <= value,
+    "in": lambda col, value: col.isin(value),
+    "not in": lambda col, value: ~col.isin(value),
+    "contains": lambda col, value: col.astype(str).str.contains(
+        str(value), case=False, regex=False
+    ),
+}
+
+
+class PlanError(ValueError):
+    pass
+
+
+def _coerce(value: Any, annotation: Any, name: str) -> Any:
+    if annotation is inspect.Parameter.empty or annotation is Any:
+        return value
+
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    # Optional[X] and Union[X, None]
+    if origin is typing.Union:
+        if value is None and type(None) in args:
+            return None
+        non_none = [arg for arg in args if arg is not type(None)]
+        return _coerce(value, non_none[0], name)
+
+    if origin in (list, List):
+        if isinstance(value, str):
+            value = [value]
+        if not isinstance(value, (list, tuple)):
+            raise PlanError(f"Argument '{name}' must be a list, got {value!r}")
+        item_type = args[0] if args else Any
+        return [_coerce(item, item_type, name) for item in value]
+
+    try:
+        if annotation is bool:
+            if isinstance(value, str):
+                return value.strip().lower() in ("true", "1", "yes")
+            return bool(value)
+        if annotation is int:
+            if isinstance(value, float) and not value.is_integer():
+                raise ValueError
+            return int(value)
+        if annotation is float:
+            return float(value)
+        if annotation is str:
+            return str(value)
+    except (TypeError, ValueError):
+        raise PlanError(
+            f"Argument '{name}' must be {annotation.__name__}, got {value!r}"
+        )
+    return value
+
+
+@dataclass
+class FilterPredicate:
+    column: str
+    op: str
+    value: Any
+
+    def mask(self, df: DataFrame) -> pd.Series:
+        return FILTER_OPS[self.op](df[self.column], self.value)
+
+
+@dataclass
+class QueryPlan:
+    strategy: str
+    start_date: str
+    end_date: str
+    filters: List[FilterPredicate] = field(default_factory=list)
+    arguments: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_json(cls, text: str) -> "QueryPlan":
+        try:
+            payload = json.loads(text)
+        except ValueError as e:
+            raise PlanError(f"Plan is not valid JSON: {str(e)}")
+        return cls.from_dict(payload)
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "QueryPlan":
+        if not isinstance(payload, dict):
+            raise PlanError("Plan must be a JSON object")
+        try:
+            filters = [
+                FilterPredicate(item["column"], item["op"], item.get("value"))
+                for item in payload.get("filters") or []
+            ]
+            return cls(
+                strategy=payload["strategy"],
+                start_date=payload["start_date"],
+                end_date=payload.get("end_date") or date.today().strftime("%Y-%m-%d"),
+                filters=filters,
+                arguments=dict(payload.get("arguments") or {}),
+            )
+        except (KeyError, TypeError) as e:
+            raise PlanError(f"Plan is missing a required field: {str(e)}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def validate(
+        self, ticker_data: DataFrame, registry: StrategyRegistry = REGISTRY
+    ) -> None:
+        if self.strategy not in registry:
+            raise PlanError(f"Strategy '{self.strategy}' not found in any of the classes.")
+
+        for predicate in self.filters:
+            if predicate.column not in ticker_data.columns:
+                raise PlanError(f"Unknown filter column '{predicate.column}'")
+            if predicate.op not in FILTER_OPS:
+                raise PlanError(f"Unsupported filter operator '{predicate.op}'")
+            if predicate.op in ("in", "not in"):
+                if isinstance(predicate.value, str):
+                    predicate.value = [predicate.value]
+                if not isinstance(predicate.value, list):
+                    raise PlanError(f"Filter on '{predicate.column}' needs a list value")
+
+        try:
+            start = pd.Timestamp(self.start_date)
+            end = pd.Timestamp(self.end_date)
+        except (TypeError, ValueError) as e:
+            raise PlanError(f"Invalid date in plan: {str(e)}")
+        # A null date parses to NaT, which compares False against everything
+        if pd.isna(start) or pd.isna(end):
+            raise PlanError("Plan needs both a start and an end date")
+        if end <= start:
+            raise PlanError(f"End date {self.end_date} must be after {self.start_date}")
+
+        # Bind arguments against the strategy signature, coercing to the annotated types
+        spec = registry.get(self.strategy)
+        arguments = {}
+        for name, value in self.arguments.items():
+            if name == "df":
+                continue
+            parameter = spec.parameter(name)
+            if parameter is None:
+                raise PlanError(f"Strategy '{self.strategy}' has no argument '{name}'")
+            arguments[name] = _coerce(value, parameter.annotation, name)
+        for parameter in spec.parameters:
+            if parameter.required and parameter.name not in arguments:
+                raise PlanError(
+                    f"Strategy '{self.strategy}' requires argument '{parameter.name}'"
+                )
+        self.arguments = arguments
+
+    def select(self, ticker_data: DataFrame) -> DataFrame:
+        mask = pd.Series(True, index=ticker_data.index)
+        for predicate in self.filters:
+            mask &= predicate.mask(ticker_data).fillna(False).astype(bool)
+        return ticker_data[mask]
@@ -0,0 +1,393 @@
+import atexit
+import contextlib
+import io
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import date
+from multiprocessing.shared_memory import SharedMemory
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from pandas import DataFrame
+
+# Names every worker provides itself, so they never cross the process boundary
+WORKER_NAMES = {"pd", "np", "DataFrame", "date", "load_prices", "__builtins__"}
+
+
+class SandboxError(RuntimeError):
+    pass
+
+
+class SandboxTimeout(SandboxError, TimeoutError):
+    pass
+
+
+def _write_shared(data: bytes) -> Tuple[SharedMemory, int]:
+    shm = SharedMemory(create=True, size=max(len(data), 1))
+    shm.buf[: len(data)] = data
+    return shm, len(data)
+
+
+def _read_shared(name: str, size: int) -> bytes:
+    shm = SharedMemory(name=name)
+    try:
+        return bytes(shm.buf[:size])
+    finally:
+        shm.close()
+
+
+def _write_frame(df: DataFrame) -> Tuple[SharedMemory, Tuple[int, List[int]]]:
+    # Pickle protocol 5 hands the numeric blocks over as out-of-band buffers,
+    # which are copied once, straight into the segment after the (small)
+    # pickle header; nothing is serialised into an intermediate bytes object
+    buffers: List[pickle.PickleBuffer] = []
+    header = pickle.dumps(df, protocol=5, buffer_callback=buffers.append)
+    views = [buffer.raw() for buffer in buffers]
+    shm = SharedMemory(create=True, size=max(len(header) + sum(v.nbytes for v in views), 1))
+    shm.buf[: len(header)] = header
+    offset = len(header)
+    for view in views:
+        shm.buf[offset : offset + view.nbytes] = view
+        offset += view.nbytes
+    return shm, (len(header), [view.nbytes for view in views])
+
+
+def _map_frame(name: str, layout: Tuple[int, List[int]]) -> Tuple[DataFrame, SharedMemory]:
+    # The frame's numeric blocks are views of the segment, not copies, so the
+    # segment stays mapped for as long as the frame is cached
+    header, sizes = layout
+    shm = SharedMemory(name=name)
+    buffers = []
+    offset = header
+    for size in sizes:
+        buffers.append(shm.buf[offset : offset + size])
+        offset += size
+    return pickle.loads(shm.buf[:header], buffers=buffers), shm
+
+
+def _release(shm: SharedMemory) -> None:
+    # A segment still referenced by a live array is unmapped when that goes
+    with contextlib.suppress(BufferError):
+        shm.close()
+
+
+def _write_stream(sink: Any, table: Any) -> None:
+    import pyarrow as pa
+
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _pack_result(value: Any) -> Tuple[str, Any]:
+    if not isinstance(value, DataFrame):
+        return "value", value
+
+    # Numeric frames go through Arrow IPC, sized first and then written
+    # straight into shared memory; anything Arrow cannot type falls back to
+    # a pickle blob. Both travel through shared memory instead of the pipe.
+    try:
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(value)
+        sizer = pa.MockOutputStream()
+        _write_stream(sizer, table)
+        size = sizer.size()
+        shm = SharedMemory(create=True, size=max(size, 1))
+        try:
+            target = pa.py_buffer(shm.buf)
+            _write_stream(pa.FixedSizeBufferWriter(target), table)
+            del target
+        except Exception:
+            shm.close()
+            shm.unlink()
+            raise
+        kind = "arrow"
+    except Exception:
+        shm, size = _write_shared(pickle.dumps(value, protocol=5))
+        kind = "pickle"
+
+    shm.close()
+    return kind, (shm.name, size)
+
+
+def _unpack_result(kind: str, payload: Any) -> Any:
+    if kind == "value":
+        return payload
+
+    # One copy out of the segment, which is unlinked straight away; to_pandas
+    # may keep the index or nested values as views of the Arrow buffers, so
+    # those buffers must belong to this process rather than to the segment
+    name, size = payload
+    try:
+        data = _read_shared(name, size)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            SharedMemory(name=name).unlink()
+
+    if kind == "arrow":
+        import pyarrow as pa
+
+        with pa.ipc.open_stream(pa.py_buffer(data)) as reader:
+            return reader.read_all().to_pandas()
+    return pickle.loads(data)
+
+
+def _limit_memory(memory_limit: Optional[int]) -> None:
+    if not memory_limit:
+        return
+    try:
+        import resource
+    except ImportError:
+        # Not available on Windows, only the wall-clock limit applies there
+        return
+    resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+def _worker_main(conn, memory_limit: Optional[int]) -> None:
+    _limit_memory(memory_limit)
+
+    # Heavy imports happen once per worker, before the first task arrives
+    import numpy as np
+    import yfinance  # noqa: F401
+
+    from utils.code_cache import SNIPPET_BUILTINS, compile_snippet
+    from utils.price_store import PriceStore
+
+    builtins = {
+        "pd": pd,
+        "np": np,
+        "DataFrame": DataFrame,
+        "date": date,
+        "load_prices": PriceStore.instance().get,
+        "__builtins__": SNIPPET_BUILTINS,
+    }
+    frames: "OrderedDict[str, Tuple[DataFrame, SharedMemory]]" = OrderedDict()
+    conn.send(("ready", os.getpid()))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message[0] == "stop":
+            break
+
+        _, source, label, result_name, payload, attributes = message
+        output = io.StringIO()
+        try:
+            namespace = {name: _unpack_value(value, frames) for name, value in payload.items()}
+            namespace.update(builtins)
+            code = compile_snippet(source, namespace, label, attributes)
+            with contextlib.redirect_stdout(output):
+                exec(code, namespace)
+            conn.send(("ok", _pack_result(namespace.get(result_name)), output.getvalue()))
+        except MemoryError:
+            conn.send(("error", "snippet exceeded the sandbox memory limit", output.getvalue()))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {str(e)}", output.getvalue()))
+        # The snippet's namespace would otherwise keep the last frames mapped
+        namespace = None
+
+    # Cached frames are views of their segments, so they go before the segments
+    segments = [shm for _, shm in frames.values()]
+    frames.clear()
+    for shm in segments:
+        _release(shm)
+
+
+def _unpack_value(
+    value: Tuple[str, Any], frames: "OrderedDict[str, Tuple[DataFrame, SharedMemory]]"
+) -> Any:
+    kind, payload = value
+    if kind == "frame":
+        key, shared = payload
+        if shared is not None:
+            frames[key] = _map_frame(*shared)
+            while len(frames) > SandboxPool.frame_cache_size:
+                _, (frame, shm) = frames.popitem(last=False)
+                del frame
+                _release(shm)
+        frames.move_to_end(key)
+        return frames[key][0]
+    if kind == "namespace":
+        return SimpleNamespace(**{k: _unpack_value(v, frames) for k, v in payload.items()})
+    return payload
+
+
+class _Worker:
+    def __init__(self, ctx, memory_limit: Optional[int]) -> None:
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn, memory_limit), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        # Mirrors the worker's frame cache so cached inputs are not resent
+        self.frames: "OrderedDict[str, None]" = OrderedDict()
+
+    def wait_ready(self, timeout: float) -> None:
+        if self.ready:
+            return
+        if not self.conn.poll(timeout):
+            raise SandboxTimeout("Sandbox worker did not start in time.")
+        self.conn.recv()
+        self.ready = True
+
+    def kill(self) -> None:
+        with contextlib.suppress(Exception):
+            self.conn.close()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+
+
+class SandboxPool:
+    # Input frames each worker keeps between tasks (the ticker universe, mostly)
+    frame_cache_size = 4
+
+    _instance: Optional["SandboxPool"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        workers: int = 2,
+        timeout: float = 300.0,
+        memory_limit: Optional[int] = 4 * 1024**3,
+        start_timeout: float = 60.0,
+    ) -> None:
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.start_timeout = start_timeout
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._all: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._started = False
+
+    def __str__(self):
+        return f"Sandbox pool of {self.workers} worker processes."
+
+    @classmethod
+    def instance(cls) -> "SandboxPool":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def start(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+            for _ in range(self.workers):
+                self._spawn()
+            self._started = True
+        atexit.register(self.shutdown)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for worker in self._all:
+                with contextlib.suppress(Exception):
+                    worker.conn.send(("stop",))
+                worker.kill()
+            self._all = []
+            self._idle = queue.Queue()
+            self._started = False
+
+    def run(
+        self,
+        source: str,
+        namespace: Dict[str, Any],
+        result_name: str,
+        label: str = "snippet",
+        timeout: Optional[float] = None,
+        attributes: Iterable[str] = (),
+    ) -> Any:
+        self.start()
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._idle.get()
+        handles: List[SharedMemory] = []
+        healthy = False
+        try:
+            worker.wait_ready(self.start_timeout)
+            payload = {
+                name: self._pack_value(value, worker, handles)
+                for name, value in namespace.items()
+                if name not in WORKER_NAMES
+            }
+            worker.conn.send(("run", source, label, result_name, payload, tuple(attributes)))
+
+            if not worker.conn.poll(timeout):
+                raise SandboxTimeout(f"{label} exceeded the {timeout:.0f}s time limit")
+            status, result, output = worker.conn.recv()
+            healthy = True
+        except (EOFError, ConnectionError) as e:
+            raise SandboxError(f"Sandbox worker crashed while running {label}: {str(e)}")
+        finally:
+            for shm in handles:
+                shm.close()
+                with contextlib.suppress(FileNotFoundError):
+                    shm.unlink()
+            if healthy:
+                self._idle.put(worker)
+            else:
+                # A hung or dead worker is replaced, the caller only sees the error
+                self._replace(worker)
+
+        if output:
+            print(output, end="")
+        if status == "error":
+            raise SandboxError(f"Error executing {label}: {result}")
+        return _unpack_result(*result)
+
+    def _pack_value(
+        self, value: Any, worker: _Worker, handles: List[SharedMemory]
+    ) -> Tuple[str, Any]:
+        if isinstance(value, DataFrame):
+            key = self._frame_key(value)
+            if key in worker.frames:
+                worker.frames.move_to_end(key)
+                return "frame", (key, None)
+            shm, layout = _write_frame(value)
+            handles.append(shm)
+            worker.frames[key] = None
+            while len(worker.frames) > self.frame_cache_size:
+                worker.frames.popitem(last=False)
+            return "frame", (key, (shm.name, layout))
+        if isinstance(value, SimpleNamespace):
+            return "namespace", {
+                name: self._pack_value(item, worker, handles)
+                for name, item in vars(value).items()
+            }
+        return "value", value
+
+    @staticmethod
+    def _frame_key(df: DataFrame) -> str:
+        # Only frames stamped with a content fingerprint are reused across tasks
+        fingerprint = df.attrs.get("fingerprint")
+        if fingerprint is None:
+            return uuid.uuid4().hex
+        index_hash = pd.util.hash_pandas_object(df.index, index=False).sum()
+        return f"{fingerprint}:{df.shape}:{index_hash}:{hash(tuple(df.columns))}"
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._ctx, self.memory_limit)
+        self._all.append(worker)
+        self._idle.put(worker)
+        return worker
+
+    def _replace(self, worker: _Worker) -> None:
+        worker.kill()
+        with self._lock:
+            if worker in self._all:
+                self._all.remove(worker)
+            if self._started:
+                self._spawn()
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from io import StringIO
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pandas as pd
+import requests
+from pandas import DataFrame
+
+from utils.config import CACHE_DIR
+from utils.type_convert import convert_data
+
+TICKER_DATA_URL = (
+    "https://raw.githubusercontent.com/nathang15/lookback/main/data/all_ticker_data.csv"
+)
+
+
+class TickerUniverse:
+    # Seconds before the cached universe is checked against the remote CSV again
+    ttl = 24 * 60 * 60
+
+    _instance: Optional["TickerUniverse"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        cache_dir: Path = CACHE_DIR,
+        ttl: Optional[int] = None,
+        url: str = TICKER_DATA_URL,
+    ) -> None:
+        self._cache_dir = Path(cache_dir)
+        self._data_path = self._cache_dir / "ticker_universe.pkl"
+        self._meta_path = self._cache_dir / "ticker_universe.json"
+        self._url = url
+        if ttl is not None:
+            self.ttl = ttl
+        self._data: Optional[DataFrame] = None
+        self._sha256: Optional[str] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return f"Ticker universe cached in {self._cache_dir}."
+
+    @classmethod
+    def instance(cls) -> "TickerUniverse":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @property
+    def data(self) -> DataFrame:
+        with self._lock:
+            if self._data is None or self._is_expired(self._checked_at):
+                self._load()
+            # Lets worker processes keep the universe between tasks
+            self._data.attrs["fingerprint"] = self._sha256
+            return self._data
+
+    def refresh(self) -> DataFrame:
+        with self._lock:
+            self._download()
+            return self._data
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data = None
+            self._sha256 = None
+            self._checked_at = 0.0
+            for path in [self._data_path, self._meta_path]:
+                if path.exists():
+                    path.unlink()
+
+    def _is_expired(self, checked_at: float) -> bool:
+        return time.time() - checked_at > self.ttl
+
+    def _read_meta(self) -> Dict[str, Any]:
+        if not self._meta_path.exists() or not self._data_path.exists():
+            return {}
+        try:
+            return json.loads(self._meta_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, meta: Dict[str, Any]) -> None:
+        tmp_path = self._meta_path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(meta))
+        os.replace(tmp_path, self._meta_path)
+
+    def _load(self) -> None:
+        meta = self._read_meta()
+
+        # Cold process, warm disk: reuse the converted frame without any network
+        if meta and not self._is_expired(meta.get("checked_at", 0.0)):
+            self._read_cached(meta)
+            self._checked_at = meta["checked_at"]
+            return
+
+        try:
+            self._download(meta)
+        except Exception as e:
+            if not meta:
+                raise RuntimeError(f"Error loading ticker data: {str(e)}")
+            # Stale but usable cache beats failing the whole query
+            print(f"Warning: using cached ticker data, refresh failed: {str(e)}")
+            self._read_cached(meta)
+            self._checked_at = time.time()
+
+    def _read_cached(self, meta: Dict[str, Any]) -> None:
+        # Another process may have refreshed the file since we last read it
+        if self._data is None or self._sha256 != meta.get("sha256"):
+            self._data = pd.read_pickle(self._data_path)
+            self._sha256 = meta.get("sha256")
+
+    def _download(self, meta: Optional[Dict[str, Any]] = None) -> None:
+        meta = self._read_meta() if meta is None else meta
+
+        response = requests.get(self._url, timeout=30)
+        response.raise_for_status()
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        now = time.time()
+
+        # Remote file unchanged, only extend the cache lifetime
+        if meta.get("sha256") == content_hash:
+            self._read_cached(meta)
+            self._checked_at = now
+            self._write_meta({**meta, "checked_at": now})
+            return
+
+        self._data = self._parse(response.text)
+        self._sha256 = content_hash
+        self._checked_at = now
+
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._data_path.with_suffix(".pkl.tmp")
+        self._data.to_pickle(tmp_path, protocol=5)
+        os.replace(tmp_path, self._data_path)
+        self._write_meta({"sha256": content_hash, "checked_at": now, "url": self._url})
+
+    @staticmethod
+    def _parse(text: str) -> DataFrame:
+        tickers = pd.read_csv(StringIO(text), header=0).transpose()
+        tickers.columns = tickers.iloc[0]
+        tickers = tickers.iloc[1:]
+        tickers.reset_index(inplace=True)
+        tickers.rename(columns={"index": "ticker"}, inplace=True)
+        return convert_data(tickers)
@@ -0,0 +1,161 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Sides are stored as int8 so a trade costs 13 bytes instead of a Python
+# string in every cell of a (dates x tickers) object column
+BUY = 1
+SELL = -1
+SIDE_LABELS = {BUY: "Buy", SELL: "Sell"}
+
+
+class TradeLog:
+    # Sparse trade events: row of the date index, ticker id, side and the
+    # position held after the trade
+    def __init__(
+        self,
+        index: pd.Index,
+        tickers: Sequence[str],
+        rows: np.ndarray,
+        ticker_ids: np.ndarray,
+        sides: np.ndarray,
+        sizes: Optional[np.ndarray] = None,
+    ) -> None:
+        self._index = index
+        self._tickers = tuple(tickers)
+        self._rows = np.asarray(rows, dtype=np.int32)
+        self._ticker_ids = np.asarray(ticker_ids, dtype=np.int32)
+        self._sides = np.asarray(sides, dtype=np.int8)
+        if sizes is None:
+            sizes = self._sides
+        self._sizes = np.asarray(sizes, dtype=np.float32)
+
+    def __str__(self):
+        return f"Trade log with {len(self)} trades across {len(self._tickers)} tickers."
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @classmethod
+    def from_positions(
+        cls, positions: np.ndarray, index: pd.Index, tickers: Sequence[str]
+    ) -> "TradeLog":
+        # A trade is any bar where the position changes to a non-zero value,
+        # the same bars the "Buy"/"Sell" signal columns used to mark
+        previous = np.empty(positions.shape)
+        previous[0] = np.nan
+        previous[1:] = positions[:-1]
+        with np.errstate(invalid="ignore"):
+            traded = (positions != previous) & ((positions > 0) | (positions < 0))
+        rows, ticker_ids = np.nonzero(traded)
+        sizes = positions[rows, ticker_ids]
+        return cls(index, tickers, rows, ticker_ids, np.sign(sizes), sizes)
+
+    @classmethod
+    def round_trips(
+        cls, index: pd.Index, tickers: Sequence[str], sides: Sequence[int]
+    ) -> "TradeLog":
+        # Open on the first bar and close on the last, for buy/short-and-hold
+        sides = np.asarray(sides, dtype=np.int8)
+        ticker_ids = np.flatnonzero(sides)
+        count = len(ticker_ids)
+        rows = np.concatenate([np.zeros(count), np.full(count, len(index) - 1)])
+        return cls(
+            index,
+            tickers,
+            rows,
+            np.concatenate([ticker_ids, ticker_ids]),
+            np.concatenate([sides[ticker_ids], -sides[ticker_ids]]),
+            np.concatenate([sides[ticker_ids], np.zeros(count)]),
+        )
+
+    @classmethod
+    def from_signals(cls, df: pd.DataFrame) -> "TradeLog":
+        # Frames that still carry "{ticker}_signal" string columns
+        columns = [col for col in df.columns if str(col).endswith("_signal")]
+        tickers = [str(col)[: -len("_signal")] for col in columns]
+        labels = df[columns].to_numpy(dtype=object)
+        buys = labels == "Buy"
+        sides = np.where(buys, BUY, np.where(labels == "Sell", SELL, 0))
+        rows, ticker_ids = np.nonzero(sides)
+        return cls(df.index, tickers, rows, ticker_ids, sides[rows, ticker_ids])
+
+    @property
+    def index(self) -> pd.Index:
+        return self._index
+
+    @property
+    def tickers(self) -> Tuple[str, ...]:
+        return self._tickers
+
+    @property
+    def rows(self) -> np.ndarray:
+        return self._rows
+
+    @property
+    def ticker_ids(self) -> np.ndarray:
+        return self._ticker_ids
+
+    @property
+    def sides(self) -> np.ndarray:
+        return self._sides
+
+    @property
+    def sizes(self) -> np.ndarray:
+        return self._sizes
+
+    @property
+    def buys(self) -> int:
+        return int(np.count_nonzero(self._sides == BUY))
+
+    @property
+    def sells(self) -> int:
+        return int(np.count_nonzero(self._sides == SELL))
+
+    def aligned(self, index: pd.Index) -> "TradeLog":
+        # Keeps the trades whose dates are in `index`, renumbering their rows,
+        # e.g. after a strategy drops its warm-up bars
+        if index.equals(self._index):
+            return self
+        rows = index.get_indexer(self._index[self._rows])
+        keep = rows >= 0
+        return TradeLog(
+            index,
+            self._tickers,
+            rows[keep],
+            self._ticker_ids[keep],
+            self._sides[keep],
+            self._sizes[keep],
+        )
+
+    def for_ticker(self, ticker: str) -> Tuple[pd.Index, np.ndarray]:
+        # Dates and sides of one ticker's trades, for plotting markers
+        if ticker not in self._tickers:
+            return self._index[:0], self._sides[:0]
+        mask = self._ticker_ids == self._tickers.index(ticker)
+        return self._index[self._rows[mask]], self._sides[mask]
+
+    def to_frame(self) -> pd.DataFrame:
+        # One row per trade, for display
+        order = np.lexsort((self._ticker_ids, self._rows))
+        return pd.DataFrame(
+            {
+                "Date": self._index[self._rows[order]],
+                "Ticker": np.asarray(self._tickers, dtype=object)[self._ticker_ids[order]],
+                "Side": [SIDE_LABELS[side] for side in self._sides[order]],
+                "Position": self._sizes[order],
+            }
+        )
+
+    def signal_frame(self, tickers: Optional[List[str]] = None) -> pd.DataFrame:
+        # The legacy "{ticker}_signal" columns, built only when asked for
+        tickers = list(self._tickers) if tickers is None else tickers
+        labels = np.full((len(self._index), len(self._tickers)), None, dtype=object)
+        labels[self._rows, self._ticker_ids] = [SIDE_LABELS[side] for side in self._sides]
+        columns = [self._tickers.index(ticker) for ticker in tickers]
+        return pd.DataFrame(
+            labels[:, columns],
+            index=self._index,
+            columns=[f"{ticker}_signal" for ticker in tickers],
+        )